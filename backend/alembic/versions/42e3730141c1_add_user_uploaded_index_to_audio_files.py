@@ -0,0 +1,32 @@
+"""Add user_id, uploaded_at index to audio_files
+
+Revision ID: 42e3730141c1
+Revises: a02a7c0c0bf0
+Create Date: 2026-10-14 10:12:41.205317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '42e3730141c1'
+down_revision = 'a02a7c0c0bf0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ユーザーごとのファイル一覧（WHERE user_id = ? ORDER BY uploaded_at DESC）用
+    # 一覧で返す列をINCLUDEし、インデックスのみで応答できるようにする
+    op.create_index(
+        'ix_audio_files_user_uploaded',
+        'audio_files',
+        ['user_id', sa.text('uploaded_at DESC')],
+        unique=False,
+        postgresql_include=['id', 'original_filename', 'file_size', 'status']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audio_files_user_uploaded', table_name='audio_files')
@@ -1,17 +1,22 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models.user import User
 from app.utils.security import decode_access_token
+from app.auth.permissions import check_researcher
 
 security = HTTPBearer()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """現在のユーザーを取得"""
+def get_token_user_id(credentials: HTTPAuthorizationCredentials) -> int:
+    """
+    アクセストークンを検証し、ユーザーIDを取得
+
+    Raises:
+        HTTPException: トークンが無効または期限切れの場合
+    """
     token = credentials.credentials
     payload = decode_access_token(token)
 
@@ -21,17 +26,47 @@ def get_current_user(
             detail="Invalid or expired token"
         )
 
-    user_id = payload.get("sub")
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    return int(payload.get("sub"))
 
+def ensure_user_found(user: User) -> User:
+    """ユーザーが存在しなければ401を返す"""
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found"
         )
-
     return user
 
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    現在のユーザーを取得
+
+    権限判定（check_researcher等）はcurrent_user.roleを参照するため、
+    Userのroleは遅延ロード（deferred）にしないでください（属性アクセス時に追加SELECTが発生する）。
+    """
+    user_id = get_token_user_id(credentials)
+    user = db.query(User).filter(User.id == user_id).first()
+
+    return ensure_user_found(user)
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    現在のユーザーを取得（非同期エンドポイント用）
+
+    エンドポイントと同じAsyncSessionを使うため、同期セッションの接続や
+    スレッドプールを経由しません。
+    """
+    user_id = get_token_user_id(credentials)
+    user = await db.scalar(select(User).where(User.id == user_id))
+
+    return ensure_user_found(user)
+
 def require_role(role: str):
     """特定の役割を要求する"""
     def role_checker(current_user: User = Depends(get_current_user)):
@@ -42,3 +77,27 @@ def require_role(role: str):
             )
         return current_user
     return role_checker
+
+def ensure_researcher(current_user: User) -> User:
+    """研究者でなければ403を返す"""
+    if not check_researcher(current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="この機能は研究者アカウントのみ利用可能です"
+        )
+    return current_user
+
+def get_current_researcher(current_user: User = Depends(get_current_user)) -> User:
+    """
+    現在のユーザーを取得し、研究者でなければ403を返す
+
+    get_current_userはリクエスト内でキャッシュされるため、
+    他の依存関係と併用してもユーザー取得は1回のみです。
+    """
+    return ensure_researcher(current_user)
+
+async def get_current_researcher_async(
+    current_user: User = Depends(get_current_user_async)
+) -> User:
+    """現在のユーザーを取得し、研究者でなければ403を返す（非同期エンドポイント用）"""
+    return ensure_researcher(current_user)
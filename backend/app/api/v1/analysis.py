@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from kombu.exceptions import OperationalError as BrokerError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
+from typing import List, Optional
+
+from app.database import get_db, get_async_db
 from app.models.user import User
 from app.models.audio_file import AudioFile
 from app.models.analysis_result import AnalysisResult
@@ -11,13 +14,27 @@ from app.schemas.analysis_result import (
     AnalysisStatusSchema,
     AnalysisResultResponse
 )
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_current_user_async
 from app.tasks.analysis_tasks import analyze_audio_file
-from celery.result import AsyncResult
-from app.celery_app import celery_app
+from app.utils.task_state import get_task_state, wait_for_task_state, get_retry_after_ms
 
 router = APIRouter()
 
+TASK_QUEUE_UNAVAILABLE_MESSAGE = "Task queue is unavailable. Please try again later."
+
+# 完了・失敗したタスク状態に対応するファイルのステータス
+TASK_STATE_FILE_STATUSES = {
+    "SUCCESS": "completed",
+    "FAILURE": "failed"
+}
+
+STATUS_MESSAGES = {
+    "uploaded": "File uploaded, analysis not started",
+    "processing": "Analysis in progress",
+    "completed": "Analysis completed",
+    "failed": "Analysis failed"
+}
+
 
 @router.post("/start", response_model=AnalysisStatusSchema, status_code=status.HTTP_202_ACCEPTED)
 def start_analysis(
@@ -30,8 +47,10 @@ def start_analysis(
 
     - **file_id**: 解析する音声ファイルのID
     """
-    # ファイルの存在確認と権限チェック
-    audio_file = db.query(AudioFile).filter(
+    # ファイルの存在確認と権限チェック（必要な列のみ取得）
+    audio_file = db.query(AudioFile).options(
+        load_only(AudioFile.id, AudioFile.status, AudioFile.task_id)
+    ).filter(
         AudioFile.id == request.file_id,
         AudioFile.user_id == current_user.id
     ).first()
@@ -49,8 +68,14 @@ def start_analysis(
             detail=f"File is already {audio_file.status}"
         )
 
-    # Celeryタスクを開始
-    task = analyze_audio_file.delay(request.file_id)
+    # Celeryタスクを開始（ブローカーに接続できない場合はステータスを変えずに503を返す）
+    try:
+        task = analyze_audio_file.delay(request.file_id)
+    except BrokerError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=TASK_QUEUE_UNAVAILABLE_MESSAGE
+        )
 
     # タスクIDをデータベースに保存
     audio_file.task_id = task.id
@@ -66,20 +91,28 @@ def start_analysis(
 
 
 @router.get("/status/{file_id}", response_model=AnalysisStatusSchema)
-def get_analysis_status(
+async def get_analysis_status(
     file_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    wait: Optional[int] = Query(None, ge=1, le=30, description="処理中の場合、状態更新を最大何秒待つか（ロングポーリング）"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     解析のステータスを取得
 
     - **file_id**: 音声ファイルID
+    - **wait**: 処理中の場合に状態更新の通知を待機する秒数（オプション）
+
+    待機はイベントループ上で行うため、ロングポーリング中のクライアントが
+    スレッドプールのスレッドを占有しません。
     """
-    audio_file = db.query(AudioFile).filter(
-        AudioFile.id == file_id,
-        AudioFile.user_id == current_user.id
-    ).first()
+    # ステータス判定に必要な列のみ取得
+    audio_file = (await db.execute(
+        select(AudioFile.status, AudioFile.task_id).where(
+            AudioFile.id == file_id,
+            AudioFile.user_id == current_user.id
+        )
+    )).first()
 
     if not audio_file:
         raise HTTPException(
@@ -87,42 +120,58 @@ def get_analysis_status(
             detail="Audio file not found"
         )
 
-    status_messages = {
-        "uploaded": "File uploaded, analysis not started",
-        "processing": "Analysis in progress",
-        "completed": "Analysis completed",
-        "failed": "Analysis failed"
-    }
+    # 以降はRedisのみ参照するため、ロングポーリング中にDB接続を保持しないよう先に返却
+    await db.close()
 
     progress = None
+    retry_after_ms = None
     task_id = audio_file.task_id
+    file_status = audio_file.status
 
-    # 処理中の場合、タスクの進捗を取得
+    # 処理中の場合、ワーカーがRedisに保存したタスクの進捗を取得
     if audio_file.status == "processing" and audio_file.task_id:
         try:
-            task_result = AsyncResult(audio_file.task_id, app=celery_app)
-            if task_result.state == 'PROGRESS':
-                task_info = task_result.info
-                if isinstance(task_info, dict):
+            task_state = None
+            if wait:
+                task_state = await wait_for_task_state(audio_file.task_id, wait)
+            if task_state is None:
+                task_state = await get_task_state(audio_file.task_id)
+
+            task_state_name = task_state.get('state') if task_state else None
+
+            if task_state_name in TASK_STATE_FILE_STATUSES:
+                # DBを読んだ後にタスクが完了・失敗した場合は、その結果を返す
+                file_status = TASK_STATE_FILE_STATUSES[task_state_name]
+                message = STATUS_MESSAGES.get(file_status)
+                if file_status == "completed":
+                    progress = 100
+            else:
+                if task_state_name == 'PROGRESS':
+                    task_info = task_state.get('meta', {})
                     progress = task_info.get('progress', 0)
-                    message = task_info.get('message', status_messages.get(audio_file.status))
+                    message = task_info.get('message', STATUS_MESSAGES.get(file_status))
                 else:
-                    message = status_messages.get(audio_file.status)
-            else:
-                message = status_messages.get(audio_file.status)
+                    message = STATUS_MESSAGES.get(file_status)
+
+                # 過去の処理時間から次回確認までの間隔を提案
+                retry_after_ms = await get_retry_after_ms(
+                    analyze_audio_file.name,
+                    task_state.get('started_at') if task_state else None
+                )
         except Exception:
-            message = status_messages.get(audio_file.status)
+            message = STATUS_MESSAGES.get(file_status)
     else:
-        message = status_messages.get(audio_file.status, "Unknown status")
+        message = STATUS_MESSAGES.get(audio_file.status, "Unknown status")
         if audio_file.status == "completed":
             progress = 100
 
     return AnalysisStatusSchema(
         file_id=file_id,
-        status=audio_file.status,
+        status=file_status,
         message=message,
         progress=progress,
-        task_id=task_id
+        task_id=task_id,
+        retry_after_ms=retry_after_ms
     )
 
 
@@ -137,22 +186,21 @@ def get_analysis_results(
 
     - **file_id**: 音声ファイルID
     """
-    # ファイルの存在確認と権限チェック
-    audio_file = db.query(AudioFile).filter(
+    # ファイルの存在確認・権限チェックと解析結果の取得を1回のクエリで実行
+    rows = db.query(AudioFile.id, AnalysisResult).outerjoin(
+        AnalysisResult, AnalysisResult.audio_file_id == AudioFile.id
+    ).filter(
         AudioFile.id == file_id,
         AudioFile.user_id == current_user.id
-    ).first()
+    ).all()
 
-    if not audio_file:
+    if not rows:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Audio file not found"
         )
 
-    # 解析結果を取得
-    results = db.query(AnalysisResult).filter(
-        AnalysisResult.audio_file_id == file_id
-    ).all()
+    results = [result for _, result in rows if result is not None]
 
     if not results:
         raise HTTPException(
@@ -160,4 +208,4 @@ def get_analysis_results(
             detail="No analysis results found for this file"
         )
 
-    return [AnalysisResultResponse.model_validate(result) for result in results]
+    return [AnalysisResultResponse.from_model(result) for result in results]
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Request, status
+from fastapi.responses import Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from kombu.exceptions import OperationalError as BrokerError
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload, load_only
 from typing import Optional, List
 from datetime import datetime
+import asyncio
 import uuid
 import os
 import shutil
-import librosa
-import soundfile as sf
+import aiofiles
+from urllib.parse import quote
 
 from app.database import get_db
 from app.models.user import User
@@ -21,29 +25,172 @@ from app.schemas.audio_file import (
 from app.api.deps import get_current_user
 from app.auth.permissions import check_researcher, ensure_file_access
 from app.config import settings
+from app.tasks.analysis_tasks import extract_metadata
 
 router = APIRouter()
 
 
-def extract_audio_metadata(file_path: str) -> tuple[Optional[int], Optional[float]]:
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1MB
+STREAM_CHUNK_SIZE = 1 << 20  # 1MB
+
+# 設定値から導出する定数（リクエストごとに再計算しない）
+MAX_FILE_SIZE_BYTES = settings.MAX_FILE_SIZE_MB * 1024 * 1024
+FILE_TOO_LARGE_MESSAGE = f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE_MB}MB"
+AUDIO_STORAGE_DIR = os.path.join(settings.STORAGE_PATH, "audio")
+TASK_QUEUE_UNAVAILABLE_MESSAGE = "Task queue is unavailable. Please try again later."
+
+# 許可する音声ファイル形式とMIMEタイプ
+MEDIA_TYPE_MAP = {
+    ".wav": "audio/wav",
+    ".mp3": "audio/mpeg",
+    ".flac": "audio/flac",
+    ".m4a": "audio/mp4",
+    ".ogg": "audio/ogg"
+}
+ALLOWED_EXTENSIONS = frozenset(MEDIA_TYPE_MAP)
+INVALID_FORMAT_MESSAGE = f"Invalid file format. Allowed formats: {', '.join(MEDIA_TYPE_MAP)}"
+
+# ファイル先頭のマジックバイトによる形式判定
+MAGIC_HEADER_SIZE = 64
+MAGIC_PREFIXES = (
+    (b"fLaC", ".flac"),
+    (b"OggS", ".ogg"),
+    (b"ID3", ".mp3"),
+)
+# M4Aとして受け付けるISO BMFFのメジャーブランド（ftypボックス）
+M4A_FTYP_BRANDS = frozenset((b"M4A ", b"M4B ", b"mp41", b"mp42", b"isom", b"iso2"))
+
+
+def detect_audio_extension(header: bytes) -> Optional[str]:
+    """
+    ファイル先頭のバイト列から音声形式を判定
+
+    Args:
+        header: ファイル先頭のバイト列
+
+    Returns:
+        判定した拡張子（例: ".wav"）、判定できない場合はNone
+    """
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return ".wav"
+    for prefix, ext in MAGIC_PREFIXES:
+        if header.startswith(prefix):
+            return ext
+    # MPEGオーディオのフレームヘッダー（ID3タグなしのMP3）
+    if len(header) >= 3 and header[0] == 0xFF and (header[1] & 0xE0) == 0xE0:
+        version = (header[1] >> 3) & 0x03
+        layer = (header[1] >> 1) & 0x03
+        bitrate_index = header[2] >> 4
+        sample_rate_index = (header[2] >> 2) & 0x03
+        # レイヤー0（AACのADTSヘッダー）や予約値は除外
+        if version != 0x01 and layer != 0x00 and bitrate_index != 0x0F and sample_rate_index != 0x03:
+            return ".mp3"
+        return None
+    # ISO BMFF（音声のブランドのみ）
+    if header[4:8] == b"ftyp" and header[8:12] in M4A_FTYP_BRANDS:
+        return ".m4a"
+    return None
+
+
+async def sniff_audio_extension(file: UploadFile) -> Optional[str]:
+    """UploadFileの先頭を読み、音声形式を判定して読み込み位置を戻す"""
+    header = await file.read(MAGIC_HEADER_SIZE)
+    await file.seek(0)
+    return detect_audio_extension(header)
+
+
+class FileTooLargeError(Exception):
+    """アップロードファイルがサイズ上限を超えた場合の例外"""
+    pass
+
+
+def remove_file_if_exists(file_path: str):
+    """ファイルが存在する場合のみ削除"""
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+
+async def save_upload_file(file: UploadFile, file_path: str, max_size: int) -> int:
     """
-    音声ファイルからメタデータ（サンプルレート、継続時間）を抽出
+    UploadFileをチャンク単位でディスクに書き込む
+
+    ファイル全体をメモリに読み込まず、書き込みながらサイズを集計します。
+    上限を超えた時点で書きかけのファイルを削除し、例外を送出します。
 
     Args:
-        file_path: 音声ファイルのパス
+        file: アップロードファイル
+        file_path: 保存先パス
+        max_size: 最大ファイルサイズ（バイト）
 
     Returns:
-        tuple: (sample_rate, duration)
+        書き込んだバイト数
+
+    Raises:
+        FileTooLargeError: ファイルサイズが上限を超えた場合
     """
+    file_size = 0
     try:
-        # soundfileでメタデータを取得（高速）
-        info = sf.info(file_path)
-        sample_rate = info.samplerate
-        duration = info.duration
-        return int(sample_rate), float(duration)
-    except Exception as e:
-        print(f"Warning: Failed to extract audio metadata from {file_path}: {str(e)}")
-        return None, None
+        async with aiofiles.open(file_path, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > max_size:
+                    raise FileTooLargeError()
+                await buffer.write(chunk)
+    except BaseException:
+        await run_in_threadpool(remove_file_if_exists, file_path)
+        raise
+
+    return file_size
+
+
+def parse_range_header(range_header: str, file_size: int) -> Optional[tuple[int, int]]:
+    """
+    Rangeヘッダー（単一範囲）を解釈
+
+    Args:
+        range_header: Rangeヘッダーの値（例: "bytes=0-1023", "bytes=1024-", "bytes=-500"）
+        file_size: ファイルサイズ（バイト）
+
+    Returns:
+        (開始位置, 終了位置) のタプル（両端を含む）、不正な場合はNone
+    """
+    unit, _, range_spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in range_spec:
+        return None
+
+    start_str, _, end_str = range_spec.strip().partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else file_size - 1
+        else:
+            # 末尾からのバイト数指定
+            suffix_length = int(end_str)
+            if suffix_length <= 0:
+                return None
+            start = max(file_size - suffix_length, 0)
+            end = file_size - 1
+    except ValueError:
+        return None
+
+    end = min(end, file_size - 1)
+    if start < 0 or start > end:
+        return None
+
+    return start, end
+
+
+async def iter_file_range(file_path: str, start: int, end: int):
+    """ファイルの指定範囲をチャンク単位で非同期に読み出す"""
+    async with aiofiles.open(file_path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
 
 
 @router.post("/upload/batch", status_code=status.HTTP_201_CREATED)
@@ -65,46 +212,34 @@ async def upload_multiple_audio_files(
             detail="Maximum 10 files allowed per batch upload"
         )
 
-    uploaded_files = []
-    errors = []
-
-    for idx, file in enumerate(files):
+    async def _process_one(idx: int, file: UploadFile) -> tuple[Optional[AudioFile], Optional[dict]]:
+        """1ファイル分の保存処理。(AudioFile, None) または (None, エラー情報) を返す"""
         try:
-            # ファイルサイズチェック
-            content = await file.read()
-            file_size = len(content)
-
-            max_size = settings.MAX_FILE_SIZE_MB * 1024 * 1024
-            if file_size > max_size:
-                errors.append({
-                    "filename": file.filename,
-                    "error": f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE_MB}MB"
-                })
-                continue
-
-            # ファイル形式チェック
-            allowed_extensions = [".wav", ".mp3", ".flac", ".m4a", ".ogg"]
+            # ファイル形式チェック（拡張子と先頭のマジックバイト）
             file_ext = os.path.splitext(file.filename)[1].lower()
-            if file_ext not in allowed_extensions:
-                errors.append({
+            if file_ext in ALLOWED_EXTENSIONS:
+                file_ext = await sniff_audio_extension(file)
+            if file_ext not in ALLOWED_EXTENSIONS:
+                return None, {
                     "filename": file.filename,
-                    "error": f"Invalid file format. Allowed formats: {', '.join(allowed_extensions)}"
-                })
-                continue
+                    "error": INVALID_FORMAT_MESSAGE
+                }
 
             # UUIDでファイル名を生成
             unique_filename = f"{uuid.uuid4()}{file_ext}"
-            file_path = os.path.join(settings.STORAGE_PATH, "audio", unique_filename)
+            file_path = os.path.join(AUDIO_STORAGE_DIR, unique_filename)
 
             # ディレクトリが存在しない場合は作成
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
-            # ファイルを保存
-            with open(file_path, "wb") as buffer:
-                buffer.write(content)
+            await run_in_threadpool(os.makedirs, AUDIO_STORAGE_DIR, exist_ok=True)
 
-            # 音声メタデータを抽出
-            sample_rate, duration = extract_audio_metadata(file_path)
+            # ファイルを保存（チャンク単位で書き込み、サイズ上限を逐次チェック）
+            try:
+                file_size = await save_upload_file(file, file_path, MAX_FILE_SIZE_BYTES)
+            except FileTooLargeError:
+                return None, {
+                    "filename": file.filename,
+                    "error": FILE_TOO_LARGE_MESSAGE
+                }
 
             # recording_start_timeをパース
             parsed_recording_start_time = None
@@ -116,30 +251,78 @@ async def upload_multiple_audio_files(
                 except ValueError:
                     pass  # 無効な時刻フォーマットは無視
 
-            # データベースにレコード作成
             audio_file = AudioFile(
                 user_id=current_user.id,
                 filename=unique_filename,
                 original_filename=file.filename,
                 file_path=file_path,
                 file_size=file_size,
-                sample_rate=sample_rate,
-                duration=duration,
                 recording_start_time=parsed_recording_start_time,
                 status="uploaded"
             )
+            return audio_file, None
 
-            db.add(audio_file)
-            db.commit()
-            db.refresh(audio_file)
+        except Exception as e:
+            return None, {
+                "filename": file.filename,
+                "error": str(e)
+            }
+
+    # 各ファイルの保存処理を並行実行
+    results = await asyncio.gather(*[_process_one(idx, file) for idx, file in enumerate(files)])
 
-            uploaded_files.append(AudioFileResponse.model_validate(audio_file))
+    pending = [audio_file for audio_file, _ in results if audio_file is not None]
+    errors = [error for _, error in results if error is not None]
 
+    # データベースにレコードを一括作成（コミットは1回のみ）
+    uploaded_files = []
+    if pending:
+        try:
+            db.add_all(pending)
+            db.flush()
+            pending_ids = [audio_file.id for audio_file in pending]
+            db.commit()
+
+            # コミットで期限切れになった属性を1回のSELECTでまとめて再読み込み
+            created_files = db.query(AudioFile).options(
+                selectinload(AudioFile.tags)
+            ).filter(
+                AudioFile.id.in_(pending_ids)
+            ).order_by(AudioFile.id).all()
+            uploaded_files = [AudioFileResponse.from_model(f) for f in created_files]
         except Exception as e:
+            db.rollback()
+            for audio_file in pending:
+                await run_in_threadpool(remove_file_if_exists, audio_file.file_path)
+                errors.append({
+                    "filename": audio_file.original_filename,
+                    "error": str(e)
+                })
+
+    # 音声メタデータはワーカーで非同期に抽出
+    # （ブローカーに接続できなかったファイルはタスクのないレコードを残さないよう取り消す）
+    enqueued_files = []
+    failed_files = []
+    for uploaded in uploaded_files:
+        try:
+            await run_in_threadpool(extract_metadata.delay, uploaded.id)
+            enqueued_files.append(uploaded)
+        except BrokerError:
+            failed_files.append(uploaded)
+
+    if failed_files:
+        failed_ids = [uploaded.id for uploaded in failed_files]
+        failed_paths = [audio_file.file_path for audio_file in pending if audio_file.id in failed_ids]
+        db.query(AudioFile).filter(AudioFile.id.in_(failed_ids)).delete(synchronize_session=False)
+        db.commit()
+        for file_path in failed_paths:
+            await run_in_threadpool(remove_file_if_exists, file_path)
+        for uploaded in failed_files:
             errors.append({
-                "filename": file.filename,
-                "error": str(e)
+                "filename": uploaded.original_filename,
+                "error": TASK_QUEUE_UNAVAILABLE_MESSAGE
             })
+        uploaded_files = enqueued_files
 
     return {
         "message": f"Successfully uploaded {len(uploaded_files)} files",
@@ -161,47 +344,37 @@ async def upload_audio_file(
     - **file**: 音声ファイル（必須）
     - **recording_start_time**: 録音開始時刻（ISO 8601形式、オプション）
     """
-    # ファイルサイズチェック
-    file_size = 0
-    content = await file.read()
-    file_size = len(content)
-
-    max_size = settings.MAX_FILE_SIZE_MB * 1024 * 1024  # MB to bytes
-    if file_size > max_size:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE_MB}MB"
-        )
-
-    # ファイル形式チェック（音声ファイルのみ許可）
-    allowed_extensions = [".wav", ".mp3", ".flac", ".m4a", ".ogg"]
+    # ファイル形式チェック（拡張子と先頭のマジックバイト、音声ファイルのみ許可）
     file_ext = os.path.splitext(file.filename)[1].lower()
-    if file_ext not in allowed_extensions:
+    if file_ext in ALLOWED_EXTENSIONS:
+        file_ext = await sniff_audio_extension(file)
+    if file_ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid file format. Allowed formats: {', '.join(allowed_extensions)}"
+            detail=INVALID_FORMAT_MESSAGE
         )
 
     # UUIDでファイル名を生成
     unique_filename = f"{uuid.uuid4()}{file_ext}"
-    file_path = os.path.join(settings.STORAGE_PATH, "audio", unique_filename)
+    file_path = os.path.join(AUDIO_STORAGE_DIR, unique_filename)
 
     # ディレクトリが存在しない場合は作成
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    await run_in_threadpool(os.makedirs, AUDIO_STORAGE_DIR, exist_ok=True)
 
-    # ファイルを保存
+    # ファイルを保存（チャンク単位で書き込み、サイズ上限を逐次チェック）
     try:
-        with open(file_path, "wb") as buffer:
-            buffer.write(content)
+        file_size = await save_upload_file(file, file_path, MAX_FILE_SIZE_BYTES)
+    except FileTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=FILE_TOO_LARGE_MESSAGE
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to save file: {str(e)}"
         )
 
-    # 音声メタデータを抽出
-    sample_rate, duration = extract_audio_metadata(file_path)
-
     # recording_start_timeをパース
     parsed_recording_start_time = None
     if recording_start_time:
@@ -209,7 +382,7 @@ async def upload_audio_file(
             parsed_recording_start_time = datetime.fromisoformat(recording_start_time.replace('Z', '+00:00'))
         except ValueError:
             # ファイル削除してエラー
-            os.remove(file_path)
+            await run_in_threadpool(os.remove, file_path)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid recording_start_time format. Use ISO 8601 format (e.g., 2024-01-01T12:00:00Z)"
@@ -222,8 +395,6 @@ async def upload_audio_file(
         original_filename=file.filename,
         file_path=file_path,
         file_size=file_size,
-        sample_rate=sample_rate,
-        duration=duration,
         recording_start_time=parsed_recording_start_time,
         status="uploaded"
     )
@@ -232,9 +403,22 @@ async def upload_audio_file(
     db.commit()
     db.refresh(audio_file)
 
+    # 音声メタデータはワーカーで非同期に抽出（レスポンスではnull）
+    # ブローカーに接続できない場合は、タスクのないレコードを残さないよう取り消して503を返す
+    try:
+        await run_in_threadpool(extract_metadata.delay, audio_file.id)
+    except BrokerError:
+        db.delete(audio_file)
+        db.commit()
+        await run_in_threadpool(remove_file_if_exists, file_path)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=TASK_QUEUE_UNAVAILABLE_MESSAGE
+        )
+
     return AudioFileUploadResponse(
         message="File uploaded successfully",
-        file=AudioFileResponse.model_validate(audio_file)
+        file=AudioFileResponse.from_model(audio_file)
     )
 
 
@@ -255,17 +439,30 @@ def list_audio_files(
     - **limit**: 取得する最大件数（デフォルト: 100）
     """
     # 研究者は全ファイル、一般ユーザーは自分のファイルのみ
-    query = db.query(AudioFile)
+    # レスポンスで参照するタグはIN句で一括取得（N+1回避）
+    query = db.query(AudioFile, func.count().over().label("total")).options(
+        selectinload(AudioFile.tags)
+    )
     if not check_researcher(current_user):
         query = query.filter(AudioFile.user_id == current_user.id)
 
-    files = query.order_by(AudioFile.uploaded_at.desc()).offset(skip).limit(limit).all()
-    total = query.count()
-
-    return AudioFileListResponse(
+    # ウィンドウ関数で総件数をページと同時に取得（1クエリ）
+    rows = query.order_by(AudioFile.uploaded_at.desc()).offset(skip).limit(limit).all()
+    files = [row[0] for row in rows]
+    if rows:
+        total = rows[0][1]
+    elif skip > 0:
+        # 範囲外のページでは行が返らないため、別途件数を取得
+        total = query.with_entities(func.count(AudioFile.id)).scalar()
+    else:
+        total = 0
+
+    # pydantic-coreで直接JSONにシリアライズ（response_modelによる再検証と標準jsonでのエンコードを経由しない）
+    payload = AudioFileListResponse.model_construct(
         total=total,
-        files=[AudioFileResponse.model_validate(f) for f in files]
+        files=[AudioFileResponse.from_model(f) for f in files]
     )
+    return Response(content=payload.model_dump_json(), media_type="application/json")
 
 
 @router.get("/{file_id}", response_model=AudioFileResponse)
@@ -282,7 +479,9 @@ def get_audio_file(
 
     - **file_id**: ファイルID
     """
-    audio_file = db.query(AudioFile).filter(AudioFile.id == file_id).first()
+    audio_file = db.query(AudioFile).options(
+        selectinload(AudioFile.tags)
+    ).filter(AudioFile.id == file_id).first()
 
     if not audio_file:
         raise HTTPException(
@@ -293,7 +492,7 @@ def get_audio_file(
     # 権限チェック
     ensure_file_access(current_user, audio_file.user_id)
 
-    return AudioFileResponse.model_validate(audio_file)
+    return AudioFileResponse.from_model(audio_file)
 
 
 @router.patch("/{file_id}", response_model=AudioFileResponse)
@@ -332,7 +531,7 @@ def update_audio_file(
     db.commit()
     db.refresh(audio_file)
 
-    return AudioFileResponse.model_validate(audio_file)
+    return AudioFileResponse.from_model(audio_file)
 
 
 @router.delete("/{file_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -378,6 +577,7 @@ def delete_audio_file(
 @router.get("/{file_id}/stream")
 def stream_audio_file(
     file_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -388,8 +588,13 @@ def stream_audio_file(
     - 一般ユーザー: 自分のファイルのみアクセス可能
 
     - **file_id**: ファイルID
+
+    Rangeヘッダーが指定された場合は該当範囲のみを206で返します。
     """
-    audio_file = db.query(AudioFile).filter(AudioFile.id == file_id).first()
+    # 配信に必要な列のみ取得
+    audio_file = db.query(AudioFile).options(
+        load_only(AudioFile.id, AudioFile.user_id, AudioFile.file_path, AudioFile.original_filename)
+    ).filter(AudioFile.id == file_id).first()
 
     if not audio_file:
         raise HTTPException(
@@ -409,18 +614,41 @@ def stream_audio_file(
 
     # ファイルの拡張子からMIMEタイプを決定
     file_ext = os.path.splitext(audio_file.file_path)[1].lower()
-    media_type_map = {
-        ".wav": "audio/wav",
-        ".mp3": "audio/mpeg",
-        ".flac": "audio/flac",
-        ".m4a": "audio/mp4",
-        ".ogg": "audio/ogg"
+    media_type = MEDIA_TYPE_MAP.get(file_ext, "audio/mpeg")
+
+    # Rangeヘッダーを解釈
+    file_size = os.path.getsize(audio_file.file_path)
+    range_header = request.headers.get("range")
+    byte_range = parse_range_header(range_header, file_size) if range_header else None
+
+    if range_header and byte_range is None:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Invalid range",
+            headers={"Content-Range": f"bytes */{file_size}"}
+        )
+
+    start, end = byte_range if byte_range else (0, file_size - 1)
+
+    # Content-Disposition（非ASCIIファイル名はRFC 5987形式）
+    quoted_filename = quote(audio_file.original_filename)
+    if quoted_filename != audio_file.original_filename:
+        content_disposition = f"attachment; filename*=utf-8''{quoted_filename}"
+    else:
+        content_disposition = f'attachment; filename="{audio_file.original_filename}"'
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(end - start + 1),
+        "Content-Disposition": content_disposition
     }
-    media_type = media_type_map.get(file_ext, "audio/mpeg")
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
 
-    # ファイルを返す
-    return FileResponse(
-        path=audio_file.file_path,
+    # ファイルを1MB単位でストリーミング
+    return StreamingResponse(
+        iter_file_range(audio_file.file_path, start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
         media_type=media_type,
-        filename=audio_file.original_filename
+        headers=headers
     )
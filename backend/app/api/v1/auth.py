@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, TokenResponse, UserResponse, UserUpdate, PasswordChange
@@ -8,18 +9,13 @@ from app.api.deps import get_current_user
 
 router = APIRouter()
 
+# パスワードのハッシュ化・検証（bcrypt）はCPU負荷が高いため、エンドポイントは同期関数（def）のままとし、
+# FastAPIのスレッドプールで実行させる（async defにするとDBアクセスとbcryptがイベントループをブロックする）
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 def register(user_data: UserCreate, db: Session = Depends(get_db)):
     """ユーザー登録"""
-    # メール重複チェック
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-
-    # ユーザー作成
+    # ユーザー作成（メール重複はユニーク制約で検出）
     hashed_password = get_password_hash(user_data.password)
     new_user = User(
         email=user_data.email,
@@ -27,7 +23,16 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
         role=user_data.role
     )
     db.add(new_user)
-    db.commit()
+
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+
     db.refresh(new_user)
     return new_user
 
@@ -68,21 +73,19 @@ def update_current_user(
 
     - **email**: 新しいメールアドレス（オプション）
     """
-    # メールアドレスの更新
+    # メールアドレスの更新（重複はユニーク制約で検出）
     if update_data.email:
-        # 重複チェック（自分以外）
-        existing_user = db.query(User).filter(
-            User.email == update_data.email,
-            User.id != current_user.id
-        ).first()
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already in use"
-            )
         current_user.email = update_data.email
 
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already in use"
+        )
+
     db.refresh(current_user)
     return current_user
 
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from io import BytesIO
+from sqlalchemy.orm import Session, load_only
+from tempfile import SpooledTemporaryFile
+from typing import Tuple, Iterator
 
 from app.database import get_db
 from app.models.user import User
@@ -9,38 +10,67 @@ from app.models.audio_file import AudioFile
 from app.models.analysis_result import AnalysisResult
 from app.api.deps import get_current_user
 from app.export.csv_exporter import CSVExporter
-from app.export.excel_exporter import ExcelExporter
-from app.export.pdf_exporter import PDFExporter
+from app.utils.result_cache import get_result_data
 
 router = APIRouter()
 
+EXPORT_SPOOL_MAX_SIZE = 5 * 1024 * 1024  # 5MBを超えたらディスクに退避
+EXPORT_CHUNK_SIZE = 1 << 20  # 1MB
+EXPORT_FILE_BUFFER_SIZE = 256 * 1024  # ディスク退避後の書き込みバッファ（既定の8KBでは小さな書き込みが多くなる）
 
-@router.get("/csv/episodes/{file_id}")
-def export_episodes_csv(
+
+def iter_spooled_file(spooled_file: SpooledTemporaryFile) -> Iterator[bytes]:
+    """一時ファイルの内容をチャンク単位で読み出し、読み終えたら閉じる"""
+    try:
+        spooled_file.seek(0)
+        while chunk := spooled_file.read(EXPORT_CHUNK_SIZE):
+            yield chunk
+    finally:
+        spooled_file.close()
+
+
+def get_file_with_result(
+    db: Session,
     file_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
+    current_user: User
+) -> Tuple[AudioFile, AnalysisResult]:
     """
-    泣き声エピソードをCSV形式でエクスポート
+    音声ファイルと解析結果を1回のクエリで取得
 
-    - **file_id**: 音声ファイルID
+    Args:
+        db: DBセッション
+        file_id: 音声ファイルID
+        current_user: 現在のユーザー
+
+    Returns:
+        (音声ファイル, 解析結果) のタプル
+
+    Raises:
+        HTTPException: ファイルまたは解析結果が存在しない場合
     """
-    # ファイルと解析結果を取得
-    audio_file = db.query(AudioFile).filter(
+    # エクスポートで使う列のみ取得（result_dataはキャッシュから取得するため遅延ロード）
+    row = db.query(AudioFile, AnalysisResult).outerjoin(
+        AnalysisResult, AnalysisResult.audio_file_id == AudioFile.id
+    ).options(
+        load_only(
+            AudioFile.id,
+            AudioFile.original_filename,
+            AudioFile.file_size,
+            AudioFile.recording_start_time
+        ),
+        load_only(AnalysisResult.id, AnalysisResult.analyzed_at)
+    ).filter(
         AudioFile.id == file_id,
         AudioFile.user_id == current_user.id
     ).first()
 
-    if not audio_file:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Audio file not found"
         )
 
-    analysis_result = db.query(AnalysisResult).filter(
-        AnalysisResult.audio_file_id == file_id
-    ).first()
+    audio_file, analysis_result = row
 
     if not analysis_result:
         raise HTTPException(
@@ -48,16 +78,34 @@ def export_episodes_csv(
             detail="Analysis result not found"
         )
 
+    return audio_file, analysis_result
+
+
+@router.get("/csv/episodes/{file_id}")
+def export_episodes_csv(
+    file_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    泣き声エピソードをCSV形式でエクスポート
+
+    - **file_id**: 音声ファイルID
+    """
+    # ファイルと解析結果を取得
+    audio_file, analysis_result = get_file_with_result(db, file_id, current_user)
+    result_data = get_result_data(analysis_result)
+
     # CSV生成
     exporter = CSVExporter()
-    csv_data = exporter.export_cry_episodes(
-        analysis_result.result_data,
+    csv_stream = exporter.export_cry_episodes_stream(
+        result_data,
         audio_file.recording_start_time
     )
 
-    # レスポンス
+    # レスポンス（行単位で逐次送信）
     return StreamingResponse(
-        iter([csv_data]),
+        csv_stream,
         media_type="text/csv",
         headers={
             "Content-Disposition": f"attachment; filename=cry_episodes_{file_id}.csv"
@@ -78,30 +126,35 @@ def export_features_csv(
     - **file_id**: 音声ファイルID
     - **episode_id**: エピソードID（例: episode_0）
     """
-    # ファイルと解析結果を取得
-    audio_file = db.query(AudioFile).filter(
+    # ファイルと、指定エピソードの音響特徴のみを取得
+    # （result_data全体ではなく result_data->'acoustic_features'->episode_id だけを転送）
+    row = db.query(
+        AudioFile.recording_start_time,
+        AnalysisResult.id,
+        AnalysisResult.result_data["acoustic_features"][episode_id]
+    ).outerjoin(
+        AnalysisResult, AnalysisResult.audio_file_id == AudioFile.id
+    ).filter(
         AudioFile.id == file_id,
         AudioFile.user_id == current_user.id
     ).first()
 
-    if not audio_file:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Audio file not found"
         )
 
-    analysis_result = db.query(AnalysisResult).filter(
-        AnalysisResult.audio_file_id == file_id
-    ).first()
+    recording_start_time, analysis_result_id, episode_features = row
 
-    if not analysis_result:
+    if analysis_result_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Analysis result not found"
         )
 
     # エピソードIDの検証
-    if episode_id not in analysis_result.result_data.get("acoustic_features", {}):
+    if episode_features is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Episode {episode_id} not found"
@@ -109,15 +162,15 @@ def export_features_csv(
 
     # CSV生成
     exporter = CSVExporter()
-    csv_data = exporter.export_acoustic_features(
-        analysis_result.result_data,
+    csv_stream = exporter.export_acoustic_features_stream(
+        {"acoustic_features": {episode_id: episode_features}},
         episode_id,
-        audio_file.recording_start_time
+        recording_start_time
     )
 
-    # レスポンス
+    # レスポンス（行単位で逐次送信）
     return StreamingResponse(
-        iter([csv_data]),
+        csv_stream,
         media_type="text/csv",
         headers={
             "Content-Disposition": f"attachment; filename=acoustic_features_{file_id}_{episode_id}.csv"
@@ -143,26 +196,8 @@ def export_excel(
     4. 音響特徴 - 時系列の音響特徴データ
     """
     # ファイルと解析結果を取得
-    audio_file = db.query(AudioFile).filter(
-        AudioFile.id == file_id,
-        AudioFile.user_id == current_user.id
-    ).first()
-
-    if not audio_file:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Audio file not found"
-        )
-
-    analysis_result = db.query(AnalysisResult).filter(
-        AnalysisResult.audio_file_id == file_id
-    ).first()
-
-    if not analysis_result:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Analysis result not found"
-        )
+    audio_file, analysis_result = get_file_with_result(db, file_id, current_user)
+    result_data = get_result_data(analysis_result)
 
     # ファイル情報を準備
     file_info = {
@@ -171,17 +206,27 @@ def export_excel(
         "analyzed_at": analysis_result.analyzed_at.strftime("%Y-%m-%d %H:%M:%S") if analysis_result.analyzed_at else ""
     }
 
-    # Excel生成
+    # Excel生成（一定サイズを超えたらディスクに退避する一時ファイルへ書き込み）
+    # openpyxlはこのエンドポイントでのみ使うため、起動時ではなく初回呼び出し時に読み込む
+    from app.export.excel_exporter import ExcelExporter
+
+    spooled_file = SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE, buffering=EXPORT_FILE_BUFFER_SIZE)
     exporter = ExcelExporter()
-    excel_data = exporter.export(
-        analysis_result.result_data,
-        file_info,
-        audio_file.recording_start_time
-    )
+    try:
+        exporter.export_to_stream(
+            spooled_file,
+            result_data,
+            file_info,
+            audio_file.recording_start_time
+        )
+    except BaseException:
+        # StreamingResponseに渡す前に失敗した場合は、ここで一時ファイルを閉じる
+        spooled_file.close()
+        raise
 
-    # レスポンス
+    # レスポンス（チャンク単位で送信）
     return StreamingResponse(
-        BytesIO(excel_data),
+        iter_spooled_file(spooled_file),
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={
             "Content-Disposition": f"attachment; filename=analysis_report_{file_id}.xlsx"
@@ -201,26 +246,8 @@ def export_pdf(
     - **file_id**: 音声ファイルID
     """
     # ファイルと解析結果を取得
-    audio_file = db.query(AudioFile).filter(
-        AudioFile.id == file_id,
-        AudioFile.user_id == current_user.id
-    ).first()
-
-    if not audio_file:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Audio file not found"
-        )
-
-    analysis_result = db.query(AnalysisResult).filter(
-        AnalysisResult.audio_file_id == file_id
-    ).first()
-
-    if not analysis_result:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Analysis result not found"
-        )
+    audio_file, analysis_result = get_file_with_result(db, file_id, current_user)
+    result_data = get_result_data(analysis_result)
 
     # ファイル情報を準備
     file_info = {
@@ -229,17 +256,27 @@ def export_pdf(
         "analyzed_at": analysis_result.analyzed_at.strftime("%Y-%m-%d %H:%M:%S") if analysis_result.analyzed_at else ""
     }
 
-    # PDF生成
+    # PDF生成（一定サイズを超えたらディスクに退避する一時ファイルへ書き込み）
+    # reportlabはこのエンドポイントでのみ使うため、起動時ではなく初回呼び出し時に読み込む
+    from app.export.pdf_exporter import PDFExporter
+
+    spooled_file = SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE, buffering=EXPORT_FILE_BUFFER_SIZE)
     exporter = PDFExporter()
-    pdf_data = exporter.export(
-        analysis_result.result_data,
-        file_info,
-        audio_file.recording_start_time
-    )
+    try:
+        exporter.export_to_stream(
+            spooled_file,
+            result_data,
+            file_info,
+            audio_file.recording_start_time
+        )
+    except BaseException:
+        # StreamingResponseに渡す前に失敗した場合は、ここで一時ファイルを閉じる
+        spooled_file.close()
+        raise
 
-    # レスポンス
+    # レスポンス（チャンク単位で送信）
     return StreamingResponse(
-        BytesIO(pdf_data),
+        iter_spooled_file(spooled_file),
         media_type="application/pdf",
         headers={
             "Content-Disposition": f"attachment; filename=analysis_report_{file_id}.pdf"
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, exists, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from typing import List
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
-from app.models.tag import Tag
+from app.models.tag import Tag, audio_file_tags
 from app.models.audio_file import AudioFile
 from app.schemas.tag import (
     TagResponse,
@@ -13,18 +15,64 @@ from app.schemas.tag import (
     TagListResponse,
     AudioFileTagsUpdate
 )
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user_async
 from app.auth.permissions import ensure_file_access
 
 router = APIRouter()
 
 
+async def get_file_owner_id(db: AsyncSession, file_id: int) -> int:
+    """
+    音声ファイルの所有者IDのみを取得
+
+    Args:
+        db: DBセッション
+        file_id: 音声ファイルID
+
+    Returns:
+        所有者のユーザーID
+
+    Raises:
+        HTTPException: ファイルが存在しない場合
+    """
+    owner_id = await db.scalar(select(AudioFile.user_id).where(AudioFile.id == file_id))
+
+    if owner_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audio file not found"
+        )
+
+    return owner_id
+
+
+async def get_file_tags(db: AsyncSession, file_id: int) -> List[Tag]:
+    """
+    ファイルに付与されたタグを中間テーブル経由で1回のクエリで取得
+
+    Args:
+        db: DBセッション
+        file_id: 音声ファイルID
+
+    Returns:
+        タグのリスト
+    """
+    result = await db.scalars(
+        select(Tag).join(
+            audio_file_tags, audio_file_tags.c.tag_id == Tag.id
+        ).where(
+            audio_file_tags.c.audio_file_id == file_id
+        )
+    )
+    return result.all()
+
+
 @router.get("/", response_model=TagListResponse)
-def list_tags(
+async def list_tags(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     タグ一覧を取得
@@ -32,63 +80,76 @@ def list_tags(
     - **skip**: スキップする件数（デフォルト: 0）
     - **limit**: 取得する最大件数（デフォルト: 100）
     """
-    query = db.query(Tag).order_by(Tag.name)
-    total = query.count()
-    tags = query.offset(skip).limit(limit).all()
-
-    return TagListResponse(
-        total=total,
-        tags=[TagResponse.model_validate(t) for t in tags]
+    # ウィンドウ関数で総件数をページと同時に取得（1クエリ）
+    # 読み取り専用のため列のみ取得し、ORMオブジェクトの生成を省略
+    result = await db.execute(
+        select(
+            Tag.id,
+            Tag.name,
+            Tag.created_at,
+            func.count().over().label("total")
+        ).order_by(
+            Tag.name
+        ).offset(skip).limit(limit)
     )
+    rows = result.all()
+    if rows:
+        total = rows[0].total
+    elif skip > 0:
+        # 範囲外のページでは行が返らないため、別途件数を取得
+        total = await db.scalar(select(func.count(Tag.id)))
+    else:
+        total = 0
+
+    # response_modelでの検証のみ行うため、辞書のまま返す
+    return {
+        "total": total,
+        "tags": [
+            {"id": row.id, "name": row.name, "created_at": row.created_at}
+            for row in rows
+        ]
+    }
 
 
 @router.post("/", response_model=TagResponse, status_code=status.HTTP_201_CREATED)
-def create_tag(
+async def create_tag(
     tag_data: TagCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     新しいタグを作成
 
     - **name**: タグ名（必須、ユニーク）
     """
-    # 既存のタグを確認
-    existing_tag = db.query(Tag).filter(Tag.name == tag_data.name).first()
-    if existing_tag:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Tag with this name already exists"
-        )
-
+    # 重複はユニーク制約で検出
     tag = Tag(name=tag_data.name)
     db.add(tag)
 
     try:
-        db.commit()
-        db.refresh(tag)
+        await db.commit()
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Tag with this name already exists"
         )
 
-    return TagResponse.model_validate(tag)
+    return TagResponse.from_model(tag)
 
 
 @router.delete("/{tag_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_tag(
+async def delete_tag(
     tag_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     タグを削除
 
     - **tag_id**: タグID
     """
-    tag = db.query(Tag).filter(Tag.id == tag_id).first()
+    tag = await db.get(Tag, tag_id)
 
     if not tag:
         raise HTTPException(
@@ -96,18 +157,18 @@ def delete_tag(
             detail="Tag not found"
         )
 
-    db.delete(tag)
-    db.commit()
+    await db.delete(tag)
+    await db.commit()
 
     return None
 
 
 @router.put("/{file_id}/tags", response_model=List[TagResponse])
-def update_file_tags(
+async def update_file_tags(
     file_id: int,
     tags_update: AudioFileTagsUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     ファイルのタグを更新（既存のタグを置き換え）
@@ -115,39 +176,39 @@ def update_file_tags(
     - **file_id**: ファイルID
     - **tag_ids**: タグIDのリスト
     """
-    audio_file = db.query(AudioFile).filter(AudioFile.id == file_id).first()
-
-    if not audio_file:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Audio file not found"
-        )
+    owner_id = await get_file_owner_id(db, file_id)
 
     # 権限チェック
-    ensure_file_access(current_user, audio_file.user_id)
-
-    # タグの存在確認
-    tags = db.query(Tag).filter(Tag.id.in_(tags_update.tag_ids)).all()
-    if len(tags) != len(tags_update.tag_ids):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="One or more tags not found"
+    ensure_file_access(current_user, owner_id)
+
+    # タグの存在確認（行を読み込まず件数のみ比較）
+    tag_ids = set(tags_update.tag_ids)
+    if tag_ids:
+        found_count = await db.scalar(select(func.count(Tag.id)).where(Tag.id.in_(tag_ids)))
+        if found_count != len(tag_ids):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="One or more tags not found"
+            )
+
+    # タグを更新（中間テーブルを一括で置き換え）
+    await db.execute(delete(audio_file_tags).where(audio_file_tags.c.audio_file_id == file_id))
+    if tag_ids:
+        await db.execute(
+            insert(audio_file_tags),
+            [{"audio_file_id": file_id, "tag_id": tag_id} for tag_id in tag_ids]
         )
+    await db.commit()
 
-    # タグを更新
-    audio_file.tags = tags
-    db.commit()
-    db.refresh(audio_file)
-
-    return [TagResponse.model_validate(t) for t in audio_file.tags]
+    return [TagResponse.from_model(t) for t in await get_file_tags(db, file_id)]
 
 
 @router.post("/{file_id}/tags/{tag_id}", response_model=List[TagResponse])
-def add_tag_to_file(
+async def add_tag_to_file(
     file_id: int,
     tag_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     ファイルにタグを追加
@@ -155,44 +216,45 @@ def add_tag_to_file(
     - **file_id**: ファイルID
     - **tag_id**: タグID
     """
-    audio_file = db.query(AudioFile).filter(AudioFile.id == file_id).first()
-
-    if not audio_file:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Audio file not found"
-        )
+    owner_id = await get_file_owner_id(db, file_id)
 
     # 権限チェック
-    ensure_file_access(current_user, audio_file.user_id)
+    ensure_file_access(current_user, owner_id)
 
-    tag = db.query(Tag).filter(Tag.id == tag_id).first()
-    if not tag:
+    # 中間テーブルへ直接INSERT（既に追加済みの場合は何もしない）
+    try:
+        result = await db.execute(
+            pg_insert(audio_file_tags)
+            .values(audio_file_id=file_id, tag_id=tag_id)
+            .on_conflict_do_nothing()
+        )
+    except IntegrityError:
+        # 外部キー違反 = タグが存在しない
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Tag not found"
         )
 
     # タグが既に追加されていないかチェック
-    if tag in audio_file.tags:
+    if result.rowcount == 0:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Tag already added to this file"
         )
 
-    audio_file.tags.append(tag)
-    db.commit()
-    db.refresh(audio_file)
+    await db.commit()
 
-    return [TagResponse.model_validate(t) for t in audio_file.tags]
+    return [TagResponse.from_model(t) for t in await get_file_tags(db, file_id)]
 
 
 @router.delete("/{file_id}/tags/{tag_id}", response_model=List[TagResponse])
-def remove_tag_from_file(
+async def remove_tag_from_file(
     file_id: int,
     tag_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     ファイルからタグを削除
@@ -200,33 +262,32 @@ def remove_tag_from_file(
     - **file_id**: ファイルID
     - **tag_id**: タグID
     """
-    audio_file = db.query(AudioFile).filter(AudioFile.id == file_id).first()
-
-    if not audio_file:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Audio file not found"
-        )
+    owner_id = await get_file_owner_id(db, file_id)
 
     # 権限チェック
-    ensure_file_access(current_user, audio_file.user_id)
+    ensure_file_access(current_user, owner_id)
 
-    tag = db.query(Tag).filter(Tag.id == tag_id).first()
-    if not tag:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tag not found"
+    # 中間テーブルから直接DELETE
+    result = await db.execute(
+        delete(audio_file_tags).where(
+            audio_file_tags.c.audio_file_id == file_id,
+            audio_file_tags.c.tag_id == tag_id
         )
+    )
 
-    # タグが追加されているかチェック
-    if tag not in audio_file.tags:
+    if result.rowcount == 0:
+        await db.rollback()
+        # 削除対象がない場合のみ、タグ自体の存在を確認してエラーを切り分け
+        if not await db.scalar(select(exists().where(Tag.id == tag_id))):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Tag not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Tag not found on this file"
         )
 
-    audio_file.tags.remove(tag)
-    db.commit()
-    db.refresh(audio_file)
+    await db.commit()
 
-    return [TagResponse.model_validate(t) for t in audio_file.tags]
+    return [TagResponse.from_model(t) for t in await get_file_tags(db, file_id)]
@@ -1,27 +1,42 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, exists, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
+import asyncio
+import os
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.models.audio_file import AudioFile
 from app.schemas.user import UserCreate, UserResponse, UserUpdate
-from app.api.deps import get_current_user
-from app.auth.permissions import check_researcher
+from app.api.deps import get_current_researcher_async
 from app.utils.security import get_password_hash
 
 router = APIRouter()
 
 
+def remove_user_file(file_path: str):
+    """ユーザーの音声ファイルをファイルシステムから削除（失敗しても処理は継続）"""
+    # 存在確認とは分けずに1回のシステムコールで削除（既に無ければ何もしない）
+    try:
+        os.unlink(file_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Failed to delete file {file_path}: {str(e)}")
+
+
 @router.get("/", response_model=List[UserResponse])
-def list_users(
+async def list_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=500),
     search: Optional[str] = None,
     role: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_researcher_async)
 ):
     """
     ユーザー一覧を取得（研究者のみ）
@@ -31,47 +46,33 @@ def list_users(
     - **search**: メールアドレスで検索（部分一致）
     - **role**: ロールでフィルター（user / researcher）
     """
-    # 研究者権限チェック
-    if not check_researcher(current_user):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="この機能は研究者アカウントのみ利用可能です"
-        )
-
-    query = db.query(User)
+    query = select(User)
 
     # 検索フィルター
     if search:
-        query = query.filter(User.email.ilike(f"%{search}%"))
+        query = query.where(User.email.ilike(f"%{search}%"))
 
     # ロールフィルター
     if role:
-        query = query.filter(User.role == role)
+        query = query.where(User.role == role)
 
     # 取得
-    users = query.order_by(User.created_at.desc()).offset(skip).limit(limit).all()
-    return users
+    result = await db.scalars(query.order_by(User.created_at.desc()).offset(skip).limit(limit))
+    return result.all()
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-def get_user(
+async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_researcher_async)
 ):
     """
     指定されたIDのユーザー情報を取得（研究者のみ）
 
     - **user_id**: ユーザーID
     """
-    # 研究者権限チェック
-    if not check_researcher(current_user):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="この機能は研究者アカウントのみ利用可能です"
-        )
-
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
 
     if not user:
         raise HTTPException(
@@ -83,10 +84,10 @@ def get_user(
 
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def create_user(
+async def create_user(
     user_data: UserCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_researcher_async)
 ):
     """
     新しいユーザーを作成（研究者のみ）
@@ -95,40 +96,33 @@ def create_user(
     - **password**: パスワード
     - **role**: ロール（user / researcher）
     """
-    # 研究者権限チェック
-    if not check_researcher(current_user):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="この機能は研究者アカウントのみ利用可能です"
-        )
-
-    # メール重複チェック
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-
-    # ユーザー作成
-    hashed_password = get_password_hash(user_data.password)
+    # ユーザー作成（bcryptはCPU負荷が高いためスレッドプールで実行、メール重複はユニーク制約で検出）
+    hashed_password = await run_in_threadpool(get_password_hash, user_data.password)
     new_user = User(
         email=user_data.email,
         password_hash=hashed_password,
         role=user_data.role
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+
     return new_user
 
 
 @router.patch("/{user_id}", response_model=UserResponse)
-def update_user(
+async def update_user(
     user_id: int,
     update_data: UserUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_researcher_async)
 ):
     """
     ユーザー情報を更新（研究者のみ）
@@ -136,14 +130,7 @@ def update_user(
     - **user_id**: ユーザーID
     - **email**: 新しいメールアドレス（オプション）
     """
-    # 研究者権限チェック
-    if not check_researcher(current_user):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="この機能は研究者アカウントのみ利用可能です"
-        )
-
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
 
     if not user:
         raise HTTPException(
@@ -151,30 +138,26 @@ def update_user(
             detail="User not found"
         )
 
-    # メールアドレスの更新
+    # メールアドレスの更新（重複はユニーク制約で検出）
     if update_data.email:
-        # 重複チェック（自分以外）
-        existing_user = db.query(User).filter(
-            User.email == update_data.email,
-            User.id != user_id
-        ).first()
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already in use"
-            )
         user.email = update_data.email
 
-    db.commit()
-    db.refresh(user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already in use"
+        )
     return user
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(
+async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_researcher_async)
 ):
     """
     ユーザーを削除（研究者のみ）
@@ -183,13 +166,6 @@ def delete_user(
 
     注意: ユーザーに紐づくファイルも全て削除されます
     """
-    # 研究者権限チェック
-    if not check_researcher(current_user):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="この機能は研究者アカウントのみ利用可能です"
-        )
-
     # 自分自身は削除できない
     if user_id == current_user.id:
         raise HTTPException(
@@ -197,67 +173,63 @@ def delete_user(
             detail="Cannot delete your own account"
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    # 削除前にファイルパスのみ取得（ORMオブジェクトは生成しない）
+    file_paths = (await db.scalars(
+        select(AudioFile.file_path).where(AudioFile.user_id == user_id)
+    )).all()
 
-    if not user:
+    # DBレコード削除（外部キーのON DELETE CASCADEで関連レコードもDB側で一括削除される）
+    result = await db.execute(delete(User).where(User.id == user_id))
+
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
-    # ユーザーに紐づくファイルを削除
-    audio_files = db.query(AudioFile).filter(AudioFile.user_id == user_id).all()
-    for audio_file in audio_files:
-        # ファイルシステムから削除
-        import os
-        if os.path.exists(audio_file.file_path):
-            try:
-                os.remove(audio_file.file_path)
-            except Exception as e:
-                print(f"Failed to delete file: {str(e)}")
-
-    # DBレコード削除（cascadeで関連レコードも削除される）
-    db.delete(user)
-    db.commit()
+    await db.commit()
+
+    # ファイルシステムから削除（スレッドで並行実行）
+    await asyncio.gather(*(asyncio.to_thread(remove_user_file, path) for path in file_paths))
 
     return None
 
 
 @router.get("/{user_id}/files", response_model=List[dict])
-def get_user_files(
+async def get_user_files(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_researcher_async)
 ):
     """
     指定されたユーザーのファイル一覧を取得（研究者のみ）
 
     - **user_id**: ユーザーID
+    - **skip**: スキップする件数
+    - **limit**: 取得する最大件数
     """
-    # 研究者権限チェック
-    if not check_researcher(current_user):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="この機能は研究者アカウントのみ利用可能です"
-        )
-
-    user = db.query(User).filter(User.id == user_id).first()
+    # ユーザーの存在確認のみ（ORMオブジェクトは生成しない）
+    user_exists = await db.scalar(select(exists().where(User.id == user_id)))
 
-    if not user:
+    if not user_exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
-    audio_files = db.query(AudioFile).filter(AudioFile.user_id == user_id).order_by(AudioFile.uploaded_at.desc()).all()
-
-    return [
-        {
-            "id": f.id,
-            "original_filename": f.original_filename,
-            "file_size": f.file_size,
-            "status": f.status,
-            "uploaded_at": f.uploaded_at
-        }
-        for f in audio_files
-    ]
+    # 返す列のみ取得（ix_audio_files_user_uploaded のインデックスのみで応答可能）
+    result = await db.execute(
+        select(
+            AudioFile.id,
+            AudioFile.original_filename,
+            AudioFile.file_size,
+            AudioFile.status,
+            AudioFile.uploaded_at
+        ).where(
+            AudioFile.user_id == user_id
+        ).order_by(AudioFile.uploaded_at.desc()).offset(skip).limit(limit)
+    )
+
+    return [dict(row._mapping) for row in result.all()]
@@ -1,24 +1,121 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import Optional
-
-from app.database import get_db
+from fastapi.responses import Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional, Tuple
+from functools import partial
+import asyncio
+import re
+
+from app.database import get_async_db
 from app.models.user import User
 from app.models.audio_file import AudioFile
 from app.models.analysis_result import AnalysisResult
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user_async
 from app.visualization.waveform_generator import WaveformGenerator
 from app.visualization.spectrogram_generator import SpectrogramGenerator
+from app.audio.segment_reader import load_full_audio
+from app.utils.visualization_cache import get_visualization_payload, get_full_file_payload
 
 router = APIRouter()
 
+EPISODE_ID_PATTERN = re.compile(r"^episode_(\d+)$")
+
+
+def generate_full_file_visualizations(file_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    ファイル全体を1回だけデコードし、波形とスペクトログラムのデータを生成
+
+    Args:
+        file_path: 音声ファイルのパス
+
+    Returns:
+        種類（'waveform', 'spectrogram'）ごとの可視化データ
+    """
+    y, sr = load_full_audio(file_path)
+    return {
+        "waveform": WaveformGenerator().waveform_from_audio(y, sr),
+        "spectrogram": SpectrogramGenerator().spectrogram_from_audio(y, sr)
+    }
+
+
+def parse_episode_index(episode_id: str) -> int:
+    """
+    エピソードID（例: episode_0）からインデックスを取得
+
+    Args:
+        episode_id: エピソードID
+
+    Returns:
+        エピソードのインデックス
+
+    Raises:
+        HTTPException: 形式が不正な場合
+    """
+    match = EPISODE_ID_PATTERN.match(episode_id)
+    if not match:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid episode_id"
+        )
+    return int(match.group(1))
+
+
+async def get_file_path_and_episodes(
+    db: AsyncSession,
+    file_id: int,
+    current_user: User
+) -> Tuple[str, Optional[List[dict]]]:
+    """
+    音声ファイルのパスと泣き声エピソード一覧を1回のクエリで取得
+
+    解析結果はresult_data全体ではなく、result_data->'cry_episodes' のみを転送します。
+
+    Args:
+        db: DBセッション
+        file_id: 音声ファイルID
+        current_user: 現在のユーザー
+
+    Returns:
+        (ファイルパス, エピソード一覧) のタプル。解析結果がない場合はエピソード一覧がNone
+
+    Raises:
+        HTTPException: ファイルが存在しない場合
+    """
+    result = await db.execute(
+        select(
+            AudioFile.file_path,
+            AnalysisResult.id,
+            AnalysisResult.result_data["cry_episodes"]
+        ).outerjoin(
+            AnalysisResult, AnalysisResult.audio_file_id == AudioFile.id
+        ).where(
+            AudioFile.id == file_id,
+            AudioFile.user_id == current_user.id
+        ).limit(1)
+    )
+    row = result.first()
+
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Audio file not found"
+        )
+
+    file_path, analysis_result_id, cry_episodes = row
+
+    if analysis_result_id is None:
+        return file_path, None
+
+    return file_path, cry_episodes or []
+
 
 @router.get("/waveform/{file_id}")
-def get_waveform_data(
+async def get_waveform_data(
     file_id: int,
     episode_id: Optional[str] = Query(None, description="エピソードID（例: episode_0）。指定しない場合はファイル全体"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     波形データを取得
@@ -31,30 +128,15 @@ def get_waveform_data(
         - amplitude: 振幅データ
         - sample_rate: サンプリングレート
     """
-    # ファイルの取得
-    audio_file = db.query(AudioFile).filter(
-        AudioFile.id == file_id,
-        AudioFile.user_id == current_user.id
-    ).first()
-
-    if not audio_file:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Audio file not found"
-        )
-
-    # 解析結果を取得（エピソード情報のため）
-    analysis_result = db.query(AnalysisResult).filter(
-        AnalysisResult.audio_file_id == file_id
-    ).first()
+    # ファイルパスとエピソード一覧を1回のクエリで取得
+    file_path, cry_episodes = await get_file_path_and_episodes(db, file_id, current_user)
 
     # 波形データ生成
     generator = WaveformGenerator()
 
-    if episode_id and analysis_result:
+    if episode_id and cry_episodes is not None:
         # 特定エピソードの波形
-        cry_episodes = analysis_result.result_data.get("cry_episodes", [])
-        episode_index = int(episode_id.split("_")[1])
+        episode_index = parse_episode_index(episode_id)
 
         if episode_index >= len(cry_episodes):
             raise HTTPException(
@@ -63,24 +145,41 @@ def get_waveform_data(
             )
 
         episode = cry_episodes[episode_index]
-        waveform_data = generator.generate_episode_waveform(
-            audio_file.file_path,
-            episode["start_time"],
-            episode["end_time"]
+        fetch = partial(
+            get_visualization_payload,
+            "waveform",
+            file_id,
+            file_path,
+            episode_id,
+            partial(
+                generator.generate_episode_waveform,
+                file_path,
+                episode["start_time"],
+                episode["end_time"]
+            )
         )
     else:
-        # ファイル全体の波形
-        waveform_data = generator.generate_full_waveform(audio_file.file_path)
+        # ファイル全体の波形（キャッシュがなければ波形とスペクトログラムを1回のデコードからまとめて生成）
+        fetch = partial(
+            get_full_file_payload,
+            "waveform",
+            file_id,
+            file_path,
+            partial(generate_full_file_visualizations, file_path)
+        )
+
+    # 音声のデコード等はスレッドで実行し、結果はキャッシュを経由して返す
+    payload = await asyncio.to_thread(fetch)
 
-    return waveform_data
+    return Response(content=payload, media_type="application/json")
 
 
 @router.get("/spectrogram/{file_id}")
-def get_spectrogram_data(
+async def get_spectrogram_data(
     file_id: int,
     episode_id: Optional[str] = Query(None, description="エピソードID（例: episode_0）。指定しない場合はファイル全体"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
 ):
     """
     スペクトログラムデータを取得
@@ -93,30 +192,15 @@ def get_spectrogram_data(
         - frequencies: 周波数軸データ（Hz）
         - spectrogram: スペクトログラムデータ（2次元配列、dB単位）
     """
-    # ファイルの取得
-    audio_file = db.query(AudioFile).filter(
-        AudioFile.id == file_id,
-        AudioFile.user_id == current_user.id
-    ).first()
-
-    if not audio_file:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Audio file not found"
-        )
-
-    # 解析結果を取得（エピソード情報のため）
-    analysis_result = db.query(AnalysisResult).filter(
-        AnalysisResult.audio_file_id == file_id
-    ).first()
+    # ファイルパスとエピソード一覧を1回のクエリで取得
+    file_path, cry_episodes = await get_file_path_and_episodes(db, file_id, current_user)
 
     # スペクトログラムデータ生成
     generator = SpectrogramGenerator()
 
-    if episode_id and analysis_result:
+    if episode_id and cry_episodes is not None:
         # 特定エピソードのスペクトログラム
-        cry_episodes = analysis_result.result_data.get("cry_episodes", [])
-        episode_index = int(episode_id.split("_")[1])
+        episode_index = parse_episode_index(episode_id)
 
         if episode_index >= len(cry_episodes):
             raise HTTPException(
@@ -125,13 +209,30 @@ def get_spectrogram_data(
             )
 
         episode = cry_episodes[episode_index]
-        spectrogram_data = generator.generate_episode_spectrogram(
-            audio_file.file_path,
-            episode["start_time"],
-            episode["end_time"]
+        fetch = partial(
+            get_visualization_payload,
+            "spectrogram",
+            file_id,
+            file_path,
+            episode_id,
+            partial(
+                generator.generate_episode_spectrogram,
+                file_path,
+                episode["start_time"],
+                episode["end_time"]
+            )
         )
     else:
-        # ファイル全体のスペクトログラム
-        spectrogram_data = generator.generate_full_spectrogram(audio_file.file_path)
+        # ファイル全体のスペクトログラム（キャッシュがなければ波形とスペクトログラムを1回のデコードからまとめて生成）
+        fetch = partial(
+            get_full_file_payload,
+            "spectrogram",
+            file_id,
+            file_path,
+            partial(generate_full_file_visualizations, file_path)
+        )
+
+    # 音声のデコード等はスレッドで実行し、結果はキャッシュを経由して返す
+    payload = await asyncio.to_thread(fetch)
 
-    return spectrogram_data
+    return Response(content=payload, media_type="application/json")
@@ -2,26 +2,117 @@ import numpy as np
 import parselmouth
 from parselmouth.praat import call
 import librosa
-from typing import Dict, List, Optional
-from dataclasses import dataclass, asdict
+from numba import njit
+from typing import Dict, List, Optional, Union
+from dataclasses import dataclass
+
+
+FEATURE_PARAMS = ('f0', 'f1', 'f2', 'f3', 'hnr', 'shimmer', 'jitter', 'intensity')
+
+# Praatが無音フレームのHNRとして返す値（実測値ではないため欠損扱い）
+HNR_UNDEFINED = -200.0
+
+
+@njit('float64[:](float64[:])', cache=True, boundscheck=False)
+def _summary_statistics(values: np.ndarray) -> np.ndarray:
+    """
+    欠損値（NaN）を除いた平均・標準偏差・最小値・最大値・中央値を計算（JITコンパイル）
+
+    パラメータごとにNaN除去と5回の集計関数呼び出しを行う代わりに、
+    1回の走査で有効値の抽出・合計・最小・最大を求めます。
+    シグネチャを指定しているため、インポート時にコンパイル（またはキャッシュから読み込み）されます。
+
+    Args:
+        values: 音響特徴の配列（欠損値はNaN）
+
+    Returns:
+        [平均, 標準偏差, 最小値, 最大値, 中央値] の配列（有効値がない場合は全てNaN）
+    """
+    result = np.full(5, np.nan)
+    valid = np.empty(values.size)
+    count = 0
+    total = 0.0
+    min_value = np.inf
+    max_value = -np.inf
+
+    for v in values:
+        if not np.isnan(v):
+            valid[count] = v
+            count += 1
+            total += v
+            if v < min_value:
+                min_value = v
+            if v > max_value:
+                max_value = v
+
+    if count == 0:
+        return result
+
+    mean = total / count
+    squared = 0.0
+    for i in range(count):
+        d = valid[i] - mean
+        squared += d * d
+
+    result[0] = mean
+    result[1] = np.sqrt(squared / count)
+    result[2] = min_value
+    result[3] = max_value
+    result[4] = np.median(valid[:count])
+    return result
 
 
 @dataclass
-class AcousticFeatures:
-    """音響特徴のデータクラス"""
-    time: float                    # 時刻（秒）
-    f0: Optional[float]           # 基本周波数（Hz）
-    f1: Optional[float]           # 第1フォルマント（Hz）
-    f2: Optional[float]           # 第2フォルマント（Hz）
-    f3: Optional[float]           # 第3フォルマント（Hz）
-    hnr: Optional[float]          # Harmonics-to-Noise Ratio（dB）
-    shimmer: Optional[float]      # Shimmer（振幅変動、%）
-    jitter: Optional[float]       # Jitter（周期変動、%）
-    intensity: Optional[float]    # 音圧（dB）
-
-    def to_dict(self) -> Dict:
-        """辞書形式に変換"""
-        return asdict(self)
+class AcousticFeatureArrays:
+    """
+    音響特徴のデータクラス（パラメータごとの配列で保持、欠損値はNaN）
+    """
+    time: np.ndarray         # 時刻（秒）
+    f0: np.ndarray           # 基本周波数（Hz）
+    f1: np.ndarray           # 第1フォルマント（Hz）
+    f2: np.ndarray           # 第2フォルマント（Hz）
+    f3: np.ndarray           # 第3フォルマント（Hz）
+    hnr: np.ndarray          # Harmonics-to-Noise Ratio（dB）
+    shimmer: np.ndarray      # Shimmer（振幅変動、%）
+    jitter: np.ndarray       # Jitter（周期変動、%）
+    intensity: np.ndarray    # 音圧（dB）
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def to_dict_list(self) -> List[Dict]:
+        """フレームごとの辞書のリストに変換（欠損値はNone）"""
+        columns = [self.time.tolist()] + [_to_optional_list(getattr(self, param)) for param in FEATURE_PARAMS]
+        keys = ('time',) + FEATURE_PARAMS
+        return [dict(zip(keys, row)) for row in zip(*columns)]
+
+
+def _interp_frames(times: np.ndarray, frame_times: np.ndarray, frame_values: np.ndarray) -> np.ndarray:
+    """
+    フレーム値を指定時刻へ線形補間（解析範囲外はNaN）
+
+    Args:
+        times: 補間先の時刻配列
+        frame_times: フレーム中心時刻の配列
+        frame_values: フレームごとの値
+
+    Returns:
+        補間後の値の配列
+    """
+    frame_values = np.where(frame_values == 0, np.nan, frame_values)
+    return np.interp(times, frame_times, frame_values, left=np.nan, right=np.nan)
+
+
+def _mask_missing(values: np.ndarray) -> np.ndarray:
+    """0およびNaNを欠損値（NaN）に統一したfloat配列に変換"""
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(np.isfinite(values) & (values != 0), values, np.nan)
+
+
+def _to_optional_list(values: np.ndarray) -> List[Optional[float]]:
+    """NaNをNoneに置き換えたPythonのfloatリストに変換"""
+    valid = ~np.isnan(values)
+    return [v if ok else None for v, ok in zip(values.tolist(), valid.tolist())]
 
 
 class AcousticAnalyzer:
@@ -58,27 +149,27 @@ class AcousticAnalyzer:
 
     def analyze_segment(
         self,
-        file_path: str,
+        source: Union[str, parselmouth.Sound],
         start_time: float,
         end_time: float,
         progress_callback=None
-    ) -> List[AcousticFeatures]:
+    ) -> AcousticFeatureArrays:
         """
         音声ファイルの指定区間を解析
 
         Args:
-            file_path: 音声ファイルのパス
+            source: 音声ファイルのパス、または読み込み済みのparselmouth.Sound
             start_time: 開始時刻（秒）
             end_time: 終了時刻（秒）
             progress_callback: 進捗コールバック関数 callback(step, message)
 
         Returns:
-            時系列の音響特徴リスト
+            時系列の音響特徴（パラメータごとの配列）
         """
-        # Parselmouthで音声を読み込み
+        # Parselmouthで音声を読み込み（読み込み済みの場合は再利用）
         if progress_callback:
             progress_callback(1, "Loading audio segment")
-        sound = parselmouth.Sound(file_path)
+        sound = source if isinstance(source, parselmouth.Sound) else parselmouth.Sound(source)
 
         # 指定区間を抽出
         if progress_callback:
@@ -90,8 +181,6 @@ class AcousticAnalyzer:
         )
 
         # 各パラメータを計算
-        features_list = []
-
         # F0を計算
         if progress_callback:
             progress_callback(3, "Computing F0 (pitch)")
@@ -135,65 +224,59 @@ class AcousticAnalyzer:
         except:
             shimmer = None
 
-        # 時系列で解析
+        # 時系列で解析（フレームごとの呼び出しではなく配列で一括取得）
+        if progress_callback:
+            progress_callback(7, "Extracting features")
         times = pitch.xs()
-        total_frames = len(times)
-
-        for idx, t in enumerate(times):
-            # 10%ごとに進捗を報告
-            if progress_callback and idx % max(1, total_frames // 10) == 0:
-                progress_pct = int((idx / total_frames) * 100)
-                progress_callback(7 + (idx / total_frames) * 3, f"Extracting features: frame {idx+1}/{total_frames} ({progress_pct}%)")
-
-            # F0
-            f0_value = pitch.get_value_at_time(t)
-            f0 = f0_value if f0_value and not np.isnan(f0_value) else None
-
-            # フォルマント
-            f1 = formants.get_value_at_time(1, t) if t <= formants.xmax else None
-            f2 = formants.get_value_at_time(2, t) if t <= formants.xmax else None
-            f3 = formants.get_value_at_time(3, t) if t <= formants.xmax else None
-
-            # NaN チェック
-            f1 = f1 if f1 and not np.isnan(f1) else None
-            f2 = f2 if f2 and not np.isnan(f2) else None
-            f3 = f3 if f3 and not np.isnan(f3) else None
-
-            # HNR（事前計算済み）
-            if harmonicity:
-                try:
-                    hnr_value = harmonicity.get_value(time=t)
-                    hnr = hnr_value if hnr_value and not np.isnan(hnr_value) else None
-                except:
-                    hnr = None
-            else:
-                hnr = None
-
-            # Intensity
-            intensity_value = intensity.get_value(time=t)
-            intensity_db = intensity_value if intensity_value and not np.isnan(intensity_value) else None
-
-            features = AcousticFeatures(
-                time=t,
-                f0=f0,
-                f1=f1,
-                f2=f2,
-                f3=f3,
-                hnr=hnr,
-                shimmer=shimmer,
-                jitter=jitter,
-                intensity=intensity_db
+
+        # F0（無声フレームは0）
+        f0_values = _mask_missing(pitch.selected_array['frequency'])
+
+        # フォルマント（番号ごとに行列化してF0の時刻へ線形補間、範囲外はNaN）
+        formant_values = []
+        for formant_number in (1, 2, 3):
+            formant_matrix = call(formants, "To Matrix", formant_number)
+            formant_values.append(_mask_missing(
+                _interp_frames(times, formant_matrix.xs(), formant_matrix.values[0])
+            ))
+        f1_values, f2_values, f3_values = formant_values
+
+        # HNR（事前計算済み）
+        if harmonicity:
+            hnr_frames = np.asarray(harmonicity.values[0], dtype=np.float64)
+            hnr_frames = np.where(hnr_frames == HNR_UNDEFINED, np.nan, hnr_frames)
+            hnr_values = _mask_missing(
+                _interp_frames(times, harmonicity.xs(), hnr_frames)
             )
+        else:
+            hnr_values = np.full(len(times), np.nan)
 
-            features_list.append(features)
+        # Intensity
+        intensity_values = _mask_missing(
+            _interp_frames(times, intensity.xs(), intensity.values[0])
+        )
 
-        return features_list
+        if progress_callback:
+            progress_callback(10, f"Extracted features: {len(times)} frames")
+
+        # Jitter/Shimmerはセグメント全体の値を全フレームに展開
+        return AcousticFeatureArrays(
+            time=np.asarray(times, dtype=np.float64),
+            f0=f0_values,
+            f1=f1_values,
+            f2=f2_values,
+            f3=f3_values,
+            hnr=hnr_values,
+            shimmer=np.full(len(times), np.nan if shimmer is None else shimmer),
+            jitter=np.full(len(times), np.nan if jitter is None else jitter),
+            intensity=intensity_values
+        )
 
     def analyze_file(
         self,
         file_path: str,
         segments: Optional[List[tuple]] = None
-    ) -> Dict[str, List[AcousticFeatures]]:
+    ) -> Dict[str, AcousticFeatureArrays]:
         """
         音声ファイル全体または指定されたセグメントを解析
 
@@ -204,9 +287,11 @@ class AcousticAnalyzer:
         Returns:
             セグメントごとの音響特徴の辞書
         """
+        # 音声は一度だけ読み込み、全セグメントで共有
+        sound = parselmouth.Sound(file_path)
+
         if segments is None:
             # ファイル全体を解析
-            sound = parselmouth.Sound(file_path)
             duration = sound.duration
             segments = [(0.0, duration)]
 
@@ -214,38 +299,36 @@ class AcousticAnalyzer:
 
         for i, (start, end) in enumerate(segments):
             segment_id = f"segment_{i}"
-            features = self.analyze_segment(file_path, start, end)
+            features = self.analyze_segment(sound, start, end)
             results[segment_id] = features
 
         return results
 
     def compute_statistics(
         self,
-        features_list: List[AcousticFeatures]
+        features: AcousticFeatureArrays
     ) -> Dict[str, Dict[str, float]]:
         """
         音響特徴の統計量を計算
 
         Args:
-            features_list: 音響特徴のリスト
+            features: 音響特徴（パラメータごとの配列）
 
         Returns:
             各パラメータの統計量（平均、標準偏差、最小値、最大値）
         """
-        # パラメータごとに値を抽出
-        params = ['f0', 'f1', 'f2', 'f3', 'hnr', 'shimmer', 'jitter', 'intensity']
         statistics = {}
 
-        for param in params:
-            values = [getattr(f, param) for f in features_list if getattr(f, param) is not None]
+        for param in FEATURE_PARAMS:
+            mean, std, min_value, max_value, median = _summary_statistics(getattr(features, param))
 
-            if values:
+            if not np.isnan(mean):
                 statistics[param] = {
-                    'mean': float(np.mean(values)),
-                    'std': float(np.std(values)),
-                    'min': float(np.min(values)),
-                    'max': float(np.max(values)),
-                    'median': float(np.median(values))
+                    'mean': float(mean),
+                    'std': float(std),
+                    'min': float(min_value),
+                    'max': float(max_value),
+                    'median': float(median)
                 }
             else:
                 statistics[param] = {
@@ -260,14 +343,14 @@ class AcousticAnalyzer:
 
     def compute_special_parameters(
         self,
-        features_list: List[AcousticFeatures],
+        features: AcousticFeatureArrays,
         high_pitch_threshold: float = 500.0
     ) -> Dict[str, float]:
         """
         特殊パラメータを計算
 
         Args:
-            features_list: 音響特徴のリスト
+            features: 音響特徴（パラメータごとの配列）
             high_pitch_threshold: High-pitchの閾値（Hz）
 
         Returns:
@@ -277,7 +360,7 @@ class AcousticAnalyzer:
             - voiced_pct: 有声音割合（%）
             - unvoiced_pct: 無声音割合（%）
         """
-        total_frames = len(features_list)
+        total_frames = len(features)
 
         if total_frames == 0:
             return {
@@ -287,34 +370,29 @@ class AcousticAnalyzer:
                 'unvoiced_pct': 0.0
             }
 
+        # NaN同士の比較はFalseになるため、欠損フレームは自動的に除外される
         # High-pitch割合
-        high_pitch_count = sum(
-            1 for f in features_list
-            if f.f0 is not None and f.f0 > high_pitch_threshold
-        )
+        high_pitch_count = np.count_nonzero(features.f0 > high_pitch_threshold)
         high_pitch_pct = (high_pitch_count / total_frames) * 100
 
         # Hyper-phonation割合
         # 定義: HNR < 10dB AND Shimmer > 5% AND Jitter > 1%
-        hyper_phonation_count = sum(
-            1 for f in features_list
-            if (f.hnr is not None and f.hnr < 10.0 and
-                f.shimmer is not None and f.shimmer > 5.0 and
-                f.jitter is not None and f.jitter > 1.0)
+        hyper_phonation_count = np.count_nonzero(
+            (features.hnr < 10.0) & (features.shimmer > 5.0) & (features.jitter > 1.0)
         )
         hyper_phonation_pct = (hyper_phonation_count / total_frames) * 100
 
         # 有声音/無声音の割合
-        # F0が検出された（Noneでない）フレームを有声音とみなす
-        voiced_count = sum(1 for f in features_list if f.f0 is not None)
+        # F0が検出された（NaNでない）フレームを有声音とみなす
+        voiced_count = np.count_nonzero(~np.isnan(features.f0))
         unvoiced_count = total_frames - voiced_count
 
         voiced_pct = (voiced_count / total_frames) * 100
         unvoiced_pct = (unvoiced_count / total_frames) * 100
 
         return {
-            'high_pitch_pct': round(high_pitch_pct, 2),
-            'hyper_phonation_pct': round(hyper_phonation_pct, 2),
-            'voiced_pct': round(voiced_pct, 2),
-            'unvoiced_pct': round(unvoiced_pct, 2)
+            'high_pitch_pct': round(float(high_pitch_pct), 2),
+            'hyper_phonation_pct': round(float(hyper_phonation_pct), 2),
+            'voiced_pct': round(float(voiced_pct), 2),
+            'unvoiced_pct': round(float(unvoiced_pct), 2)
         }
@@ -1,7 +1,10 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
 import librosa
-from typing import List, Dict, Tuple
+import soundfile as sf
+from typing import Iterator, List, Dict, Optional, Tuple
 from dataclasses import dataclass
+from app.audio.parallel import resolve_max_workers
 
 
 @dataclass
@@ -13,6 +16,45 @@ class CryEpisode:
     confidence: float  # 信頼度（0-1）
 
 
+@dataclass
+class CryEpisodeArrays:
+    """
+    泣き声エピソードのデータクラス（項目ごとの配列で保持）
+    """
+    start_time: np.ndarray  # 開始時刻（秒）
+    end_time: np.ndarray    # 終了時刻（秒）
+    duration: np.ndarray    # 継続時間（秒）
+    confidence: np.ndarray  # 信頼度（0-1）
+
+    def __len__(self) -> int:
+        return len(self.start_time)
+
+    def to_dict_list(self) -> List[Dict]:
+        """エピソードごとの辞書のリストに変換"""
+        keys = ('start_time', 'end_time', 'duration', 'confidence')
+        columns = [getattr(self, key).tolist() for key in keys]
+        return [dict(zip(keys, row)) for row in zip(*columns)]
+
+    def to_dataclasses(self) -> List[CryEpisode]:
+        """CryEpisodeのリストに変換"""
+        return [CryEpisode(**episode) for episode in self.to_dict_list()]
+
+
+# RMS・STFTのフレーム長とホップ長（librosaの既定値）
+FRAME_LENGTH = 2048
+HOP_LENGTH = 512
+
+
+def _detect_chunk_segments(
+    detector: "CryDetector",
+    file_path: str,
+    offset: float
+) -> List[Tuple[float, float, float]]:
+    """ワーカープロセスで1チャンクを読み込み、泣き声セグメントを検出"""
+    y = detector._load_chunk(file_path, offset)
+    return detector._detect_cry_segments(y, offset)
+
+
 class CryDetector:
     """
     泣き声検出器
@@ -23,7 +65,7 @@ class CryDetector:
 
     def __init__(
         self,
-        sr: int = 22050,
+        sr: int = 22050,            # スペクトルセントロイドで帯域外（5000Hz超）の成分を捉えるため22050Hzを維持
         chunk_duration: int = 60,  # 1チャンク60秒
         energy_threshold: float = 0.02,
         min_duration: float = 0.5,  # 最小継続時間（秒）
@@ -49,40 +91,186 @@ class CryDetector:
         self.freq_min = freq_min
         self.freq_max = freq_max
 
-    def detect_from_file(self, file_path: str) -> List[CryEpisode]:
+    def detect_from_file(
+        self,
+        file_path: str,
+        max_workers: Optional[int] = None
+    ) -> CryEpisodeArrays:
         """
         音声ファイルから泣き声エピソードを検出
 
+        チャンクは互いに独立なため、プロセスプールで並列に処理します。
+        （Celeryのpreforkワーカーなど、子プロセスを作れない環境では逐次処理）
+
         Args:
             file_path: 音声ファイルのパス
+            max_workers: 並列プロセス数。Noneの場合はCPUコア数
 
         Returns:
-            検出された泣き声エピソードのリスト
+            検出された泣き声エピソード
         """
-        # ファイルの総時間を取得
-        duration = librosa.get_duration(path=file_path)
+        # チャンクの開始時刻を取得
+        offsets = self._chunk_offsets(file_path)
+
+        workers = resolve_max_workers(max_workers, len(offsets))
 
         # チャンクごとに処理
         all_segments = []
+
+        if workers <= 1:
+            for offset, y in self._iter_chunks(file_path):
+                # チャンク内の泣き声セグメントを検出
+                segments = self._detect_cry_segments(y, offset)
+                all_segments.extend(segments)
+        else:
+            # 各ワーカーが自分のチャンクだけを読み込んで検出（順序はマージ時のソートで揃える）
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(_detect_chunk_segments, self, file_path, offset)
+                    for offset in offsets
+                ]
+                for future in as_completed(futures):
+                    all_segments.extend(future.result())
+
+        # セグメントをエピソードにマージ
+        episodes = self._merge_segments_to_episodes(all_segments)
+
+        return episodes
+
+    def _get_duration(self, file_path: str) -> float:
+        """
+        音声ファイルの総時間（秒）を取得
+
+        soundfileでヘッダーのみを読み、非対応形式（m4aなど）はlibrosaで取得します。
+
+        Args:
+            file_path: 音声ファイルのパス
+
+        Returns:
+            総時間（秒）
+        """
+        try:
+            info = sf.info(file_path)
+        except RuntimeError:
+            return librosa.get_duration(path=file_path)
+        return info.frames / info.samplerate
+
+    def _chunk_offsets(self, file_path: str) -> List[float]:
+        """
+        各チャンクの開始時刻（秒）を取得
+
+        浮動小数点の累積誤差を避けるため、サンプル数（整数）で区切ってから秒に変換します。
+
+        Args:
+            file_path: 音声ファイルのパス
+
+        Returns:
+            チャンクの開始時刻のリスト
+        """
+        total_samples = int(self._get_duration(file_path) * self.sr)
         chunk_samples = int(self.chunk_duration * self.sr)
+        n_chunks = (total_samples + chunk_samples - 1) // chunk_samples
+
+        return [i * chunk_samples / self.sr for i in range(n_chunks)]
+
+    def _load_chunk(self, file_path: str, offset: float) -> np.ndarray:
+        """
+        指定時刻から1チャンク分の音声を読み込む
+
+        Args:
+            file_path: 音声ファイルのパス
+            offset: チャンクの開始時刻（秒）
 
-        for offset in np.arange(0, duration, self.chunk_duration):
-            # チャンクを読み込み
+        Returns:
+            モノラル・self.srに変換した音声データ
+        """
+        try:
+            sound_file = sf.SoundFile(file_path)
+        except RuntimeError:
+            # soundfile非対応形式（m4aなど）
             y, _ = librosa.load(
                 file_path,
                 sr=self.sr,
                 offset=offset,
                 duration=self.chunk_duration
             )
+            return y
 
-            # チャンク内の泣き声セグメントを検出
-            segments = self._detect_cry_segments(y, offset)
-            all_segments.extend(segments)
+        with sound_file:
+            return self._read_chunk(sound_file, offset)
 
-        # セグメントをエピソードにマージ
-        episodes = self._merge_segments_to_episodes(all_segments)
+    def _read_chunk(self, sound_file: sf.SoundFile, offset: float) -> np.ndarray:
+        """
+        開いているファイルの指定時刻から1チャンク分を読み込む
 
-        return episodes
+        チャンクの区切りは逐次処理・並列処理とも_chunk_offsetsの開始時刻に揃えます。
+
+        Args:
+            sound_file: 読み込み元のファイル
+            offset: チャンクの開始時刻（秒）
+
+        Returns:
+            モノラル・self.srに変換した音声データ
+        """
+        native_sr = sound_file.samplerate
+        start = int(offset * native_sr)
+        # 直前のチャンクの続きから読む場合はシークしない
+        if sound_file.tell() != start:
+            sound_file.seek(start)
+        block = sound_file.read(int(self.chunk_duration * native_sr), dtype='float32')
+
+        return self._to_mono_resampled(block, native_sr)
+
+    def _to_mono_resampled(self, block: np.ndarray, native_sr: int) -> np.ndarray:
+        """ブロックをモノラルに変換し、self.srにリサンプリング"""
+        if block.ndim > 1:
+            block = block.mean(axis=1)
+        if native_sr != self.sr:
+            block = librosa.resample(block, orig_sr=native_sr, target_sr=self.sr, res_type='soxr_hq')
+        return block
+
+    def _iter_chunks(self, file_path: str) -> Iterator[Tuple[float, np.ndarray]]:
+        """
+        音声ファイルをチャンク単位で読み込む
+
+        ファイルは一度だけ開き、_chunk_offsetsの開始時刻ごとに順次デコードします
+        （並列処理と同じチャンク区切り）。
+        soundfileが対応していない形式（m4aなど）はlibrosaでチャンクごとに読み込みます。
+
+        Args:
+            file_path: 音声ファイルのパス
+
+        Yields:
+            (チャンクの開始時刻, モノラル・self.srに変換した音声データ)
+        """
+        try:
+            sound_file = sf.SoundFile(file_path)
+        except RuntimeError:
+            yield from self._iter_chunks_librosa(file_path)
+            return
+
+        with sound_file:
+            for offset in self._chunk_offsets(file_path):
+                yield offset, self._read_chunk(sound_file, offset)
+
+    def _iter_chunks_librosa(self, file_path: str) -> Iterator[Tuple[float, np.ndarray]]:
+        """
+        librosaでチャンクごとに音声を読み込む（soundfile非対応形式用）
+
+        Args:
+            file_path: 音声ファイルのパス
+
+        Yields:
+            (チャンクの開始時刻, モノラル・self.srに変換した音声データ)
+        """
+        for offset in self._chunk_offsets(file_path):
+            y, _ = librosa.load(
+                file_path,
+                sr=self.sr,
+                offset=offset,
+                duration=self.chunk_duration
+            )
+            yield offset, y
 
     def _detect_cry_segments(
         self,
@@ -99,64 +287,56 @@ class CryDetector:
         Returns:
             (開始時刻, 終了時刻, 信頼度)のリスト
         """
-        segments = []
-
         # フレーム単位で処理
-        hop_length = 512
+        hop_length = HOP_LENGTH
         frame_duration = hop_length / self.sr
 
+        # RMSとスペクトルセントロイドで同じフレーム分割を共有
+        # （librosa.feature.rms / spectral_centroid と同じ中心パディング・フレーム）
+        padded = np.pad(y, FRAME_LENGTH // 2, mode="constant")
+        frames = librosa.util.frame(padded, frame_length=FRAME_LENGTH, hop_length=hop_length)
+
         # エネルギーを計算
-        energy = librosa.feature.rms(y=y, hop_length=hop_length)[0]
+        energy = np.sqrt(np.mean(frames ** 2, axis=0))
 
         # 周波数特徴を計算（スペクトルセントロイド）
-        spectral_centroid = librosa.feature.spectral_centroid(
-            y=y,
-            sr=self.sr,
-            hop_length=hop_length
-        )[0]
+        # エネルギー条件を満たさないフレームは泣き声になり得ないため、FFTを省略
+        spectral_centroid = np.zeros_like(energy)
+        loud = energy > self.energy_threshold
+        if loud.any():
+            window = librosa.filters.get_window("hann", FRAME_LENGTH, fftbins=True)
+            magnitude = np.abs(np.fft.rfft(frames[:, loud] * window[:, np.newaxis], axis=0))
+            frequencies = np.fft.rfftfreq(FRAME_LENGTH, d=1.0 / self.sr)
+            magnitude_sum = magnitude.sum(axis=0)
+            spectral_centroid[loud] = np.divide(
+                frequencies @ magnitude,
+                magnitude_sum,
+                out=np.zeros_like(magnitude_sum),
+                where=magnitude_sum > 0
+            )
 
         # 泣き声らしさを判定
         is_cry = self._is_cry_frame(energy, spectral_centroid)
 
-        # 連続する泣き声フレームを検出
-        in_segment = False
-        segment_start = 0
-        segment_energy_sum = 0
-        segment_frames = 0
-
-        for i, cry in enumerate(is_cry):
-            if cry and not in_segment:
-                # セグメント開始
-                in_segment = True
-                segment_start = i
-                segment_energy_sum = energy[i]
-                segment_frames = 1
-            elif cry and in_segment:
-                # セグメント継続
-                segment_energy_sum += energy[i]
-                segment_frames += 1
-            elif not cry and in_segment:
-                # セグメント終了
-                in_segment = False
-                segment_duration = segment_frames * frame_duration
-
-                # 最小継続時間をチェック
-                if segment_duration >= self.min_duration:
-                    start_time = time_offset + segment_start * frame_duration
-                    end_time = time_offset + i * frame_duration
-                    confidence = min(segment_energy_sum / segment_frames / self.energy_threshold, 1.0)
-                    segments.append((start_time, end_time, confidence))
-
-        # 最後のセグメントを処理
-        if in_segment:
-            segment_duration = segment_frames * frame_duration
-            if segment_duration >= self.min_duration:
-                start_time = time_offset + segment_start * frame_duration
-                end_time = time_offset + len(is_cry) * frame_duration
-                confidence = min(segment_energy_sum / segment_frames / self.energy_threshold, 1.0)
-                segments.append((start_time, end_time, confidence))
-
-        return segments
+        # 連続する泣き声フレームを検出（立ち上がり/立ち下がりの位置から区間を一括抽出）
+        edges = np.diff(is_cry.astype(np.int8), prepend=0, append=0)
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)  # セグメント終了後の最初の非泣き声フレーム
+        lengths = ends - starts
+
+        # 最小継続時間をチェック
+        keep = lengths * frame_duration >= self.min_duration
+        starts, ends, lengths = starts[keep], ends[keep], lengths[keep]
+
+        # セグメントごとの平均エネルギーを累積和から算出
+        energy_cumsum = np.concatenate(([0.0], np.cumsum(energy, dtype=np.float64)))
+        segment_energy_sums = energy_cumsum[ends] - energy_cumsum[starts]
+        confidences = np.minimum(segment_energy_sums / lengths / self.energy_threshold, 1.0)
+
+        start_times = time_offset + starts * frame_duration
+        end_times = time_offset + ends * frame_duration
+
+        return list(zip(start_times.tolist(), end_times.tolist(), confidences.tolist()))
 
     def _is_cry_frame(
         self,
@@ -174,17 +354,21 @@ class CryDetector:
             各フレームが泣き声かどうかのブール配列
         """
         # エネルギー条件
-        energy_condition = energy > self.energy_threshold
+        is_cry = np.greater(energy, self.energy_threshold)
 
         # 周波数条件（赤ちゃんの泣き声は300-600Hz程度）
-        freq_condition = (spectral_centroid >= self.freq_min) & (spectral_centroid <= self.freq_max)
+        # 一時配列を1つだけ確保し、比較結果を使い回して論理積を取る
+        condition = np.greater_equal(spectral_centroid, self.freq_min)
+        np.logical_and(is_cry, condition, out=is_cry)
+        np.less_equal(spectral_centroid, self.freq_max, out=condition)
+        np.logical_and(is_cry, condition, out=is_cry)
 
-        return energy_condition & freq_condition
+        return is_cry
 
     def _merge_segments_to_episodes(
         self,
         segments: List[Tuple[float, float, float]]
-    ) -> List[CryEpisode]:
+    ) -> CryEpisodeArrays:
         """
         セグメントをエピソードにマージ
 
@@ -194,50 +378,32 @@ class CryDetector:
             segments: (開始時刻, 終了時刻, 信頼度)のリスト
 
         Returns:
-            CryEpisodeのリスト
+            泣き声エピソード
         """
         if not segments:
-            return []
+            empty = np.empty(0, dtype=np.float64)
+            return CryEpisodeArrays(start_time=empty, end_time=empty, duration=empty, confidence=empty)
 
         # 開始時刻でソート
-        segments = sorted(segments, key=lambda x: x[0])
-
-        episodes = []
-        current_start = segments[0][0]
-        current_end = segments[0][1]
-        confidences = [segments[0][2]]
-
-        for i in range(1, len(segments)):
-            start, end, confidence = segments[i]
-
-            # ギャップをチェック
-            gap = start - current_end
-
-            if gap <= self.max_gap:
-                # エピソード継続
-                current_end = end
-                confidences.append(confidence)
-            else:
-                # エピソード終了、新規エピソード開始
-                episode = CryEpisode(
-                    start_time=current_start,
-                    end_time=current_end,
-                    duration=current_end - current_start,
-                    confidence=np.mean(confidences)
-                )
-                episodes.append(episode)
-
-                current_start = start
-                current_end = end
-                confidences = [confidence]
-
-        # 最後のエピソードを追加
-        episode = CryEpisode(
-            start_time=current_start,
-            end_time=current_end,
-            duration=current_end - current_start,
-            confidence=np.mean(confidences)
+        segments = np.asarray(segments, dtype=np.float64)
+        segments = segments[np.argsort(segments[:, 0], kind='stable')]
+        starts, ends, confidences = segments.T
+
+        # 直前のセグメントとのギャップが最大ギャップを超えたら新規エピソード
+        is_new_episode = np.concatenate(([True], starts[1:] - ends[:-1] > self.max_gap))
+        first_indices = np.flatnonzero(is_new_episode)
+        last_indices = np.append(first_indices[1:], len(segments)) - 1
+
+        # エピソードごとの信頼度の平均
+        episode_ids = np.cumsum(is_new_episode) - 1
+        mean_confidences = np.bincount(episode_ids, weights=confidences) / np.bincount(episode_ids)
+
+        episode_starts = starts[first_indices]
+        episode_ends = ends[last_indices]
+
+        return CryEpisodeArrays(
+            start_time=episode_starts,
+            end_time=episode_ends,
+            duration=episode_ends - episode_starts,
+            confidence=mean_confidences
         )
-        episodes.append(episode)
-
-        return episodes
@@ -1,8 +1,11 @@
 import numpy as np
 import librosa
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from dataclasses import dataclass
+import scipy.fft
 import scipy.signal
+from numba import njit
+from app.audio.segment_reader import read_audio_segment
 
 
 @dataclass
@@ -15,6 +18,58 @@ class CryUnit:
     mean_energy: float # 平均エネルギー
     peak_frequency: float  # ピーク周波数（Hz）
 
+    def to_dict(self) -> Dict[str, float]:
+        """辞書形式に変換（値は検出時にPythonのfloat/boolにしているため変換不要）"""
+        return {
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration": self.duration,
+            "is_voiced": self.is_voiced,
+            "mean_energy": self.mean_energy,
+            "peak_frequency": self.peak_frequency
+        }
+
+
+@njit(cache=True, boundscheck=False, nogil=True)
+def _scan_runs(mask: np.ndarray, min_len: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ブール配列中の連続するTrue区間を検出（JITコンパイル）
+
+    Args:
+        mask: 各フレームが対象かどうかのブール配列
+        min_len: 区間として採用する最小フレーム数
+
+    Returns:
+        (開始フレーム, 終了フレーム（区間直後のフレーム）)の配列のタプル
+    """
+    n = mask.shape[0]
+    starts = np.empty(n // 2 + 1, dtype=np.int64)
+    ends = np.empty(n // 2 + 1, dtype=np.int64)
+    count = 0
+    in_run = False
+    run_start = 0
+
+    for i in range(n):
+        if mask[i] and not in_run:
+            # 区間開始
+            in_run = True
+            run_start = i
+        elif not mask[i] and in_run:
+            # 区間終了
+            in_run = False
+            if i - run_start >= min_len:
+                starts[count] = run_start
+                ends[count] = i
+                count += 1
+
+    # 最後の区間を処理
+    if in_run and n - run_start >= min_len:
+        starts[count] = run_start
+        ends[count] = n
+        count += 1
+
+    return starts[:count], ends[:count]
+
 
 class CryUnitDetector:
     """
@@ -46,6 +101,9 @@ class CryUnitDetector:
         self.min_silence_duration = min_silence_duration
         self.voiced_threshold = voiced_threshold
 
+        # FFT長ごとの周波数ビン（Hz）のキャッシュ
+        self._fft_freqs: Dict[int, np.ndarray] = {}
+
     def detect_units_in_episode(
         self,
         y: np.ndarray,
@@ -68,9 +126,76 @@ class CryUnitDetector:
         end_sample = int(episode_end_time * self.sr)
         episode_audio = y[start_sample:end_sample]
 
+        return self._detect_units(episode_audio, episode_start_time)
+
+    def detect_units_in_episode_from_file(
+        self,
+        file_path: str,
+        episode_start_time: float,
+        episode_end_time: float
+    ) -> List[CryUnit]:
+        """
+        音声ファイルから該当区間のみを読み込み、Cry Episode内のCry Unitを検出
+
+        ファイル全体をメモリに載せず、エピソードのサンプルだけをデコードします。
+
+        Args:
+            file_path: 音声ファイルのパス
+            episode_start_time: エピソードの開始時刻（秒）
+            episode_end_time: エピソードの終了時刻（秒）
+
+        Returns:
+            検出されたCry Unitのリスト
+        """
+        episode_audio = self._load_episode(file_path, episode_start_time, episode_end_time)
+
+        return self._detect_units(episode_audio, episode_start_time)
+
+    def _load_episode(
+        self,
+        file_path: str,
+        episode_start_time: float,
+        episode_end_time: float
+    ) -> np.ndarray:
+        """
+        エピソード区間の音声を読み込む
+
+        Args:
+            file_path: 音声ファイルのパス
+            episode_start_time: エピソードの開始時刻（秒）
+            episode_end_time: エピソードの終了時刻（秒）
+
+        Returns:
+            モノラル・self.srに変換した音声データ
+        """
+        episode_audio, native_sr = read_audio_segment(file_path, episode_start_time, episode_end_time)
+
+        if native_sr != self.sr and len(episode_audio) > 0:
+            episode_audio = librosa.resample(episode_audio, orig_sr=native_sr, target_sr=self.sr, res_type='soxr_hq')
+
+        return episode_audio
+
+    def _detect_units(
+        self,
+        episode_audio: np.ndarray,
+        episode_start_time: float
+    ) -> List[CryUnit]:
+        """
+        エピソード区間の音声からCry Unitを検出
+
+        Args:
+            episode_audio: エピソード区間の音声データ
+            episode_start_time: エピソードの開始時刻（秒）
+
+        Returns:
+            検出されたCry Unitのリスト
+        """
         if len(episode_audio) == 0:
             return []
 
+        # 絶対時刻をPythonのfloatで計算（numpyスカラーをCryUnitに持ち込まない）
+        episode_start_time = float(episode_start_time)
+
         # 音声パワーエンベロープを計算
         hop_length = 512
         frame_duration = hop_length / self.sr
@@ -118,7 +243,7 @@ class CryUnitDetector:
                 continue
 
             # 有声音/無声音を判定
-            is_voiced = self._classify_voicing(unit_audio)
+            is_voiced = bool(self._classify_voicing(unit_audio))
 
             # 平均エネルギーを計算
             unit_energy_frames = energy[
@@ -156,35 +281,11 @@ class CryUnitDetector:
         Returns:
             (開始時刻, 終了時刻)のリスト
         """
-        segments = []
-        in_silence = False
-        silence_start = 0
-
-        for i, is_silence in enumerate(silence_frames):
-            if is_silence and not in_silence:
-                # 無音区間開始
-                in_silence = True
-                silence_start = i
-            elif not is_silence and in_silence:
-                # 無音区間終了
-                in_silence = False
-                silence_duration = (i - silence_start) * frame_duration
-
-                # 最小無音継続時間をチェック
-                if silence_duration >= self.min_silence_duration:
-                    start_time = silence_start * frame_duration
-                    end_time = i * frame_duration
-                    segments.append((start_time, end_time))
-
-        # 最後の無音区間を処理
-        if in_silence:
-            silence_duration = (len(silence_frames) - silence_start) * frame_duration
-            if silence_duration >= self.min_silence_duration:
-                start_time = silence_start * frame_duration
-                end_time = len(silence_frames) * frame_duration
-                segments.append((start_time, end_time))
-
-        return segments
+        # 最小無音継続時間をフレーム数に換算
+        min_frames = int(np.ceil(self.min_silence_duration / frame_duration))
+        starts, ends = _scan_runs(np.ascontiguousarray(silence_frames, dtype=np.bool_), min_frames)
+
+        return list(zip((starts * frame_duration).tolist(), (ends * frame_duration).tolist()))
 
     def _determine_unit_boundaries(
         self,
@@ -235,9 +336,10 @@ class CryUnitDetector:
         if len(audio) < self.sr * 0.02:  # 20ms未満は判定できない
             return False
 
-        # Zero Crossing Rateを計算
-        zcr = librosa.feature.zero_crossing_rate(audio)[0]
-        mean_zcr = np.mean(zcr)
+        # Zero Crossing Rateを計算（フレーム分割せず、区間全体で符号の変化を1回で数える）
+        sign = np.signbit(audio)
+        zcr_count = np.count_nonzero(sign[1:] != sign[:-1])
+        mean_zcr = zcr_count / (len(audio) - 1)
 
         # 有声音はZCRが低い（周期的な波形）
         # 無声音はZCRが高い（ノイズ的な波形）
@@ -245,7 +347,7 @@ class CryUnitDetector:
         is_voiced = mean_zcr < 0.1
 
         # エネルギーもチェック（無声音は一般的にエネルギーが低い）
-        energy = np.sqrt(np.mean(audio ** 2))
+        energy = np.sqrt(audio @ audio / len(audio))
         if energy < 0.01:
             is_voiced = False
 
@@ -264,13 +366,16 @@ class CryUnitDetector:
         if len(audio) < 512:
             return 0.0
 
-        # FFTを使用してスペクトルを計算
-        fft = np.fft.rfft(audio)
-        magnitude = np.abs(fft)
+        # FFTを使用してスペクトルを計算（2のべき乗長にゼロ詰め）
+        n_fft = 1 << (len(audio) - 1).bit_length()
+        magnitude = np.abs(scipy.fft.rfft(audio, n=n_fft))
 
-        # ピーク周波数を見つける
+        # ピーク周波数を見つける（rfftのビンiは i * sr / n_fft Hz）
+        fft_freqs = self._fft_freqs.get(n_fft)
+        if fft_freqs is None:
+            fft_freqs = self._fft_freqs[n_fft] = np.fft.rfftfreq(n_fft, d=1.0 / self.sr)
         peak_idx = np.argmax(magnitude)
-        peak_freq = peak_idx * self.sr / (2 * len(magnitude))
+        peak_freq = fft_freqs[peak_idx]
 
         return float(peak_freq)
 
@@ -292,18 +397,13 @@ class CryUnitDetector:
         if not units:
             return 0.0, 0.0
 
+        durations = np.fromiter((u.duration for u in units), dtype=np.float64, count=len(units))
+        voiced = np.fromiter((u.is_voiced for u in units), dtype=np.bool_, count=len(units))
+
         # 有声音Cry Unitの平均継続時間
-        voiced_units = [u for u in units if u.is_voiced]
-        if voiced_units:
-            cryCE = np.mean([u.duration for u in voiced_units])
-        else:
-            cryCE = 0.0
+        cryCE = durations[voiced].mean() if voiced.any() else 0.0
 
         # 無声音Cry Unitの継続時間の合計
-        unvoiced_units = [u for u in units if not u.is_voiced]
-        if unvoiced_units:
-            unvoicedCE = sum([u.duration for u in unvoiced_units])
-        else:
-            unvoicedCE = 0.0
+        unvoicedCE = durations[~voiced].sum()
 
         return float(cryCE), float(unvoicedCE)
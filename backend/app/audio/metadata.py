@@ -0,0 +1,26 @@
+import soundfile as sf
+from typing import Optional, Union, BinaryIO
+
+
+def extract_audio_metadata(source: Union[str, BinaryIO]) -> tuple[Optional[int], Optional[float]]:
+    """
+    音声ファイルからメタデータ（サンプルレート、継続時間）を抽出
+
+    Args:
+        source: 音声ファイルのパス、またはファイルオブジェクト
+
+    Returns:
+        tuple: (sample_rate, duration)
+    """
+    try:
+        # soundfileでメタデータを取得（高速）
+        info = sf.info(source)
+        sample_rate = info.samplerate
+        duration = info.duration
+        return int(sample_rate), float(duration)
+    except Exception as e:
+        print(f"Warning: Failed to extract audio metadata from {getattr(source, 'name', source)}: {str(e)}")
+        return None, None
+    finally:
+        if hasattr(source, "seek"):
+            source.seek(0)
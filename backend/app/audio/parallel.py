@@ -0,0 +1,22 @@
+import multiprocessing
+import os
+from typing import Optional
+
+
+def resolve_max_workers(max_workers: Optional[int], task_count: int) -> int:
+    """
+    プロセスプールの並列数を決定
+
+    デーモンプロセス（Celeryのpreforkワーカーなど）は子プロセスを作れないため、
+    その場合は常に1（逐次処理）を返します。
+
+    Args:
+        max_workers: 指定された並列数。Noneの場合はCPUコア数
+        task_count: 処理するタスク数
+
+    Returns:
+        並列数（1以下の場合は逐次処理）
+    """
+    if multiprocessing.current_process().daemon:
+        return 1
+    return max(1, min(task_count, max_workers or os.cpu_count() or 1))
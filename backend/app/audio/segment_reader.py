@@ -0,0 +1,59 @@
+import librosa
+import numpy as np
+import soundfile as sf
+from typing import Tuple
+
+
+def load_full_audio(file_path: str) -> Tuple[np.ndarray, int]:
+    """
+    音声ファイル全体を元のサンプルレートのまま読み込む
+
+    Args:
+        file_path: 音声ファイルのパス
+
+    Returns:
+        (モノラルの音声データ, サンプルレート)
+    """
+    return librosa.load(file_path, sr=None)
+
+
+def read_audio_segment(
+    file_path: str,
+    start_time: float,
+    end_time: float
+) -> Tuple[np.ndarray, int]:
+    """
+    音声ファイルの指定区間のみを読み込む（元のサンプルレートのまま）
+
+    soundfileで区間の先頭へシークし、区間分のフレームだけをデコードします。
+    soundfile非対応形式（m4aなど）の場合はlibrosaで区間を指定して読み込みます。
+
+    Args:
+        file_path: 音声ファイルのパス
+        start_time: 開始時刻（秒）
+        end_time: 終了時刻（秒）
+
+    Returns:
+        (モノラルのfloat32音声データ, サンプルレート)
+    """
+    try:
+        sound_file = sf.SoundFile(file_path)
+    except RuntimeError:
+        return librosa.load(
+            file_path,
+            sr=None,
+            offset=start_time,
+            duration=end_time - start_time
+        )
+
+    with sound_file:
+        sr = sound_file.samplerate
+        start_sample = int(start_time * sr)
+        end_sample = int(end_time * sr)
+        sound_file.seek(start_sample)
+        y = sound_file.read(end_sample - start_sample, dtype='float32')
+
+    if y.ndim > 1:
+        y = y.mean(axis=1)
+
+    return y, sr
@@ -1,10 +1,14 @@
+import os
+
 from celery import Celery
-from app.config import settings
+from app.config import get_settings
+
+REDIS_URL = get_settings().REDIS_URL
 
 celery_app = Celery(
     "baby_cry_analysis",
-    broker=settings.REDIS_URL,
-    backend=settings.REDIS_URL,
+    broker=REDIS_URL,
+    backend=REDIS_URL,
     include=["app.tasks.analysis_tasks"]
 )
 
@@ -17,6 +21,13 @@ celery_app.conf.update(
     enable_utc=True,
     task_track_started=True,
     task_time_limit=3600 * 12,  # 12時間のタイムリミット
+    # ワーカーが異常終了しても長時間の解析を失わないよう、完了後にACKして再キューイング
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    broker_transport_options={"visibility_timeout": 3600 * 13},  # タイムリミットより長く
+    # CPUバウンドな音声解析のため、preforkでコア数分のプロセスを使う
+    worker_pool="prefork",
+    worker_concurrency=os.cpu_count(),
     worker_prefetch_multiplier=1,
-    worker_max_tasks_per_child=10,
+    worker_max_tasks_per_child=5,  # librosa/numbaのメモリ蓄積を抑えるため早めに再起動
 )
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -16,4 +18,11 @@ class Settings(BaseSettings):
     class Config:
         env_file = ".env"
 
-settings = Settings()
+
+@lru_cache
+def get_settings() -> Settings:
+    """設定を取得（.envの読み込みとバリデーションはプロセスごとに1回のみ）"""
+    return Settings()
+
+
+settings = get_settings()
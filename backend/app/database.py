@@ -1,15 +1,54 @@
+import orjson
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
 from app.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+# コンパイル済みSQLのキャッシュ件数（既定の500では動的に組み立てるクエリで溢れやすい）
+QUERY_CACHE_SIZE = 1200
+
+
+def json_serializer(value) -> str:
+    """JSON/JSONB列の値をorjsonでシリアライズ（numpyのスカラー・配列もそのまま扱う）"""
+    return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+# JSON/JSONB列（解析結果など数MBになる値）の変換は標準のjsonではなくorjsonで行う
+engine = create_engine(
+    settings.DATABASE_URL,
+    query_cache_size=QUERY_CACHE_SIZE,
+    json_serializer=json_serializer,
+    json_deserializer=orjson.loads
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Celeryタスク用（スレッドごとに1つのセッションを使い回し、タスク終了時にremove()で破棄）
+ScopedSession = scoped_session(SessionLocal)
 Base = declarative_base()
 
+# 非同期エンドポイント用（同じDBにasyncpgドライバで接続）
+async_engine = create_async_engine(
+    make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg"),
+    query_cache_size=QUERY_CACHE_SIZE,
+    json_serializer=json_serializer,
+    json_deserializer=orjson.loads
+)
+# コミット後の属性アクセスで暗黙のI/Oが起きないよう、失効させない
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
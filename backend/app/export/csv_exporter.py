@@ -1,35 +1,75 @@
 import csv
 from io import StringIO
-from typing import Dict, Any, Optional
+from itertools import islice
+from typing import Dict, Any, List, Optional, Iterable, Iterator
 from datetime import datetime
 
-from app.utils.time_utils import seconds_to_absolute_time, format_datetime, format_seconds
+import numpy as np
+
+from app.utils.time_utils import seconds_to_absolute_time, format_absolute_times, format_datetime, format_seconds
+
+CSV_FLUSH_ROWS = 100  # ストリーミング時に何行ごとにチャンクを出力するか
+CSV_FORMAT_BLOCK_ROWS = 1000  # 数値を列単位でまとめてフォーマットする行数
+
+ACOUSTIC_FEATURE_COLUMNS = ('f0', 'f1', 'f2', 'f3', 'hnr', 'shimmer', 'jitter', 'intensity')
+
+# 特殊パラメータ（result_dataのキー, 表示ラベル）
+SPECIAL_PARAMS = (
+    ('high_pitch_pct', 'High-pitch割合'),
+    ('hyper_phonation_pct', 'Hyper-phonation割合'),
+    ('voiced_pct', '有声音割合'),
+    ('unvoiced_pct', '無声音割合'),
+)
+
+
+def _format_column(values: np.ndarray, fmt: str) -> List[str]:
+    """
+    数値の列をまとめて文字列にフォーマット（NaNは空文字列）
+
+    Args:
+        values: 数値の配列（欠損値はNaN）
+        fmt: %形式のフォーマット文字列
+
+    Returns:
+        フォーマットされた文字列のリスト
+    """
+    formatted = np.char.mod(fmt, values)
+    return np.where(np.isnan(values), "", formatted).tolist()
 
 
 class CSVExporter:
     """CSV形式で解析結果をエクスポート"""
 
-    def export_cry_episodes(
-        self,
-        result_data: Dict[str, Any],
-        recording_start_time: Optional[datetime] = None
-    ) -> str:
+    def _stream_rows(self, rows: Iterable[list], flush_every: int = CSV_FLUSH_ROWS) -> Iterator[str]:
         """
-        泣き声エピソードをCSV形式でエクスポート
+        行のイテラブルをCSV文字列のチャンクとして逐次出力
 
         Args:
-            result_data: 解析結果データ
-            recording_start_time: 録音開始時刻
+            rows: CSVの行（ヘッダー含む）
+            flush_every: 何行ごとにチャンクを出力するか
 
-        Returns:
-            CSV文字列
+        Yields:
+            CSV文字列のチャンク
         """
         output = StringIO()
         writer = csv.writer(output)
+        rows = iter(rows)
 
+        while batch := list(islice(rows, flush_every)):
+            writer.writerows(batch)
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+
+    def _cry_episode_rows(
+        self,
+        result_data: Dict[str, Any],
+        recording_start_time: Optional[datetime]
+    ) -> Iterator[list]:
+        """泣き声エピソードCSVの行（ヘッダー含む）を生成"""
         # ヘッダー
         if recording_start_time:
-            writer.writerow([
+            yield [
                 "エピソード番号",
                 "開始時刻（絶対）",
                 "終了時刻（絶対）",
@@ -37,15 +77,15 @@ class CSVExporter:
                 "終了時刻（相対秒）",
                 "継続時間（秒）",
                 "信頼度"
-            ])
+            ]
         else:
-            writer.writerow([
+            yield [
                 "エピソード番号",
                 "開始時刻（秒）",
                 "終了時刻（秒）",
                 "継続時間（秒）",
                 "信頼度"
-            ])
+            ]
 
         # データ行
         cry_episodes = result_data.get("cry_episodes", [])
@@ -58,7 +98,7 @@ class CSVExporter:
             if recording_start_time:
                 abs_start = seconds_to_absolute_time(recording_start_time, start_time)
                 abs_end = seconds_to_absolute_time(recording_start_time, end_time)
-                writer.writerow([
+                yield [
                     i,
                     format_datetime(abs_start),
                     format_datetime(abs_end),
@@ -66,41 +106,60 @@ class CSVExporter:
                     format_seconds(end_time),
                     format_seconds(duration),
                     f"{confidence:.4f}"
-                ])
+                ]
             else:
-                writer.writerow([
+                yield [
                     i,
                     format_seconds(start_time),
                     format_seconds(end_time),
                     format_seconds(duration),
                     f"{confidence:.4f}"
-                ])
+                ]
 
-        return output.getvalue()
+    def export_cry_episodes_stream(
+        self,
+        result_data: Dict[str, Any],
+        recording_start_time: Optional[datetime] = None
+    ) -> Iterator[str]:
+        """
+        泣き声エピソードをCSV形式で逐次エクスポート
 
-    def export_acoustic_features(
+        Args:
+            result_data: 解析結果データ
+            recording_start_time: 録音開始時刻
+
+        Yields:
+            CSV文字列のチャンク
+        """
+        return self._stream_rows(self._cry_episode_rows(result_data, recording_start_time))
+
+    def export_cry_episodes(
         self,
         result_data: Dict[str, Any],
-        episode_id: str,
         recording_start_time: Optional[datetime] = None
     ) -> str:
         """
-        音響特徴をCSV形式でエクスポート
+        泣き声エピソードをCSV形式でエクスポート
 
         Args:
             result_data: 解析結果データ
-            episode_id: エピソードID（例: "episode_0"）
             recording_start_time: 録音開始時刻
 
         Returns:
             CSV文字列
         """
-        output = StringIO()
-        writer = csv.writer(output)
+        return "".join(self.export_cry_episodes_stream(result_data, recording_start_time))
 
+    def _acoustic_feature_rows(
+        self,
+        result_data: Dict[str, Any],
+        episode_id: str,
+        recording_start_time: Optional[datetime]
+    ) -> Iterator[list]:
+        """音響特徴CSVの行（ヘッダー含む）を生成"""
         # ヘッダー
         if recording_start_time:
-            writer.writerow([
+            yield [
                 "時刻（絶対）",
                 "時刻（相対秒）",
                 "F0 (Hz)",
@@ -111,9 +170,9 @@ class CSVExporter:
                 "Shimmer (%)",
                 "Jitter (%)",
                 "Intensity (dB)"
-            ])
+            ]
         else:
-            writer.writerow([
+            yield [
                 "時刻（秒）",
                 "F0 (Hz)",
                 "F1 (Hz)",
@@ -123,69 +182,77 @@ class CSVExporter:
                 "Shimmer (%)",
                 "Jitter (%)",
                 "Intensity (dB)"
-            ])
+            ]
 
-        # データ行
+        # データ行（数値は列単位でまとめてフォーマット）
         acoustic_features = result_data.get("acoustic_features", {})
         features_list = acoustic_features.get(episode_id, [])
 
-        for feature in features_list:
-            time = feature["time"]
-
-            def format_value(v):
-                if v is None:
-                    return ""
-                return f"{v:.4f}"
+        for block_start in range(0, len(features_list), CSV_FORMAT_BLOCK_ROWS):
+            block = features_list[block_start:block_start + CSV_FORMAT_BLOCK_ROWS]
+            times = np.array([feature["time"] for feature in block], dtype=np.float64)
+            columns = [
+                _format_column(np.array([feature.get(key) for feature in block], dtype=np.float64), "%.4f")
+                for key in ACOUSTIC_FEATURE_COLUMNS
+            ]
+            relative_times = _format_column(times, "%.3f")
 
             if recording_start_time:
-                abs_time = seconds_to_absolute_time(recording_start_time, time)
-                writer.writerow([
-                    format_datetime(abs_time),
-                    format_seconds(time),
-                    format_value(feature.get("f0")),
-                    format_value(feature.get("f1")),
-                    format_value(feature.get("f2")),
-                    format_value(feature.get("f3")),
-                    format_value(feature.get("hnr")),
-                    format_value(feature.get("shimmer")),
-                    format_value(feature.get("jitter")),
-                    format_value(feature.get("intensity"))
-                ])
+                absolute_times = format_absolute_times(recording_start_time, times)
+                yield from zip(absolute_times, relative_times, *columns)
             else:
-                writer.writerow([
-                    format_seconds(time),
-                    format_value(feature.get("f0")),
-                    format_value(feature.get("f1")),
-                    format_value(feature.get("f2")),
-                    format_value(feature.get("f3")),
-                    format_value(feature.get("hnr")),
-                    format_value(feature.get("shimmer")),
-                    format_value(feature.get("jitter")),
-                    format_value(feature.get("intensity"))
-                ])
-
-        return output.getvalue()
+                yield from zip(relative_times, *columns)
 
-    def export_statistics(
+    def export_acoustic_features_stream(
         self,
         result_data: Dict[str, Any],
-        episode_id: str
+        episode_id: str,
+        recording_start_time: Optional[datetime] = None
+    ) -> Iterator[str]:
+        """
+        音響特徴をCSV形式で逐次エクスポート
+
+        Args:
+            result_data: 解析結果データ
+            episode_id: エピソードID（例: "episode_0"）
+            recording_start_time: 録音開始時刻
+
+        Yields:
+            CSV文字列のチャンク
+        """
+        return self._stream_rows(
+            self._acoustic_feature_rows(result_data, episode_id, recording_start_time)
+        )
+
+    def export_acoustic_features(
+        self,
+        result_data: Dict[str, Any],
+        episode_id: str,
+        recording_start_time: Optional[datetime] = None
     ) -> str:
         """
-        統計情報をCSV形式でエクスポート
+        音響特徴をCSV形式でエクスポート
 
         Args:
             result_data: 解析結果データ
             episode_id: エピソードID（例: "episode_0"）
+            recording_start_time: 録音開始時刻
 
         Returns:
             CSV文字列
         """
-        output = StringIO()
-        writer = csv.writer(output)
+        return "".join(
+            self.export_acoustic_features_stream(result_data, episode_id, recording_start_time)
+        )
 
+    def _statistics_rows(
+        self,
+        result_data: Dict[str, Any],
+        episode_id: str
+    ) -> Iterator[list]:
+        """統計情報CSVの行（ヘッダー含む）を生成"""
         # ヘッダー
-        writer.writerow(["パラメータ", "平均", "標準偏差", "最小値", "最大値", "中央値"])
+        yield ["パラメータ", "平均", "標準偏差", "最小値", "最大値", "中央値"]
 
         # データ行
         statistics = result_data.get("statistics", {})
@@ -197,68 +264,78 @@ class CSVExporter:
             return f"{v:.4f}"
 
         # 音響パラメータの統計量（標準的な統計値を持つもの）
-        acoustic_params = ['f0', 'f1', 'f2', 'f3', 'hnr', 'shimmer', 'jitter', 'intensity']
-
-        for param in acoustic_params:
+        for param in ACOUSTIC_FEATURE_COLUMNS:
             if param in episode_stats:
                 stats = episode_stats[param]
-                writer.writerow([
+                yield [
                     param.upper(),
                     format_value(stats.get("mean")),
                     format_value(stats.get("std")),
                     format_value(stats.get("min")),
                     format_value(stats.get("max")),
                     format_value(stats.get("median"))
-                ])
+                ]
 
         # 特殊パラメータ（パーセンテージ値）
-        writer.writerow([])  # 空行
-        writer.writerow(["特殊パラメータ", "値 (%)", "", "", "", ""])
-
-        special_params = [
-            ('high_pitch_pct', 'High-pitch割合'),
-            ('hyper_phonation_pct', 'Hyper-phonation割合'),
-            ('voiced_pct', '有声音割合'),
-            ('unvoiced_pct', '無声音割合')
-        ]
+        yield []  # 空行
+        yield ["特殊パラメータ", "値 (%)", "", "", "", ""]
 
-        for param_key, param_label in special_params:
+        for param_key, param_label in SPECIAL_PARAMS:
             if param_key in episode_stats:
                 value = episode_stats[param_key]
-                writer.writerow([
+                yield [
                     param_label,
                     format_value(value),
                     "",
                     "",
                     "",
                     ""
-                ])
+                ]
 
-        return output.getvalue()
+    def export_statistics_stream(
+        self,
+        result_data: Dict[str, Any],
+        episode_id: str
+    ) -> Iterator[str]:
+        """
+        統計情報をCSV形式で逐次エクスポート
 
-    def export_cry_units(
+        Args:
+            result_data: 解析結果データ
+            episode_id: エピソードID（例: "episode_0"）
+
+        Yields:
+            CSV文字列のチャンク
+        """
+        return self._stream_rows(self._statistics_rows(result_data, episode_id))
+
+    def export_statistics(
         self,
         result_data: Dict[str, Any],
-        episode_id: str,
-        recording_start_time: Optional[datetime] = None
+        episode_id: str
     ) -> str:
         """
-        Cry UnitをCSV形式でエクスポート
+        統計情報をCSV形式でエクスポート
 
         Args:
             result_data: 解析結果データ
             episode_id: エピソードID（例: "episode_0"）
-            recording_start_time: 録音開始時刻
 
         Returns:
             CSV文字列
         """
-        output = StringIO()
-        writer = csv.writer(output)
+        return "".join(self.export_statistics_stream(result_data, episode_id))
 
+    def _cry_unit_rows(
+        self,
+        result_data: Dict[str, Any],
+        episode_id: str,
+        recording_start_time: Optional[datetime]
+    ) -> Iterator[list]:
+        """Cry Unit CSVの行（ヘッダー含む）を生成"""
         # ヘッダー
         if recording_start_time:
-            writer.writerow([
+            yield [
                 "Cry Unit番号",
                 "開始時刻（絶対）",
                 "終了時刻（絶対）",
@@ -268,9 +345,9 @@ class CSVExporter:
                 "有声音/無声音",
                 "平均エネルギー",
                 "ピーク周波数 (Hz)"
-            ])
+            ]
         else:
-            writer.writerow([
+            yield [
                 "Cry Unit番号",
                 "開始時刻（秒）",
                 "終了時刻（秒）",
@@ -278,45 +355,83 @@ class CSVExporter:
                 "有声音/無声音",
                 "平均エネルギー",
                 "ピーク周波数 (Hz)"
-            ])
+            ]
 
-        # データ行
+        # データ行（数値は列単位でまとめてフォーマット）
         cry_units_data = result_data.get("cry_units", {}).get(episode_id, {})
         units = cry_units_data.get("units", [])
 
-        for i, unit in enumerate(units, 1):
-            start_time = unit["start_time"]
-            end_time = unit["end_time"]
-            duration = unit["duration"]
-            is_voiced = unit["is_voiced"]
-            mean_energy = unit["mean_energy"]
-            peak_frequency = unit["peak_frequency"]
+        if not units:
+            return
+
+        start_times = np.array([unit["start_time"] for unit in units], dtype=np.float64)
+        end_times = np.array([unit["end_time"] for unit in units], dtype=np.float64)
+        durations = np.array([unit["duration"] for unit in units], dtype=np.float64)
+        mean_energies = np.array([unit["mean_energy"] for unit in units], dtype=np.float64)
+        peak_frequencies = np.array([unit["peak_frequency"] for unit in units], dtype=np.float64)
+
+        numbers = range(1, len(units) + 1)
+        voicing_labels = ["有声音" if unit["is_voiced"] else "無声音" for unit in units]
+        relative_columns = [
+            _format_column(start_times, "%.3f"),
+            _format_column(end_times, "%.3f"),
+            _format_column(durations, "%.3f")
+        ]
+        trailing_columns = [
+            voicing_labels,
+            _format_column(mean_energies, "%.6f"),
+            _format_column(peak_frequencies, "%.2f")
+        ]
 
-            voicing_label = "有声音" if is_voiced else "無声音"
+        if recording_start_time:
+            yield from zip(
+                numbers,
+                format_absolute_times(recording_start_time, start_times),
+                format_absolute_times(recording_start_time, end_times),
+                *relative_columns,
+                *trailing_columns
+            )
+        else:
+            yield from zip(numbers, *relative_columns, *trailing_columns)
 
-            if recording_start_time:
-                abs_start = seconds_to_absolute_time(recording_start_time, start_time)
-                abs_end = seconds_to_absolute_time(recording_start_time, end_time)
-                writer.writerow([
-                    i,
-                    format_datetime(abs_start),
-                    format_datetime(abs_end),
-                    format_seconds(start_time),
-                    format_seconds(end_time),
-                    format_seconds(duration),
-                    voicing_label,
-                    f"{mean_energy:.6f}",
-                    f"{peak_frequency:.2f}"
-                ])
-            else:
-                writer.writerow([
-                    i,
-                    format_seconds(start_time),
-                    format_seconds(end_time),
-                    format_seconds(duration),
-                    voicing_label,
-                    f"{mean_energy:.6f}",
-                    f"{peak_frequency:.2f}"
-                ])
+    def export_cry_units_stream(
+        self,
+        result_data: Dict[str, Any],
+        episode_id: str,
+        recording_start_time: Optional[datetime] = None
+    ) -> Iterator[str]:
+        """
+        Cry UnitをCSV形式で逐次エクスポート
+
+        Args:
+            result_data: 解析結果データ
+            episode_id: エピソードID（例: "episode_0"）
+            recording_start_time: 録音開始時刻
+
+        Yields:
+            CSV文字列のチャンク
+        """
+        return self._stream_rows(
+            self._cry_unit_rows(result_data, episode_id, recording_start_time)
+        )
 
-        return output.getvalue()
+    def export_cry_units(
+        self,
+        result_data: Dict[str, Any],
+        episode_id: str,
+        recording_start_time: Optional[datetime] = None
+    ) -> str:
+        """
+        Cry UnitをCSV形式でエクスポート
+
+        Args:
+            result_data: 解析結果データ
+            episode_id: エピソードID（例: "episode_0"）
+            recording_start_time: 録音開始時刻
+
+        Returns:
+            CSV文字列
+        """
+        return "".join(
+            self.export_cry_units_stream(result_data, episode_id, recording_start_time)
+        )
@@ -1,12 +1,91 @@
 from io import BytesIO
-from typing import Dict, Any, Optional
+from operator import itemgetter
+from typing import Dict, Any, List, Optional, BinaryIO, Tuple
 from datetime import datetime
 
+import numpy as np
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, Alignment, PatternFill
 from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
+
+from app.utils.time_utils import seconds_to_absolute_time, format_absolute_times, format_datetime
+from app.utils.episode_stats import summarize_episode_durations
+
+# セルの書式（openpyxlのスタイルは不変のため、全セルで同じオブジェクトを共有）
+TITLE_FONT = Font(bold=True, size=16)
+SECTION_FONT = Font(bold=True, size=14)
+EPISODE_HEADING_FONT = Font(bold=True, size=12)
+BOLD_FONT = Font(bold=True)
+HEADER_FILL = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+SPECIAL_PARAMS_FILL = PatternFill(start_color="E0E0E0", end_color="E0E0E0", fill_type="solid")
+CENTER_ALIGNMENT = Alignment(horizontal="center")
+CRY_UNITS_HEADER_FONT = Font(bold=True, color="FFFFFF")
+CRY_UNITS_HEADER_FILL = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+CRY_UNITS_HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="center")
+
+# 統計量を出力する音響パラメータと表示ラベル（出力順）
+ACOUSTIC_PARAM_LABELS = {
+    'f0': 'F0 (Hz)',
+    'f1': 'F1 (Hz)',
+    'f2': 'F2 (Hz)',
+    'f3': 'F3 (Hz)',
+    'hnr': 'HNR (dB)',
+    'shimmer': 'Shimmer (%)',
+    'jitter': 'Jitter (%)',
+    'intensity': 'Intensity (dB)'
+}
+
+# 特殊パラメータ（result_dataのキー, 表示ラベル）
+SPECIAL_PARAMS = (
+    ('high_pitch_pct', 'High-pitch割合'),
+    ('hyper_phonation_pct', 'Hyper-phonation割合'),
+    ('voiced_pct', '有声音割合'),
+    ('unvoiced_pct', '無声音割合'),
+)
+
+
+def _build_feature_rows(
+    episode: Tuple[str, List[Dict[str, Any]]],
+    recording_start_time: Optional[datetime]
+) -> List[List[Any]]:
+    """
+    1エピソード分の音響特徴シートの行を作成（openpyxlには触れない）
 
-from app.utils.time_utils import seconds_to_absolute_time, format_datetime, format_seconds
+    Args:
+        episode: (エピソードID, 音響特徴のリスト) のタプル
+        recording_start_time: 録音開始時刻（Noneの場合は絶対時刻列なし）
+
+    Returns:
+        ワークシートに追加する行のリスト
+    """
+    episode_id, features_list = episode
+    if not features_list:
+        return []
+
+    # エピソード番号を抽出（"episode_0" -> 1）
+    episode_num = int(episode_id.split("_")[1]) + 1
+
+    # 列単位でまとめて丸める（欠損値はNaN → 空セル）
+    times = np.array([feature["time"] for feature in features_list], dtype=np.float64)
+    values = np.array(
+        [list(map(feature.get, ACOUSTIC_PARAM_LABELS)) for feature in features_list],
+        dtype=np.float64
+    )
+    rounded_values = np.round(values, 4).astype(object)
+    rounded_values[np.isnan(values)] = None
+
+    relative_times = np.round(times, 3).tolist()
+    rows = rounded_values.tolist()
+
+    if recording_start_time:
+        absolute_times = format_absolute_times(recording_start_time, times)
+        return [
+            [episode_num, absolute_time, relative_time, *row]
+            for absolute_time, relative_time, row in zip(absolute_times, relative_times, rows)
+        ]
+    return [[episode_num, relative_time, *row] for relative_time, row in zip(relative_times, rows)]
 
 
 class ExcelExporter:
@@ -21,7 +100,8 @@ class ExcelExporter:
     """
 
     def __init__(self):
-        self.wb = Workbook()
+        # 書き込み専用モード（行単位で逐次書き出し、セルオブジェクトをメモリに保持しない）
+        self.wb = Workbook(write_only=True)
 
     def export(
         self,
@@ -40,22 +120,63 @@ class ExcelExporter:
         Returns:
             Excelファイルのバイナリデータ
         """
-        # デフォルトシートを削除
-        if "Sheet" in self.wb.sheetnames:
-            del self.wb["Sheet"]
+        output = BytesIO()
+        self.export_to_stream(output, result_data, file_info, recording_start_time)
+        return output.getvalue()
+
+    def export_to_stream(
+        self,
+        stream: BinaryIO,
+        result_data: Dict[str, Any],
+        file_info: Dict[str, Any],
+        recording_start_time: Optional[datetime] = None
+    ):
+        """
+        解析結果をExcel形式で指定ストリームに書き込む
 
-        # 5シートを作成
+        Args:
+            stream: 書き込み先（シーク可能なバイナリストリーム）
+            result_data: 解析結果データ
+            file_info: ファイル情報
+            recording_start_time: 録音開始時刻
+        """
+        # 5シートを作成（書き込み専用モードにはデフォルトシートはない）
         self._create_summary_sheet(result_data, file_info, recording_start_time)
         self._create_episodes_sheet(result_data, recording_start_time)
         self._create_statistics_sheet(result_data)
         self._create_features_sheet(result_data, recording_start_time)
         self._create_cry_units_sheet(result_data, recording_start_time)
 
-        # バイナリデータとして返す
-        output = BytesIO()
-        self.wb.save(output)
-        output.seek(0)
-        return output.getvalue()
+        # ストリームに書き込み
+        self.wb.save(stream)
+
+    def _styled_cell(
+        self,
+        ws,
+        value: Any,
+        font: Font,
+        fill: Optional[PatternFill] = None,
+        alignment: Optional[Alignment] = None
+    ) -> WriteOnlyCell:
+        """書式付きのセルを作成（書き込み専用シート用）"""
+        cell = WriteOnlyCell(ws, value=value)
+        cell.font = font
+        if fill is not None:
+            cell.fill = fill
+        if alignment is not None:
+            cell.alignment = alignment
+        return cell
+
+    def _header_row(
+        self,
+        ws,
+        headers: List[str],
+        font: Font,
+        fill: PatternFill,
+        alignment: Alignment
+    ) -> List[WriteOnlyCell]:
+        """ヘッダー行のセルを作成"""
+        return [self._styled_cell(ws, header, font, fill, alignment) for header in headers]
 
     def _create_summary_sheet(
         self,
@@ -66,16 +187,17 @@ class ExcelExporter:
         """シート1: 概要"""
         ws = self.wb.create_sheet("概要")
 
+        # 列幅調整（書き込み専用モードでは行の追加前に設定する）
+        ws.column_dimensions["A"].width = 20
+        ws.column_dimensions["B"].width = 40
+
         # タイトル
-        ws["A1"] = "赤ちゃん泣き声解析レポート"
-        ws["A1"].font = Font(bold=True, size=16)
-        ws.merge_cells("A1:B1")
+        ws.append([self._styled_cell(ws, "赤ちゃん泣き声解析レポート", TITLE_FONT)])
+        ws.merged_cells.add("A1:B1")
+        ws.append([])
 
         # ファイル情報
-        row = 3
-        ws[f"A{row}"] = "ファイル情報"
-        ws[f"A{row}"].font = Font(bold=True, size=14)
-        row += 1
+        ws.append([self._styled_cell(ws, "ファイル情報", SECTION_FONT)])
 
         info_data = [
             ("ファイル名", file_info.get("original_filename", "")),
@@ -85,35 +207,23 @@ class ExcelExporter:
         ]
 
         for label, value in info_data:
-            ws[f"A{row}"] = label
-            ws[f"B{row}"] = value
-            ws[f"A{row}"].font = Font(bold=True)
-            row += 1
+            ws.append([self._styled_cell(ws, label, BOLD_FONT), value])
 
         # 解析サマリー
-        row += 1
-        ws[f"A{row}"] = "解析サマリー"
-        ws[f"A{row}"].font = Font(bold=True, size=14)
-        row += 1
+        ws.append([])
+        ws.append([self._styled_cell(ws, "解析サマリー", SECTION_FONT)])
 
         cry_episodes = result_data.get("cry_episodes", [])
-        total_cry_duration = sum(ep["duration"] for ep in cry_episodes)
+        total_cry_duration, avg_duration = summarize_episode_durations(cry_episodes)
 
         summary_data = [
             ("検出エピソード数", len(cry_episodes)),
             ("総泣き時間", f"{total_cry_duration:.2f} 秒"),
-            ("平均エピソード長", f"{total_cry_duration / len(cry_episodes):.2f} 秒" if cry_episodes else "0 秒"),
+            ("平均エピソード長", f"{avg_duration:.2f} 秒" if cry_episodes else "0 秒"),
         ]
 
         for label, value in summary_data:
-            ws[f"A{row}"] = label
-            ws[f"B{row}"] = value
-            ws[f"A{row}"].font = Font(bold=True)
-            row += 1
-
-        # 列幅調整
-        ws.column_dimensions["A"].width = 20
-        ws.column_dimensions["B"].width = 40
+            ws.append([self._styled_cell(ws, label, BOLD_FONT), value])
 
     def _create_episodes_sheet(
         self,
@@ -134,42 +244,46 @@ class ExcelExporter:
                 "No.", "開始時刻（秒）", "終了時刻（秒）", "継続時間（秒）", "信頼度"
             ]
 
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(1, col, header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center")
-
-        # データ行
-        cry_episodes = result_data.get("cry_episodes", [])
-        for i, episode in enumerate(cry_episodes, 1):
-            start_time = episode["start_time"]
-            end_time = episode["end_time"]
-            duration = episode["duration"]
-            confidence = episode["confidence"]
-
-            row = i + 1
-            if recording_start_time:
-                abs_start = seconds_to_absolute_time(recording_start_time, start_time)
-                abs_end = seconds_to_absolute_time(recording_start_time, end_time)
-                ws.cell(row, 1, i)
-                ws.cell(row, 2, format_datetime(abs_start))
-                ws.cell(row, 3, format_datetime(abs_end))
-                ws.cell(row, 4, float(format_seconds(start_time)))
-                ws.cell(row, 5, float(format_seconds(end_time)))
-                ws.cell(row, 6, float(format_seconds(duration)))
-                ws.cell(row, 7, float(f"{confidence:.4f}"))
-            else:
-                ws.cell(row, 1, i)
-                ws.cell(row, 2, float(format_seconds(start_time)))
-                ws.cell(row, 3, float(format_seconds(end_time)))
-                ws.cell(row, 4, float(format_seconds(duration)))
-                ws.cell(row, 5, float(f"{confidence:.4f}"))
-
         # 列幅自動調整
         for col in range(1, len(headers) + 1):
             ws.column_dimensions[get_column_letter(col)].width = 20
 
+        ws.append(self._header_row(
+            ws,
+            headers,
+            BOLD_FONT,
+            HEADER_FILL,
+            CENTER_ALIGNMENT
+        ))
+
+        # データ行（録音開始時刻の有無はシート全体で共通のため、行の組み立て方は1回だけ選ぶ）
+        if recording_start_time:
+            def make_row(i, episode):
+                start_time = episode["start_time"]
+                end_time = episode["end_time"]
+                return [
+                    i,
+                    format_datetime(seconds_to_absolute_time(recording_start_time, start_time)),
+                    format_datetime(seconds_to_absolute_time(recording_start_time, end_time)),
+                    round(start_time, 3),
+                    round(end_time, 3),
+                    round(episode["duration"], 3),
+                    round(episode["confidence"], 4)
+                ]
+        else:
+            def make_row(i, episode):
+                return [
+                    i,
+                    round(episode["start_time"], 3),
+                    round(episode["end_time"], 3),
+                    round(episode["duration"], 3),
+                    round(episode["confidence"], 4)
+                ]
+
+        append = ws.append
+        for i, episode in enumerate(result_data.get("cry_episodes", []), 1):
+            append(make_row(i, episode))
+
     def _create_statistics_sheet(
         self,
         result_data: Dict[str, Any]
@@ -177,92 +291,80 @@ class ExcelExporter:
         """シート3: 音響特徴統計"""
         ws = self.wb.create_sheet("音響特徴統計")
 
+        # 列幅調整
+        ws.column_dimensions["A"].width = 25
+        for col in ["B", "C", "D", "E", "F"]:
+            ws.column_dimensions[col].width = 15
+
+        # 行をまとめて組み立て、結合範囲は組み立て時の行番号で記録して最後に適用する
+        rows: List[List[Any]] = []
+        merged_ranges: List[str] = []
+
         # タイトル
-        ws["A1"] = "音響特徴統計情報"
-        ws["A1"].font = Font(bold=True, size=14)
-        ws.merge_cells("A1:F1")
+        rows.append([self._styled_cell(ws, "音響特徴統計情報", SECTION_FONT)])
+        merged_ranges.append("A1:F1")
+        rows.append([])
 
-        row = 3
         statistics = result_data.get("statistics", {})
 
+        def safe_float(v):
+            return round(v, 4) if v is not None else None
+
         for episode_id in sorted(statistics.keys()):
             episode_num = int(episode_id.split("_")[1]) + 1
             episode_stats = statistics[episode_id]
 
             # エピソードヘッダー
-            ws[f"A{row}"] = f"エピソード {episode_num}"
-            ws[f"A{row}"].font = Font(bold=True, size=12)
-            ws.merge_cells(f"A{row}:F{row}")
-            row += 1
+            rows.append([self._styled_cell(ws, f"エピソード {episode_num}", EPISODE_HEADING_FONT)])
+            merged_ranges.append(f"A{len(rows)}:F{len(rows)}")
 
             # 音響パラメータの統計量テーブル
             headers = ["パラメータ", "平均", "標準偏差", "最小値", "最大値", "中央値"]
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row, col, header)
-                cell.font = Font(bold=True)
-                cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-                cell.alignment = Alignment(horizontal="center")
-            row += 1
+            rows.append(self._header_row(
+                ws,
+                headers,
+                BOLD_FONT,
+                HEADER_FILL,
+                CENTER_ALIGNMENT
+            ))
 
             # 音響パラメータのデータ
-            acoustic_params = ['f0', 'f1', 'f2', 'f3', 'hnr', 'shimmer', 'jitter', 'intensity']
-            param_labels = {
-                'f0': 'F0 (Hz)',
-                'f1': 'F1 (Hz)',
-                'f2': 'F2 (Hz)',
-                'f3': 'F3 (Hz)',
-                'hnr': 'HNR (dB)',
-                'shimmer': 'Shimmer (%)',
-                'jitter': 'Jitter (%)',
-                'intensity': 'Intensity (dB)'
-            }
-
-            for param in acoustic_params:
+            for param, label in ACOUSTIC_PARAM_LABELS.items():
                 if param in episode_stats:
                     stats = episode_stats[param]
-                    ws.cell(row, 1, param_labels.get(param, param.upper()))
-
-                    def safe_float(v):
-                        return float(f"{v:.4f}") if v is not None else None
-
-                    ws.cell(row, 2, safe_float(stats.get("mean")))
-                    ws.cell(row, 3, safe_float(stats.get("std")))
-                    ws.cell(row, 4, safe_float(stats.get("min")))
-                    ws.cell(row, 5, safe_float(stats.get("max")))
-                    ws.cell(row, 6, safe_float(stats.get("median")))
-                    row += 1
+                    rows.append([
+                        label,
+                        safe_float(stats.get("mean")),
+                        safe_float(stats.get("std")),
+                        safe_float(stats.get("min")),
+                        safe_float(stats.get("max")),
+                        safe_float(stats.get("median"))
+                    ])
 
             # 特殊パラメータセクション
-            row += 1
-            ws[f"A{row}"] = "特殊パラメータ"
-            ws[f"A{row}"].font = Font(bold=True)
-            ws[f"A{row}"].fill = PatternFill(start_color="E0E0E0", end_color="E0E0E0", fill_type="solid")
-            ws[f"B{row}"] = "値 (%)"
-            ws[f"B{row}"].font = Font(bold=True)
-            ws[f"B{row}"].fill = PatternFill(start_color="E0E0E0", end_color="E0E0E0", fill_type="solid")
-            ws.merge_cells(f"C{row}:F{row}")
-            row += 1
-
-            special_params = [
-                ('high_pitch_pct', 'High-pitch割合'),
-                ('hyper_phonation_pct', 'Hyper-phonation割合'),
-                ('voiced_pct', '有声音割合'),
-                ('unvoiced_pct', '無声音割合')
-            ]
-
-            for param_key, param_label in special_params:
+            rows.append([])
+            rows.append([
+                self._styled_cell(ws, "特殊パラメータ", BOLD_FONT, SPECIAL_PARAMS_FILL),
+                self._styled_cell(ws, "値 (%)", BOLD_FONT, SPECIAL_PARAMS_FILL)
+            ])
+            merged_ranges.append(f"C{len(rows)}:F{len(rows)}")
+
+            for param_key, param_label in SPECIAL_PARAMS:
                 if param_key in episode_stats:
-                    ws.cell(row, 1, param_label)
                     value = episode_stats[param_key]
-                    ws.cell(row, 2, float(f"{value:.2f}") if value is not None else None)
-                    row += 1
+                    rows.append([param_label, round(value, 2) if value is not None else None])
 
-            row += 2  # エピソード間にスペース
+            # エピソード間にスペース
+            rows.append([])
+            rows.append([])
 
-        # 列幅調整
-        ws.column_dimensions["A"].width = 25
-        for col in ["B", "C", "D", "E", "F"]:
-            ws.column_dimensions[col].width = 15
+        append = ws.append
+        for row in rows:
+            append(row)
+
+        # 結合範囲は行の書き込み後にまとめて登録（openpyxlの公開APIのみを使う）
+        for merged_range in merged_ranges:
+            ws.merged_cells.add(CellRange(merged_range))
 
     def _create_features_sheet(
         self,
@@ -286,48 +388,24 @@ class ExcelExporter:
                 "HNR (dB)", "Shimmer (%)", "Jitter (%)", "Intensity (dB)"
             ]
 
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(1, col, header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center")
-
-        # データ行
-        acoustic_features = result_data.get("acoustic_features", {})
-        row = 2
-
-        for episode_id, features_list in sorted(acoustic_features.items()):
-            # エピソード番号を抽出（"episode_0" -> 1）
-            episode_num = int(episode_id.split("_")[1]) + 1
-
-            for feature in features_list:
-                time = feature["time"]
-
-                if recording_start_time:
-                    abs_time = seconds_to_absolute_time(recording_start_time, time)
-                    ws.cell(row, 1, episode_num)
-                    ws.cell(row, 2, format_datetime(abs_time))
-                    ws.cell(row, 3, float(format_seconds(time)))
-
-                    col_offset = 4
-                else:
-                    ws.cell(row, 1, episode_num)
-                    ws.cell(row, 2, float(format_seconds(time)))
-                    col_offset = 3
-
-                # 音響パラメータ
-                params = ["f0", "f1", "f2", "f3", "hnr", "shimmer", "jitter", "intensity"]
-                for i, param in enumerate(params):
-                    value = feature.get(param)
-                    if value is not None:
-                        ws.cell(row, col_offset + i, float(f"{value:.4f}"))
-
-                row += 1
-
         # 列幅自動調整
         for col in range(1, len(headers) + 1):
             ws.column_dimensions[get_column_letter(col)].width = 18
 
+        ws.append(self._header_row(
+            ws,
+            headers,
+            BOLD_FONT,
+            HEADER_FILL,
+            CENTER_ALIGNMENT
+        ))
+
+        # データ行（エピソードごとに値をまとめて準備してから書き込む）
+        append = ws.append
+        for episode in sorted(result_data.get("acoustic_features", {}).items()):
+            for row in _build_feature_rows(episode, recording_start_time):
+                append(row)
+
     def _create_cry_units_sheet(
         self,
         result_data: Dict[str, Any],
@@ -336,11 +414,6 @@ class ExcelExporter:
         """Cry Unitsシートを作成"""
         ws = self.wb.create_sheet("Cry Units")
 
-        # ヘッダースタイル
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
-        header_alignment = Alignment(horizontal="center", vertical="center")
-
         # ヘッダー
         if recording_start_time:
             headers = [
@@ -354,57 +427,60 @@ class ExcelExporter:
                 "継続時間（秒）", "有声音/無声音", "平均エネルギー", "ピーク周波数 (Hz)"
             ]
 
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(1, col, header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_alignment
+        # 列幅自動調整
+        for col in range(1, len(headers) + 1):
+            ws.column_dimensions[get_column_letter(col)].width = 20
+
+        ws.append(self._header_row(
+            ws,
+            headers,
+            CRY_UNITS_HEADER_FONT,
+            CRY_UNITS_HEADER_FILL,
+            CRY_UNITS_HEADER_ALIGNMENT
+        ))
+
+        # データ行（録音開始時刻の有無はシート全体で共通のため、行の組み立て方は1回だけ選ぶ）
+        get_unit_values = itemgetter(
+            "start_time", "end_time", "duration", "is_voiced", "mean_energy", "peak_frequency"
+        )
+
+        if recording_start_time:
+            def make_row(episode_num, i, unit):
+                start_time, end_time, duration, is_voiced, mean_energy, peak_frequency = get_unit_values(unit)
+                return [
+                    episode_num,
+                    i,
+                    format_datetime(seconds_to_absolute_time(recording_start_time, start_time)),
+                    format_datetime(seconds_to_absolute_time(recording_start_time, end_time)),
+                    round(start_time, 3),
+                    round(end_time, 3),
+                    round(duration, 3),
+                    "有声音" if is_voiced else "無声音",
+                    round(mean_energy, 6),
+                    round(peak_frequency, 2)
+                ]
+        else:
+            def make_row(episode_num, i, unit):
+                start_time, end_time, duration, is_voiced, mean_energy, peak_frequency = get_unit_values(unit)
+                return [
+                    episode_num,
+                    i,
+                    round(start_time, 3),
+                    round(end_time, 3),
+                    round(duration, 3),
+                    "有声音" if is_voiced else "無声音",
+                    round(mean_energy, 6),
+                    round(peak_frequency, 2)
+                ]
 
-        # データ行
         cry_units = result_data.get("cry_units", {})
-        row = 2
+        append = ws.append
 
         for episode_id in sorted(cry_units.keys()):
-            episode_data = cry_units[episode_id]
-            units = episode_data.get("units", [])
+            units = cry_units[episode_id].get("units", [])
 
             # エピソード番号を抽出（episode_0 -> 1）
             episode_num = int(episode_id.split("_")[1]) + 1
 
             for i, unit in enumerate(units, 1):
-                start_time = unit["start_time"]
-                end_time = unit["end_time"]
-                duration = unit["duration"]
-                is_voiced = unit["is_voiced"]
-                mean_energy = unit["mean_energy"]
-                peak_frequency = unit["peak_frequency"]
-
-                voicing_label = "有声音" if is_voiced else "無声音"
-
-                ws.cell(row, 1, episode_num)
-                ws.cell(row, 2, i)
-
-                if recording_start_time:
-                    abs_start = seconds_to_absolute_time(recording_start_time, start_time)
-                    abs_end = seconds_to_absolute_time(recording_start_time, end_time)
-                    ws.cell(row, 3, format_datetime(abs_start))
-                    ws.cell(row, 4, format_datetime(abs_end))
-                    ws.cell(row, 5, float(format_seconds(start_time)))
-                    ws.cell(row, 6, float(format_seconds(end_time)))
-                    ws.cell(row, 7, float(format_seconds(duration)))
-                    ws.cell(row, 8, voicing_label)
-                    ws.cell(row, 9, float(f"{mean_energy:.6f}"))
-                    ws.cell(row, 10, float(f"{peak_frequency:.2f}"))
-                else:
-                    ws.cell(row, 3, float(format_seconds(start_time)))
-                    ws.cell(row, 4, float(format_seconds(end_time)))
-                    ws.cell(row, 5, float(format_seconds(duration)))
-                    ws.cell(row, 6, voicing_label)
-                    ws.cell(row, 7, float(f"{mean_energy:.6f}"))
-                    ws.cell(row, 8, float(f"{peak_frequency:.2f}"))
-
-                row += 1
-
-        # 列幅自動調整
-        for col in range(1, len(headers) + 1):
-            ws.column_dimensions[get_column_letter(col)].width = 20
+                append(make_row(episode_num, i, unit))
@@ -1,44 +1,107 @@
 from io import BytesIO
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, BinaryIO
 from datetime import datetime
 
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import mm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, LongTable, TableStyle, PageBreak
 from reportlab.lib import colors
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 
 from app.utils.time_utils import seconds_to_absolute_time, format_datetime, format_seconds
+from app.utils.episode_stats import summarize_episode_durations
+
+# 段落スタイル（サンプルスタイルシートの構築はインポート時に1回のみ）
+STYLES = getSampleStyleSheet()
+
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=STYLES['Heading1'],
+    fontSize=18,
+    textColor=colors.HexColor('#333333'),
+    spaceAfter=12,
+    alignment=TA_CENTER
+)
+
+HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=STYLES['Heading2'],
+    fontSize=14,
+    textColor=colors.HexColor('#666666'),
+    spaceAfter=10
+)
+
+# 表のスタイル（全ての表・エクスポートで同じオブジェクトを共有）
+KEY_VALUE_TABLE_STYLE = TableStyle([
+    ('FONT', (0, 0), (-1, -1), 'Helvetica', 10),
+    ('FONT', (0, 0), (0, -1), 'Helvetica-Bold', 10),
+    ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#666666')),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+])
+
+EPISODES_TABLE_STYLE = TableStyle([
+    ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 10),
+    ('FONT', (0, 1), (-1, -1), 'Helvetica', 9),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#CCCCCC')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F0F0F0')]),
+])
+
+STATISTICS_TABLE_STYLE = TableStyle([
+    ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 9),
+    ('FONT', (0, 1), (-1, -1), 'Helvetica', 8),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#CCCCCC')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F0F0F0')]),
+])
+
+SPECIAL_PARAMS_TABLE_STYLE = TableStyle([
+    ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 9),
+    ('FONT', (0, 1), (-1, -1), 'Helvetica', 8),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E0E0E0')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F8F8F8')]),
+])
+
+# 統計量を出力する音響パラメータと表示ラベル（出力順）
+ACOUSTIC_PARAM_LABELS = {
+    'f0': 'F0 (Hz)',
+    'f1': 'F1 (Hz)',
+    'f2': 'F2 (Hz)',
+    'f3': 'F3 (Hz)',
+    'hnr': 'HNR (dB)',
+    'shimmer': 'Shimmer (%)',
+    'jitter': 'Jitter (%)',
+    'intensity': 'Intensity (dB)'
+}
+
+# 特殊パラメータ（result_dataのキー, 表示ラベル）
+SPECIAL_PARAMS = (
+    ('high_pitch_pct', 'High-pitch Percentage'),
+    ('hyper_phonation_pct', 'Hyper-phonation Percentage'),
+    ('voiced_pct', 'Voiced Percentage'),
+    ('unvoiced_pct', 'Unvoiced Percentage'),
+)
 
 
 class PDFExporter:
     """PDF形式で解析結果をエクスポート"""
 
-    def __init__(self):
-        # 日本語フォントの登録（デフォルトフォントを使用）
-        self.styles = getSampleStyleSheet()
-
-        # カスタムスタイル
-        self.title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=18,
-            textColor=colors.HexColor('#333333'),
-            spaceAfter=12,
-            alignment=TA_CENTER
-        )
-
-        self.heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=self.styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#666666'),
-            spaceAfter=10
-        )
-
     def export(
         self,
         result_data: Dict[str, Any],
@@ -57,20 +120,40 @@ class PDFExporter:
             PDFファイルのバイナリデータ
         """
         buffer = BytesIO()
+        self.export_to_stream(buffer, result_data, file_info, recording_start_time)
+        return buffer.getvalue()
+
+    def export_to_stream(
+        self,
+        stream: BinaryIO,
+        result_data: Dict[str, Any],
+        file_info: Dict[str, Any],
+        recording_start_time: Optional[datetime] = None
+    ):
+        """
+        解析結果をPDF形式で指定ストリームに書き込む
+
+        Args:
+            stream: 書き込み先のバイナリストリーム
+            result_data: 解析結果データ
+            file_info: ファイル情報
+            recording_start_time: 録音開始時刻
+        """
         doc = SimpleDocTemplate(
-            buffer,
+            stream,
             pagesize=A4,
             rightMargin=20*mm,
             leftMargin=20*mm,
             topMargin=20*mm,
-            bottomMargin=20*mm
+            bottomMargin=20*mm,
+            pageCompression=1  # ページのコンテンツストリームをzlib圧縮（転送量を削減）
         )
 
         # ドキュメント要素
         story = []
 
         # タイトル
-        story.append(Paragraph("Baby Cry Analysis Report", self.title_style))
+        story.append(Paragraph("Baby Cry Analysis Report", TITLE_STYLE))
         story.append(Spacer(1, 12))
 
         # ファイル情報セクション
@@ -90,8 +173,6 @@ class PDFExporter:
 
         # PDFを生成
         doc.build(story)
-        buffer.seek(0)
-        return buffer.getvalue()
 
     def _create_file_info_section(
         self,
@@ -100,7 +181,7 @@ class PDFExporter:
     ):
         """ファイル情報セクション"""
         elements = []
-        elements.append(Paragraph("File Information", self.heading_style))
+        elements.append(Paragraph("File Information", HEADING_STYLE))
 
         data = [
             ["Filename:", file_info.get("original_filename", "")],
@@ -110,14 +191,7 @@ class PDFExporter:
         ]
 
         table = Table(data, colWidths=[50*mm, 100*mm])
-        table.setStyle(TableStyle([
-            ('FONT', (0, 0), (-1, -1), 'Helvetica', 10),
-            ('FONT', (0, 0), (0, -1), 'Helvetica-Bold', 10),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#666666')),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 0),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-        ]))
+        table.setStyle(KEY_VALUE_TABLE_STYLE)
 
         elements.append(table)
         return elements
@@ -125,11 +199,10 @@ class PDFExporter:
     def _create_summary_section(self, result_data: Dict[str, Any]):
         """解析サマリーセクション"""
         elements = []
-        elements.append(Paragraph("Analysis Summary", self.heading_style))
+        elements.append(Paragraph("Analysis Summary", HEADING_STYLE))
 
         cry_episodes = result_data.get("cry_episodes", [])
-        total_cry_duration = sum(ep["duration"] for ep in cry_episodes)
-        avg_duration = total_cry_duration / len(cry_episodes) if cry_episodes else 0
+        total_cry_duration, avg_duration = summarize_episode_durations(cry_episodes)
 
         data = [
             ["Detected Episodes:", str(len(cry_episodes))],
@@ -138,14 +211,7 @@ class PDFExporter:
         ]
 
         table = Table(data, colWidths=[50*mm, 100*mm])
-        table.setStyle(TableStyle([
-            ('FONT', (0, 0), (-1, -1), 'Helvetica', 10),
-            ('FONT', (0, 0), (0, -1), 'Helvetica-Bold', 10),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#666666')),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 0),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-        ]))
+        table.setStyle(KEY_VALUE_TABLE_STYLE)
 
         elements.append(table)
         return elements
@@ -157,16 +223,14 @@ class PDFExporter:
     ):
         """泣き声エピソードセクション"""
         elements = []
-        elements.append(Paragraph("Cry Episodes", self.heading_style))
+        elements.append(Paragraph("Cry Episodes", HEADING_STYLE))
 
         cry_episodes = result_data.get("cry_episodes", [])
 
         if recording_start_time:
-            headers = [["No.", "Start (Abs)", "End (Abs)", "Duration", "Confidence"]]
+            data = [["No.", "Start (Abs)", "End (Abs)", "Duration", "Confidence"]]
         else:
-            headers = [["No.", "Start (s)", "End (s)", "Duration (s)", "Confidence"]]
-
-        data = headers.copy()
+            data = [["No.", "Start (s)", "End (s)", "Duration (s)", "Confidence"]]
 
         for i, episode in enumerate(cry_episodes, 1):
             start_time = episode["start_time"]
@@ -193,17 +257,9 @@ class PDFExporter:
                     f"{confidence:.3f}"
                 ])
 
-        table = Table(data, colWidths=[15*mm, 35*mm, 35*mm, 25*mm, 25*mm])
-        table.setStyle(TableStyle([
-            ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 10),
-            ('FONT', (0, 1), (-1, -1), 'Helvetica', 9),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#CCCCCC')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F0F0F0')]),
-        ]))
+        # エピソード数は多くなり得るため、改ページ時に全体を再レイアウトしないLongTableを使用
+        table = LongTable(data, colWidths=[15*mm, 35*mm, 35*mm, 25*mm, 25*mm], repeatRows=1)
+        table.setStyle(EPISODES_TABLE_STYLE)
 
         elements.append(table)
         return elements
@@ -211,39 +267,26 @@ class PDFExporter:
     def _create_statistics_section(self, result_data: Dict[str, Any]):
         """音響特徴統計セクション"""
         elements = []
-        elements.append(Paragraph("Acoustic Features Statistics", self.heading_style))
+        elements.append(Paragraph("Acoustic Features Statistics", HEADING_STYLE))
 
         statistics = result_data.get("statistics", {})
 
         for episode_id, episode_stats in sorted(statistics.items()):
             episode_num = int(episode_id.split("_")[1]) + 1
             elements.append(Spacer(1, 6))
-            elements.append(Paragraph(f"Episode {episode_num}", self.styles['Heading3']))
+            elements.append(Paragraph(f"Episode {episode_num}", STYLES['Heading3']))
 
             # 音響パラメータの統計量テーブル
-            headers = [["Parameter", "Mean", "Std Dev", "Min", "Max", "Median"]]
-            data = headers.copy()
-
-            acoustic_params = ['f0', 'f1', 'f2', 'f3', 'hnr', 'shimmer', 'jitter', 'intensity']
-            param_labels = {
-                'f0': 'F0 (Hz)',
-                'f1': 'F1 (Hz)',
-                'f2': 'F2 (Hz)',
-                'f3': 'F3 (Hz)',
-                'hnr': 'HNR (dB)',
-                'shimmer': 'Shimmer (%)',
-                'jitter': 'Jitter (%)',
-                'intensity': 'Intensity (dB)'
-            }
+            data = [["Parameter", "Mean", "Std Dev", "Min", "Max", "Median"]]
 
             def fmt(v):
                 return f"{v:.2f}" if v is not None else "N/A"
 
-            for param in acoustic_params:
+            for param, label in ACOUSTIC_PARAM_LABELS.items():
                 if param in episode_stats:
                     stats = episode_stats[param]
                     data.append([
-                        param_labels.get(param, param.upper()),
+                        label,
                         fmt(stats.get("mean")),
                         fmt(stats.get("std")),
                         fmt(stats.get("min")),
@@ -252,33 +295,16 @@ class PDFExporter:
                     ])
 
             table = Table(data, colWidths=[30*mm, 25*mm, 25*mm, 25*mm, 25*mm, 25*mm])
-            table.setStyle(TableStyle([
-                ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 9),
-                ('FONT', (0, 1), (-1, -1), 'Helvetica', 8),
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#CCCCCC')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F0F0F0')]),
-            ]))
+            table.setStyle(STATISTICS_TABLE_STYLE)
 
             elements.append(table)
             elements.append(Spacer(1, 8))
 
             # 特殊パラメータテーブル
-            elements.append(Paragraph("Special Parameters (%)", self.styles['Heading4']))
-            special_headers = [["Parameter", "Value"]]
-            special_data = special_headers.copy()
-
-            special_params = [
-                ('high_pitch_pct', 'High-pitch Percentage'),
-                ('hyper_phonation_pct', 'Hyper-phonation Percentage'),
-                ('voiced_pct', 'Voiced Percentage'),
-                ('unvoiced_pct', 'Unvoiced Percentage')
-            ]
-
-            for param_key, param_label in special_params:
+            elements.append(Paragraph("Special Parameters (%)", STYLES['Heading4']))
+            special_data = [["Parameter", "Value"]]
+
+            for param_key, param_label in SPECIAL_PARAMS:
                 if param_key in episode_stats:
                     value = episode_stats[param_key]
                     special_data.append([
@@ -288,17 +314,7 @@ class PDFExporter:
 
             if len(special_data) > 1:  # If we have data beyond headers
                 special_table = Table(special_data, colWidths=[70*mm, 30*mm])
-                special_table.setStyle(TableStyle([
-                    ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold', 9),
-                    ('FONT', (0, 1), (-1, -1), 'Helvetica', 8),
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E0E0E0')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-                    ('ALIGN', (1, 0), (1, -1), 'CENTER'),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F8F8F8')]),
-                ]))
+                special_table.setStyle(SPECIAL_PARAMS_TABLE_STYLE)
 
                 elements.append(special_table)
 
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -9,7 +10,7 @@ class AnalysisResult(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     audio_file_id = Column(Integer, ForeignKey("audio_files.id", ondelete="CASCADE"), nullable=False, index=True)
-    result_data = Column(JSON, nullable=False)  # 解析結果データ（JSON）
+    result_data = Column(JSONB, nullable=False)  # 解析結果データ（JSONB: キー単位の抽出をDB側で行う）
     analyzed_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # リレーション
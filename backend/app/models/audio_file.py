@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, BigInteger, Float, DateTime, ForeignKey, CheckConstraint
+from sqlalchemy import Column, Integer, String, BigInteger, Float, DateTime, ForeignKey, CheckConstraint, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -8,7 +8,7 @@ class AudioFile(Base):
     __tablename__ = "audio_files"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)  # 検索はix_audio_files_user_uploadedの先頭列で行う
     filename = Column(String(255), nullable=False)  # システム内部のファイル名（UUID）
     original_filename = Column(String(255), nullable=False)  # ユーザーがアップロードした元のファイル名
     file_path = Column(String(500), nullable=False)
@@ -16,7 +16,7 @@ class AudioFile(Base):
     sample_rate = Column(Integer, nullable=True)  # Hz
     duration = Column(Float, nullable=True)  # 秒
     recording_start_time = Column(DateTime(timezone=True), nullable=True, index=True)  # 録音開始時刻（オプション）
-    status = Column(String(50), nullable=False, default="uploaded", index=True)  # 'uploaded', 'processing', 'completed', 'failed'
+    status = Column(String(50), nullable=False, default="uploaded")  # 'uploaded', 'processing', 'completed', 'failed'
     task_id = Column(String(255), nullable=True)  # Celeryタスク ID
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -31,4 +31,11 @@ class AudioFile(Base):
             "status IN ('uploaded', 'processing', 'completed', 'failed')",
             name="check_status"
         ),
+        # ユーザーごとのファイル一覧（新しい順）用のカバリングインデックス
+        Index(
+            "ix_audio_files_user_uploaded",
+            "user_id",
+            uploaded_at.desc(),
+            postgresql_include=["id", "original_filename", "file_size", "status"]
+        ),
     )
@@ -21,5 +21,8 @@ class Tag(Base):
     name = Column(String(100), nullable=False, unique=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # サーバー側で生成される列はINSERT/UPDATEのRETURNINGで取得（コミット後のrefresh不要）
+    __mapper_args__ = {"eager_defaults": True}
+
     # リレーション
     audio_files = relationship("AudioFile", secondary=audio_file_tags, back_populates="tags")
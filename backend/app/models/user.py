@@ -13,5 +13,8 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # サーバー側で生成される列はINSERT/UPDATEのRETURNINGで取得（コミット後のrefresh不要）
+    __mapper_args__ = {"eager_defaults": True}
+
     # リレーション
     audio_files = relationship("AudioFile", back_populates="user", cascade="all, delete-orphan")
@@ -1,7 +1,11 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
+# 解析パラメータはapp.schemas.analysisの定義を共有（同一モデルを二重に定義・構築しない）
+from app.schemas.analysis import AnalysisParameters as AnalysisParametersSchema
+from app.schemas.audio_file import AudioFileStatus
+
 
 class AnalysisResultBase(BaseModel):
     """AnalysisResultの基本スキーマ"""
@@ -22,6 +26,26 @@ class AnalysisResultResponse(AnalysisResultBase):
     class Config:
         from_attributes = True
 
+    @classmethod
+    def from_model(cls, analysis_result) -> "AnalysisResultResponse":
+        """
+        DBから取得したAnalysisResultから検証なしでレスポンスを構築
+
+        result_dataは数MBになるため、Dict[str, Any]としての再検証（全要素の走査）を省略します。
+
+        Args:
+            analysis_result: AnalysisResultモデル
+
+        Returns:
+            AnalysisResultレスポンス
+        """
+        return cls.model_construct(
+            id=analysis_result.id,
+            audio_file_id=analysis_result.audio_file_id,
+            analyzed_at=analysis_result.analyzed_at,
+            result_data=analysis_result.result_data
+        )
+
 
 class CryEpisodeSchema(BaseModel):
     """泣き声エピソードスキーマ"""
@@ -53,45 +77,6 @@ class StatisticsSchema(BaseModel):
     median: Optional[float] = None
 
 
-class AnalysisParametersSchema(BaseModel):
-    """解析パラメータのカスタマイズ設定"""
-
-    high_pitch_threshold: Optional[float] = Field(
-        default=500.0,
-        description="High-pitch判定の閾値（Hz）",
-        ge=100.0,
-        le=2000.0
-    )
-
-    hyper_phonation_threshold: Optional[float] = Field(
-        default=30.0,
-        description="Hyper-phonation判定のHNR閾値（dB）",
-        ge=10.0,
-        le=50.0
-    )
-
-    noise_reduction_level: Optional[int] = Field(
-        default=1,
-        description="ノイズ除去レベル（0=なし、1=弱、2=中、3=強）",
-        ge=0,
-        le=3
-    )
-
-    min_cry_duration: Optional[float] = Field(
-        default=0.3,
-        description="最小Cry Episode継続時間（秒）",
-        ge=0.1,
-        le=5.0
-    )
-
-    energy_threshold: Optional[float] = Field(
-        default=0.01,
-        description="音声活動検出のエネルギー閾値",
-        ge=0.001,
-        le=0.1
-    )
-
-
 class AnalysisRequestSchema(BaseModel):
     """解析リクエストスキーマ"""
     file_id: int
@@ -101,7 +86,8 @@ class AnalysisRequestSchema(BaseModel):
 class AnalysisStatusSchema(BaseModel):
     """解析ステータススキーマ"""
     file_id: int
-    status: str  # 'uploaded', 'processing', 'completed', 'failed'
+    status: AudioFileStatus
     message: str
     progress: Optional[int] = None  # 進捗率（0-100）
     task_id: Optional[str] = None  # CeleryタスクID
+    retry_after_ms: Optional[int] = None  # 次回ステータス確認までの推奨待機時間（ミリ秒）
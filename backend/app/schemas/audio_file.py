@@ -1,10 +1,13 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional, List, TYPE_CHECKING
+from typing import Literal, Optional, List, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from app.schemas.tag import TagResponse
 
+# 音声ファイルのステータス（DBのcheck_status制約と同じ値）
+AudioFileStatus = Literal["uploaded", "processing", "completed", "failed"]
+
 
 class AudioFileBase(BaseModel):
     """AudioFileの基本スキーマ"""
@@ -20,7 +23,7 @@ class AudioFileCreate(AudioFileBase):
 class AudioFileUpdate(BaseModel):
     """AudioFile更新時のスキーマ"""
     recording_start_time: Optional[datetime] = None
-    status: Optional[str] = Field(None, pattern="^(uploaded|processing|completed|failed)$")
+    status: Optional[AudioFileStatus] = None
 
 
 class AudioFileResponse(AudioFileBase):
@@ -32,13 +35,41 @@ class AudioFileResponse(AudioFileBase):
     file_size: int
     sample_rate: Optional[int] = None
     duration: Optional[float] = None
-    status: str
+    status: AudioFileStatus
     uploaded_at: datetime
     tags: List['TagResponse'] = []
 
     class Config:
         from_attributes = True
 
+    @classmethod
+    def from_model(cls, audio_file) -> "AudioFileResponse":
+        """
+        DBから取得したAudioFileから検証なしでレスポンスを構築
+
+        値は型付きのDB列から取得済みのため、model_validateによる再検証を省略します。
+
+        Args:
+            audio_file: AudioFileモデル（tagsはロード済みであること）
+
+        Returns:
+            AudioFileレスポンス
+        """
+        return cls.model_construct(
+            id=audio_file.id,
+            user_id=audio_file.user_id,
+            filename=audio_file.filename,
+            original_filename=audio_file.original_filename,
+            file_path=audio_file.file_path,
+            file_size=audio_file.file_size,
+            sample_rate=audio_file.sample_rate,
+            duration=audio_file.duration,
+            recording_start_time=audio_file.recording_start_time,
+            status=audio_file.status,
+            uploaded_at=audio_file.uploaded_at,
+            tags=[TagResponse.from_model(tag) for tag in audio_file.tags]
+        )
+
 
 class AudioFileListResponse(BaseModel):
     """AudioFileリストレスポンススキーマ"""
@@ -18,6 +18,11 @@ class TagResponse(TagBase):
     class Config:
         from_attributes = True
 
+    @classmethod
+    def from_model(cls, tag) -> "TagResponse":
+        """DBから取得したTagから検証なしでレスポンスを構築"""
+        return cls.model_construct(id=tag.id, name=tag.name, created_at=tag.created_at)
+
 
 class TagListResponse(BaseModel):
     total: int
@@ -1,35 +1,133 @@
 from celery import Task
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from app.celery_app import celery_app
-from app.database import SessionLocal
+from app.database import ScopedSession
 from app.models.user import User
 from app.models.audio_file import AudioFile
 from app.models.analysis_result import AnalysisResult
-from app.audio.cry_detector import CryDetector
-from app.audio.cry_unit_detector import CryUnitDetector
-from app.audio.acoustic_analyzer import AcousticAnalyzer
-import librosa
+from app.audio.metadata import extract_audio_metadata
+from app.utils.task_state import publish_task_state, record_task_duration
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# 進捗通知の間引き（いずれかを満たした場合のみ通知）
+PROGRESS_UPDATE_INTERVAL = 0.5   # 前回の通知からの経過時間（秒）
+PROGRESS_UPDATE_MIN_STEP = 5     # 前回の通知からの進捗の変化（%）
+
+# Cry Unit検出のスレッド数と先読みするエピソード数
+# （preforkの子プロセスごとに起動するため、CPUコア数ではなく小さな固定値にする）
+CRY_UNIT_WORKERS = 2
+CRY_UNIT_LOOKAHEAD = 2
+
 
 class DatabaseTask(Task):
     """データベースセッションを管理するタスク基底クラス"""
-    _db: Session = None
+    _started_at: float = None
+    _last_progress: int = None
+    _last_progress_at: float = 0.0
+    # 完了時に通知するメッセージ（タスクごとに@celery_app.taskの引数で指定）
+    success_message: str = "Task completed"
 
     def after_return(self, *args, **kwargs):
-        if self._db is not None:
-            self._db.close()
+        # セッションを閉じてスレッドのレジストリから外す（接続はプールに返却）
+        ScopedSession.remove()
 
     @property
     def db(self) -> Session:
-        if self._db is None:
-            self._db = SessionLocal()
-        return self._db
+        return ScopedSession()
+
+    def before_start(self, task_id, args, kwargs):
+        self._started_at = time.time()
+        self._last_progress = None
+        self._last_progress_at = 0.0
+
+    def update_state(self, task_id=None, state=None, meta=None, **kwargs):
+        super().update_state(task_id=task_id, state=state, meta=meta, **kwargs)
+        self._publish_state(task_id or self.request.id, state, meta)
+
+    def update_progress(self, progress: int, message: str, force: bool = False):
+        """
+        進捗を通知（Redisへの書き込みを間引く）
+
+        前回の通知からPROGRESS_UPDATE_INTERVAL秒未満、かつ進捗の変化が
+        PROGRESS_UPDATE_MIN_STEP未満の場合は通知しません。
+
+        Args:
+            progress: 進捗（0-100）
+            message: 進捗メッセージ
+            force: Trueの場合は間引かずに必ず通知
+        """
+        now = time.monotonic()
+        if (
+            not force
+            and self._last_progress is not None
+            and now - self._last_progress_at < PROGRESS_UPDATE_INTERVAL
+            and abs(progress - self._last_progress) < PROGRESS_UPDATE_MIN_STEP
+        ):
+            return
+
+        self._last_progress = progress
+        self._last_progress_at = now
+        # 進捗はRedis（状態キー + pub/sub通知）にのみ書き込む
+        # （APIはCeleryの結果バックエンドを参照しないため、update_stateによる書き込みは不要）
+        self._publish_state(self.request.id, 'PROGRESS', {'progress': progress, 'message': message})
+
+    def on_success(self, retval, task_id, args, kwargs):
+        self._publish_state(task_id, "SUCCESS", {"progress": 100, "message": self.success_message})
+
+        # 処理時間を記録（ポーリング間隔ヒントの算出用）
+        if self._started_at is not None:
+            try:
+                record_task_duration(self.name, time.time() - self._started_at)
+            except Exception as e:
+                logger.warning(f"Failed to record task duration for task_id={task_id}: {str(e)}")
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        self._publish_state(task_id, "FAILURE", {"message": str(exc)})
+
+    def _publish_state(self, task_id, state, meta):
+        """タスク状態をRedisに保存・通知（API側のステータス参照用）"""
+        try:
+            publish_task_state(task_id, state, meta, started_at=self._started_at)
+        except Exception as e:
+            logger.warning(f"Failed to publish task state for task_id={task_id}: {str(e)}")
+
+
+def _backfill_audio_metadata(audio_file: AudioFile) -> bool:
+    """サンプルレート・継続時間が未設定の場合に抽出して設定"""
+    if audio_file.sample_rate is not None and audio_file.duration is not None:
+        return False
+
+    sample_rate, duration = extract_audio_metadata(audio_file.file_path)
+    audio_file.sample_rate = sample_rate
+    audio_file.duration = duration
+    return True
 
 
 @celery_app.task(base=DatabaseTask, bind=True)
+def extract_metadata(self, file_id: int):
+    """
+    アップロードされた音声ファイルのメタデータを抽出するタスク
+
+    Args:
+        file_id: 音声ファイルID
+    """
+    audio_file = self.db.query(AudioFile).filter(AudioFile.id == file_id).first()
+    if not audio_file:
+        logger.warning(f"Audio file {file_id} not found for metadata extraction")
+        return None
+
+    if _backfill_audio_metadata(audio_file):
+        self.db.commit()
+
+    return file_id
+
+
+@celery_app.task(base=DatabaseTask, bind=True, success_message="Analysis completed")
 def analyze_audio_file(self, file_id: int):
     """
     音声ファイルを解析するタスク
@@ -40,6 +138,13 @@ def analyze_audio_file(self, file_id: int):
     Returns:
         解析結果ID
     """
+    # librosa/numba/parselmouthの読み込みは重いため、起動時ではなく初回呼び出し時に読み込む
+    # （APIプロセスやメタデータ抽出のみを行うワーカーでは読み込まない）
+    import parselmouth
+    from app.audio.cry_detector import CryDetector
+    from app.audio.cry_unit_detector import CryUnitDetector
+    from app.audio.acoustic_analyzer import AcousticAnalyzer
+
     logger.info(f"Starting analysis for file_id={file_id}")
 
     try:
@@ -49,35 +154,28 @@ def analyze_audio_file(self, file_id: int):
         if not audio_file:
             raise ValueError(f"Audio file {file_id} not found")
 
-        # ステータスを'processing'に更新
+        # ステータスを'processing'に更新（メタデータ未抽出なら合わせて設定）
+        _backfill_audio_metadata(audio_file)
         audio_file.status = "processing"
         self.db.commit()
 
         # 進捗: 10% - ファイル読み込み完了
-        self.update_state(state='PROGRESS', meta={'progress': 10, 'message': 'File loaded'})
+        self.update_progress(10, 'File loaded')
 
         # 泣き声を検出
         logger.info(f"Detecting cry episodes for file_id={file_id}")
         cry_detector = CryDetector()
 
         # 進捗: 20% - 泣き声検出開始
-        self.update_state(state='PROGRESS', meta={'progress': 20, 'message': 'Detecting cry episodes'})
+        self.update_progress(20, 'Detecting cry episodes')
 
         cry_episodes = cry_detector.detect_from_file(audio_file.file_path)
 
         # 進捗: 40% - 泣き声検出完了
-        self.update_state(state='PROGRESS', meta={'progress': 40, 'message': f'Found {len(cry_episodes)} episodes'})
+        self.update_progress(40, f'Found {len(cry_episodes)} episodes')
 
         # 泣き声エピソードを辞書形式に変換（numpy型をPython型に変換）
-        cry_episodes_data = [
-            {
-                "start_time": float(ep.start_time),
-                "end_time": float(ep.end_time),
-                "duration": float(ep.duration),
-                "confidence": float(ep.confidence)
-            }
-            for ep in cry_episodes
-        ]
+        cry_episodes_data = cry_episodes.to_dict_list()
 
         # 音響解析
         logger.info(f"Analyzing acoustic features for file_id={file_id}")
@@ -87,11 +185,10 @@ def analyze_audio_file(self, file_id: int):
         cry_unit_detector = CryUnitDetector()
 
         # 進捗: 50% - 音響解析開始
-        self.update_state(state='PROGRESS', meta={'progress': 50, 'message': 'Loading audio for analysis'})
+        self.update_progress(50, 'Loading audio for analysis')
 
-        # 音声ファイル全体を読み込み（Cry Unit検出用）
-        logger.info(f"Loading full audio for cry unit detection, file_id={file_id}")
-        y_full, sr = librosa.load(audio_file.file_path, sr=22050)
+        # 音響解析用の音声も一度だけ読み込み、全エピソードで共有
+        sound = parselmouth.Sound(audio_file.file_path)
 
         # 各エピソードの音響特徴を解析
         episodes_features = {}
@@ -99,97 +196,96 @@ def analyze_audio_file(self, file_id: int):
         episodes_cry_units = {}
 
         total_episodes = len(cry_episodes)
-        for i, episode in enumerate(cry_episodes):
-            segment_id = f"episode_{i}"
-
-            # 各エピソード処理の基準進捗（50-80%の範囲で）
-            base_progress = 50 + int((i / max(total_episodes, 1)) * 30)
-            step_size = int(30 / max(total_episodes, 1) / 15)  # 各エピソードを15ステップに分割（音響特徴抽出を10ステップに細分化）
-
-            # 音響特徴抽出の進捗コールバック
-            def acoustic_progress_callback(substep, message):
-                progress = base_progress + int(substep * step_size)
-                self.update_state(
-                    state='PROGRESS',
-                    meta={'progress': progress, 'message': f'Episode {i+1}/{total_episodes}: {message}'}
+        episodes = cry_episodes.to_dataclasses()
+
+        # Cry Unit検出はParselmouth（Praatはスレッドセーフではない）を使わないため、
+        # スレッドプールで先読みし、メインスレッドの音響解析と並行して実行
+        # （preforkワーカーは子プロセスを作れないため、プロセスではなくスレッドを使う）
+        # 投入は先読み幅までに限り、同時に読み込むエピソード区間の音声を一定数に抑える
+        cry_unit_executor = ThreadPoolExecutor(max_workers=CRY_UNIT_WORKERS)
+        cry_unit_futures = {}
+
+        def submit_cry_unit_detection(index):
+            if index < total_episodes:
+                episode = episodes[index]
+                cry_unit_futures[index] = cry_unit_executor.submit(
+                    cry_unit_detector.detect_units_in_episode_from_file,
+                    audio_file.file_path,
+                    episode.start_time,
+                    episode.end_time
+                )
+
+        try:
+            for index in range(CRY_UNIT_LOOKAHEAD):
+                submit_cry_unit_detection(index)
+
+            for i, episode in enumerate(episodes):
+                segment_id = f"episode_{i}"
+
+                # 各エピソード処理の基準進捗（50-80%の範囲で）
+                base_progress = 50 + int((i / max(total_episodes, 1)) * 30)
+                step_size = int(30 / max(total_episodes, 1) / 15)  # 各エピソードを15ステップに分割（音響特徴抽出を10ステップに細分化）
+
+                # 音響特徴抽出の進捗コールバック
+                def acoustic_progress_callback(substep, message):
+                    progress = base_progress + int(substep * step_size)
+                    self.update_progress(progress, f'Episode {i+1}/{total_episodes}: {message}')
+
+                # ステップ1-10: 音響特徴解析（内部で細分化されたサブステップ）
+                features = acoustic_analyzer.analyze_segment(
+                    sound,
+                    episode.start_time,
+                    episode.end_time,
+                    progress_callback=acoustic_progress_callback
                 )
 
-            # ステップ1-10: 音響特徴解析（内部で細分化されたサブステップ）
-            features = acoustic_analyzer.analyze_segment(
-                audio_file.file_path,
-                episode.start_time,
-                episode.end_time,
-                progress_callback=acoustic_progress_callback
-            )
-
-            # 辞書形式に変換
-            features_data = [f.to_dict() for f in features]
-            episodes_features[segment_id] = features_data
-
-            # ステップ11: 統計量計算
-            self.update_state(
-                state='PROGRESS',
-                meta={'progress': base_progress + step_size * 11, 'message': f'Episode {i+1}/{total_episodes}: Computing statistics'}
-            )
-            statistics = acoustic_analyzer.compute_statistics(features)
-
-            # ステップ12: 特殊パラメータ計算
-            self.update_state(
-                state='PROGRESS',
-                meta={'progress': base_progress + step_size * 12, 'message': f'Episode {i+1}/{total_episodes}: Computing special parameters'}
-            )
-            special_params = acoustic_analyzer.compute_special_parameters(features)
-
-            # ステップ13: Cry Unit検出
-            self.update_state(
-                state='PROGRESS',
-                meta={'progress': base_progress + step_size * 13, 'message': f'Episode {i+1}/{total_episodes}: Detecting cry units'}
-            )
-            logger.info(f"Detecting cry units for {segment_id}, file_id={file_id}")
-            cry_units = cry_unit_detector.detect_units_in_episode(
-                y_full,
-                episode.start_time,
-                episode.end_time
-            )
-
-            # ステップ14: Cry Unitメトリクス計算
-            self.update_state(
-                state='PROGRESS',
-                meta={'progress': base_progress + step_size * 14, 'message': f'Episode {i+1}/{total_episodes}: Computing cry unit metrics'}
-            )
-            cryCE, unvoicedCE = cry_unit_detector.calculate_cry_unit_metrics(cry_units)
-
-            # Cry Unitデータを辞書形式に変換（numpy型をPython型に変換）
-            cry_units_data = [
-                {
-                    "start_time": float(unit.start_time),
-                    "end_time": float(unit.end_time),
-                    "duration": float(unit.duration),
-                    "is_voiced": bool(unit.is_voiced),
-                    "mean_energy": float(unit.mean_energy),
-                    "peak_frequency": float(unit.peak_frequency)
+                # 辞書形式に変換
+                features_data = features.to_dict_list()
+                episodes_features[segment_id] = features_data
+
+                # ステップ11: 統計量計算
+                self.update_progress(base_progress + step_size * 11, f'Episode {i+1}/{total_episodes}: Computing statistics')
+                statistics = acoustic_analyzer.compute_statistics(features)
+
+                # ステップ12: 特殊パラメータ計算
+                self.update_progress(base_progress + step_size * 12, f'Episode {i+1}/{total_episodes}: Computing special parameters')
+                special_params = acoustic_analyzer.compute_special_parameters(features)
+
+                # ステップ13: Cry Unit検出
+                self.update_progress(base_progress + step_size * 13, f'Episode {i+1}/{total_episodes}: Detecting cry units')
+                logger.info(f"Detecting cry units for {segment_id}, file_id={file_id}")
+                # エピソード区間のみをファイルから読み込んで検出済み（完了していなければ待機）
+                cry_units = cry_unit_futures.pop(i).result()
+                submit_cry_unit_detection(i + CRY_UNIT_LOOKAHEAD)
+
+                # ステップ14: Cry Unitメトリクス計算
+                self.update_progress(base_progress + step_size * 14, f'Episode {i+1}/{total_episodes}: Computing cry unit metrics')
+                cryCE, unvoicedCE = cry_unit_detector.calculate_cry_unit_metrics(cry_units)
+
+                # Cry Unitデータを辞書形式に変換（値は検出時にPython型になっている）
+                cry_units_data = [unit.to_dict() for unit in cry_units]
+
+                episodes_cry_units[segment_id] = {
+                    "units": cry_units_data,
+                    "unit_count": len(cry_units),
+                    "cryCE": float(cryCE),
+                    "unvoicedCE": float(unvoicedCE)
+                }
+
+                # 統計量と特殊パラメータにCry Unit関連メトリクスを追加
+                episodes_statistics[segment_id] = {
+                    **statistics,
+                    **special_params,
+                    "cryCE": float(cryCE),
+                    "unvoicedCE": float(unvoicedCE),
+                    "cry_unit_count": int(len(cry_units))
                 }
-                for unit in cry_units
-            ]
-
-            episodes_cry_units[segment_id] = {
-                "units": cry_units_data,
-                "unit_count": len(cry_units),
-                "cryCE": float(cryCE),
-                "unvoicedCE": float(unvoicedCE)
-            }
-
-            # 統計量と特殊パラメータにCry Unit関連メトリクスを追加
-            episodes_statistics[segment_id] = {
-                **statistics,
-                **special_params,
-                "cryCE": float(cryCE),
-                "unvoicedCE": float(unvoicedCE),
-                "cry_unit_count": int(len(cry_units))
-            }
+        finally:
+            # 例外時は未着手の検出を取り消し、実行中のものだけ待つ
+            cry_unit_executor.shutdown(wait=True, cancel_futures=True)
 
         # 進捗: 85% - 解析完了、保存準備
-        self.update_state(state='PROGRESS', meta={'progress': 85, 'message': 'Saving results'})
+        self.update_progress(85, 'Saving results')
 
         # 解析結果をまとめる
         result_data = {
@@ -200,22 +296,25 @@ def analyze_audio_file(self, file_id: int):
         }
 
         # 解析結果をデータベースに保存
-        analysis_result = AnalysisResult(
-            audio_file_id=file_id,
-            result_data=result_data
-        )
-        self.db.add(analysis_result)
+        # 数MBになる結果データをORMの変更追跡・アイデンティティマップに載せないよう、Coreのinsertで直接書き込む
+        # （コミット後にidを参照しても結果データ全体を再SELECTしない）
+        analysis_result_id = self.db.execute(
+            insert(AnalysisResult).values(
+                audio_file_id=file_id,
+                result_data=result_data
+            ).returning(AnalysisResult.id)
+        ).scalar_one()
 
         # ファイルのステータスを'completed'に更新
         audio_file.status = "completed"
         self.db.commit()
 
         # 進捗: 100% - 完了
-        self.update_state(state='PROGRESS', meta={'progress': 100, 'message': 'Analysis completed'})
+        self.update_progress(100, 'Analysis completed', force=True)
 
-        logger.info(f"Analysis completed for file_id={file_id}, result_id={analysis_result.id}")
+        logger.info(f"Analysis completed for file_id={file_id}, result_id={analysis_result_id}")
 
-        return analysis_result.id
+        return analysis_result_id
 
     except Exception as e:
         logger.error(f"Analysis failed for file_id={file_id}: {str(e)}")
@@ -0,0 +1,32 @@
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+# これ以上のエピソード数でnumpyによる集計に切り替える（少数ではPythonのsumの方が速い）
+VECTORIZE_MIN_EPISODES = 256
+
+
+def summarize_episode_durations(cry_episodes: List[Dict[str, Any]]) -> Tuple[float, float]:
+    """
+    泣き声エピソードの総時間と平均時間を計算
+
+    Args:
+        cry_episodes: 泣き声エピソードのリスト（各要素に"duration"を含む）
+
+    Returns:
+        (総泣き時間（秒）, 平均エピソード長（秒）) のタプル、エピソードがない場合は (0.0, 0.0)
+    """
+    count = len(cry_episodes)
+    if count == 0:
+        return 0.0, 0.0
+
+    if count < VECTORIZE_MIN_EPISODES:
+        total = float(sum(ep["duration"] for ep in cry_episodes))
+        return total, total / count
+
+    durations = np.fromiter(
+        (ep["duration"] for ep in cry_episodes),
+        dtype=np.float64,
+        count=count
+    )
+    return float(durations.sum()), float(durations.mean())
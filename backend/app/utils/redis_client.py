@@ -0,0 +1,25 @@
+from typing import Optional
+
+import redis
+import redis.asyncio
+
+from app.config import settings
+
+_redis_client: Optional[redis.Redis] = None
+_async_redis_client: Optional[redis.asyncio.Redis] = None
+
+
+def get_redis_client() -> redis.Redis:
+    """プロセス内で共有するRedisクライアントを取得"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis_client
+
+
+def get_async_redis_client() -> redis.asyncio.Redis:
+    """プロセス内で共有する非同期Redisクライアントを取得（非同期エンドポイント用）"""
+    global _async_redis_client
+    if _async_redis_client is None:
+        _async_redis_client = redis.asyncio.Redis.from_url(settings.REDIS_URL)
+    return _async_redis_client
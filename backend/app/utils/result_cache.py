@@ -0,0 +1,46 @@
+import logging
+from typing import Any, Dict
+
+import orjson
+
+from app.models.analysis_result import AnalysisResult
+from app.utils.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+RESULT_DATA_PREFIX = "result_data:"
+RESULT_DATA_TTL = 3600  # 1時間
+
+
+def get_result_data(analysis_result: AnalysisResult) -> Dict[str, Any]:
+    """
+    解析結果データを取得（Redisキャッシュ経由）
+
+    解析結果は作成後に更新されないため、結果IDをキーにキャッシュします。
+    result_dataをdeferしたクエリで取得した行を渡すと、
+    キャッシュヒット時はDBからJSONを読み込みません。
+
+    Args:
+        analysis_result: 解析結果
+
+    Returns:
+        解析結果データ
+    """
+    key = f"{RESULT_DATA_PREFIX}{analysis_result.id}"
+    client = get_redis_client()
+
+    try:
+        cached = client.get(key)
+        if cached is not None:
+            return orjson.loads(cached)
+    except Exception as e:
+        logger.warning(f"Failed to read result cache {key}: {str(e)}")
+
+    result_data = analysis_result.result_data
+
+    try:
+        client.setex(key, RESULT_DATA_TTL, orjson.dumps(result_data))
+    except Exception as e:
+        logger.warning(f"Failed to write result cache {key}: {str(e)}")
+
+    return result_data
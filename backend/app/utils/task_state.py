@@ -0,0 +1,146 @@
+import json
+import statistics
+import time
+from typing import Any, Dict, Optional
+
+from app.utils.redis_client import get_redis_client, get_async_redis_client
+
+TASK_STATE_PREFIX = "taskstate:"
+TASK_STATE_TTL = 3600 * 24  # 24時間
+
+# ポーリング間隔ヒントの算出用
+TASK_DURATIONS_PREFIX = "taskdurations:"
+TASK_DURATIONS_HISTORY = 100     # 保持する直近の処理時間の件数
+DEFAULT_RETRY_AFTER_MS = 1000    # 履歴がない場合の間隔
+MIN_RETRY_AFTER_MS = 500
+MAX_RETRY_AFTER_MS = 10000
+POLL_BUDGET = 5                  # 残り予想時間を何回のポーリングで刻むか
+
+# これ以上更新されないタスク状態
+TERMINAL_TASK_STATES = frozenset(("SUCCESS", "FAILURE"))
+
+
+def _task_state_key(task_id: str) -> str:
+    return f"{TASK_STATE_PREFIX}{task_id}"
+
+
+def publish_task_state(
+    task_id: str,
+    state: str,
+    meta: Optional[Dict[str, Any]] = None,
+    started_at: Optional[float] = None
+):
+    """
+    タスクの状態をRedisに保存し、同名チャンネルへ通知
+
+    Args:
+        task_id: CeleryタスクID
+        state: タスク状態（'PROGRESS', 'SUCCESS', 'FAILURE'など）
+        meta: 付随情報（progress, messageなど）
+        started_at: タスク開始時刻（UNIX時刻）
+    """
+    key = _task_state_key(task_id)
+    payload = json.dumps({"state": state, "meta": meta or {}, "started_at": started_at})
+
+    client = get_redis_client()
+    pipe = client.pipeline()
+    pipe.set(key, payload, ex=TASK_STATE_TTL)
+    pipe.publish(key, payload)
+    pipe.execute()
+
+
+async def get_task_state(task_id: str) -> Optional[Dict[str, Any]]:
+    """
+    保存済みのタスク状態を取得（GET 1回）
+
+    Args:
+        task_id: CeleryタスクID
+
+    Returns:
+        {"state": ..., "meta": {...}}、未登録の場合はNone
+    """
+    payload = await get_async_redis_client().get(_task_state_key(task_id))
+    if payload is None:
+        return None
+    return json.loads(payload)
+
+
+async def wait_for_task_state(task_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+    """
+    タスク状態の更新通知を待機（ロングポーリング用）
+
+    イベントループ上で待機するため、待機中のクライアントがスレッドを占有しません。
+    pub/subは購読前の通知を保持しないため、購読してから保存済みの状態を確認し、
+    すでに完了・失敗していれば待機せずに返します。
+
+    Args:
+        task_id: CeleryタスクID
+        timeout: 最大待機時間（秒）
+
+    Returns:
+        通知されたタスク状態。完了・失敗済みの場合は保存済みの状態、
+        タイムアウトした場合は保存済みの状態（未登録ならNone）
+    """
+    pubsub = get_async_redis_client().pubsub(ignore_subscribe_messages=True)
+    try:
+        await pubsub.subscribe(_task_state_key(task_id))
+
+        # 購読開始までに最終状態が通知済みの場合は取りこぼさないよう、ここで確認
+        stored_state = await get_task_state(task_id)
+        if stored_state and stored_state.get("state") in TERMINAL_TASK_STATES:
+            return stored_state
+
+        deadline = time.monotonic() + timeout
+        while (remaining := deadline - time.monotonic()) > 0:
+            message = await pubsub.get_message(timeout=remaining)
+            if message and message["type"] == "message":
+                return json.loads(message["data"])
+        return stored_state
+    finally:
+        await pubsub.aclose()
+
+
+def record_task_duration(task_name: str, duration: float):
+    """
+    完了したタスクの処理時間を記録（直近TASK_DURATIONS_HISTORY件を保持）
+
+    Args:
+        task_name: Celeryタスク名
+        duration: 処理時間（秒）
+    """
+    key = f"{TASK_DURATIONS_PREFIX}{task_name}"
+    pipe = get_redis_client().pipeline()
+    pipe.lpush(key, duration)
+    pipe.ltrim(key, 0, TASK_DURATIONS_HISTORY - 1)
+    pipe.execute()
+
+
+async def get_retry_after_ms(task_name: str, started_at: Optional[float]) -> int:
+    """
+    次回ステータス確認までの推奨待機時間を算出
+
+    過去の処理時間の中央値から残り時間を見積もり、
+    それをPOLL_BUDGET回で刻む間隔を返します。
+
+    Args:
+        task_name: Celeryタスク名
+        started_at: タスク開始時刻（UNIX時刻）
+
+    Returns:
+        推奨待機時間（ミリ秒）
+    """
+    if started_at is None:
+        return DEFAULT_RETRY_AFTER_MS
+
+    durations = await get_async_redis_client().lrange(f"{TASK_DURATIONS_PREFIX}{task_name}", 0, -1)
+    if not durations:
+        return DEFAULT_RETRY_AFTER_MS
+
+    median_duration = statistics.median(float(d) for d in durations)
+    remaining = median_duration - (time.time() - started_at)
+    if remaining <= 0:
+        # 見積もりを超えている場合は短い間隔で確認
+        return MIN_RETRY_AFTER_MS
+
+    retry_after_ms = int(remaining * 1000 / POLL_BUDGET)
+    return max(MIN_RETRY_AFTER_MS, min(retry_after_ms, MAX_RETRY_AFTER_MS))
@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
+
+import numpy as np
 
 
 def seconds_to_absolute_time(
@@ -45,6 +47,25 @@ def format_datetime(dt: Optional[datetime], format_str: str = "%Y-%m-%d %H:%M:%S
     return formatted
 
 
+def format_absolute_times(recording_start_time: datetime, seconds: np.ndarray) -> List[str]:
+    """
+    相対時刻（秒）の配列をまとめて絶対時刻の文字列に変換
+
+    seconds_to_absolute_time + format_datetime と同じ結果（ミリ秒まで表示）を、
+    行ごとのdatetime生成なしに一括で求めます。
+
+    Args:
+        recording_start_time: 録音開始時刻（絶対時刻）
+        seconds: 相対時刻（秒）の配列
+
+    Returns:
+        "YYYY-MM-DD HH:MM:SS.mmm"形式の文字列のリスト
+    """
+    start = np.datetime64(recording_start_time.replace(tzinfo=None), 'us')
+    offsets = np.round(np.asarray(seconds, dtype=np.float64) * 1e6).astype('timedelta64[us]')
+    return np.char.replace(np.datetime_as_string(start + offsets, unit='ms'), "T", " ").tolist()
+
+
 def format_seconds(seconds: float, decimals: int = 3) -> str:
     """
     秒数をフォーマット
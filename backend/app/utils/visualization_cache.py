@@ -0,0 +1,130 @@
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+import orjson
+
+from app.utils.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+VISUALIZATION_PREFIX = "viz:"
+VISUALIZATION_TTL = 3600  # 1時間
+
+# ファイル全体の可視化データ生成用のロック（ファイルIDで振り分ける固定数のロック）
+# （波形とスペクトログラムが同時に要求されても、デコードは1回で済ませる）
+FULL_FILE_LOCK_STRIPES = 16
+FULL_FILE_LOCKS = tuple(threading.Lock() for _ in range(FULL_FILE_LOCK_STRIPES))
+
+
+def visualization_key(kind: str, file_id: int, episode_id: Optional[str], mtime: int) -> str:
+    """可視化データのキャッシュキーを作成"""
+    return f"{VISUALIZATION_PREFIX}{kind}:{file_id}:{episode_id or 'full'}:{mtime}"
+
+
+def read_cached_payload(client, key: str) -> Optional[bytes]:
+    """キャッシュ済みの可視化データを取得（Redisエラー時はNone）"""
+    try:
+        return client.get(key)
+    except Exception as e:
+        logger.warning(f"Failed to read visualization cache {key}: {str(e)}")
+        return None
+
+
+def get_visualization_payload(
+    kind: str,
+    file_id: int,
+    file_path: str,
+    episode_id: Optional[str],
+    generate: Callable[[], Dict[str, Any]]
+) -> bytes:
+    """
+    可視化データをJSONバイト列で取得（Redisキャッシュ経由）
+
+    キーにファイルの更新時刻を含めるため、ファイルが置き換わると自動的に再生成されます。
+    キャッシュにはシリアライズ済みのJSONを保存し、ヒット時は再エンコードしません。
+    generateが返す辞書にはnumpy配列をそのまま含められます。
+    音声の読み込みを伴うため、イベントループ外（スレッド）から呼び出してください。
+
+    Args:
+        kind: 可視化の種類（'waveform', 'spectrogram'）
+        file_id: 音声ファイルID
+        file_path: 音声ファイルのパス
+        episode_id: エピソードID（Noneの場合はファイル全体）
+        generate: キャッシュがない場合に可視化データを生成する関数
+
+    Returns:
+        JSONエンコード済みの可視化データ
+    """
+    mtime = os.stat(file_path).st_mtime_ns
+    key = visualization_key(kind, file_id, episode_id, mtime)
+    client = get_redis_client()
+
+    cached = read_cached_payload(client, key)
+    if cached is not None:
+        return cached
+
+    # numpy配列はorjsonで直接シリアライズ（tolist()によるPythonのfloat化を経由しない）
+    payload = orjson.dumps(generate(), option=orjson.OPT_SERIALIZE_NUMPY)
+
+    try:
+        client.setex(key, VISUALIZATION_TTL, payload)
+    except Exception as e:
+        logger.warning(f"Failed to write visualization cache {key}: {str(e)}")
+
+    return payload
+
+
+def get_full_file_payload(
+    kind: str,
+    file_id: int,
+    file_path: str,
+    generate_all: Callable[[], Dict[str, Dict[str, Any]]]
+) -> bytes:
+    """
+    ファイル全体の可視化データをJSONバイト列で取得（Redisキャッシュ経由）
+
+    キャッシュがない場合は、1回のデコードから全種類の可視化データを生成して
+    まとめてキャッシュします（続けて別の種類が要求されても再デコードしない）。
+    同じファイルの生成はプロセス内で1つに限り（ロックはファイルIDで振り分けて共有）、
+    待機後はキャッシュから返します。
+    イベントループ外（スレッド）から呼び出してください。
+
+    Args:
+        kind: 可視化の種類（'waveform', 'spectrogram'）
+        file_id: 音声ファイルID
+        file_path: 音声ファイルのパス
+        generate_all: 種類ごとの可視化データの辞書を生成する関数
+
+    Returns:
+        JSONエンコード済みの可視化データ
+    """
+    mtime = os.stat(file_path).st_mtime_ns
+    key = visualization_key(kind, file_id, None, mtime)
+    client = get_redis_client()
+
+    cached = read_cached_payload(client, key)
+    if cached is not None:
+        return cached
+
+    with FULL_FILE_LOCKS[file_id % FULL_FILE_LOCK_STRIPES]:
+        # 待機中に他のリクエストが生成していればそれを返す
+        cached = read_cached_payload(client, key)
+        if cached is not None:
+            return cached
+
+        payloads = {
+            data_kind: orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+            for data_kind, data in generate_all().items()
+        }
+
+        try:
+            pipe = client.pipeline(transaction=False)
+            for data_kind, payload in payloads.items():
+                pipe.setex(visualization_key(data_kind, file_id, None, mtime), VISUALIZATION_TTL, payload)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to write visualization cache for file {file_id}: {str(e)}")
+
+    return payloads[kind]
@@ -1,6 +1,33 @@
 import numpy as np
 import librosa
-from typing import Dict, List, Any
+import scipy.fft
+import scipy.signal
+from functools import lru_cache
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, List, Any, Tuple
+from app.audio.segment_reader import load_full_audio, read_audio_segment
+
+STFT_BLOCK_FRAMES = 1024  # 窓掛け・FFTを一度に行うフレーム数
+
+
+@lru_cache(maxsize=8)
+def _frequency_axis(sr: int, n_fft: int, max_freq: float) -> Tuple[np.ndarray, int]:
+    """
+    最大周波数以下のSTFT周波数軸を取得（サンプルレートとFFTサイズごとにキャッシュ）
+
+    Args:
+        sr: サンプルレート
+        n_fft: FFTウィンドウサイズ
+        max_freq: 最大周波数（Hz）
+
+    Returns:
+        (周波数配列（読み取り専用）, 周波数ビン数) のタプル
+    """
+    frequencies = librosa.fft_frequencies(sr=sr, n_fft=n_fft)
+    n_bins = int(np.count_nonzero(frequencies <= max_freq))
+    frequencies = frequencies[:n_bins]
+    frequencies.flags.writeable = False
+    return frequencies, n_bins
 
 
 class SpectrogramGenerator:
@@ -24,6 +51,42 @@ class SpectrogramGenerator:
         self.hop_length = hop_length
         self.max_freq = max_freq
         self.max_time_bins = max_time_bins
+        # Hann窓（周期的、librosa.stftと同じ窓）
+        self.window = scipy.signal.get_window('hann', n_fft).astype(np.float32)
+
+    def _compute_db(self, y: np.ndarray, sr: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        dBスケールの振幅スペクトログラムとフレーム中心の時刻を計算
+
+        パディングなし（center=False相当）でフレーム分割し、窓掛けしたフレームを
+        一定フレーム数ごとにまとめてrfftで変換します。入力はfloat32に揃え、STFTはcomplex64、
+        振幅・dB値はfloat32のまま計算します。
+
+        Args:
+            y: 音声データ
+            sr: サンプルレート
+
+        Returns:
+            (dB値の配列 [freq, time]（float32）, 各フレーム中心の時刻（秒）) のタプル
+        """
+        y = np.asarray(y, dtype=np.float32)
+        if len(y) < self.n_fft:
+            # 1フレームに満たない場合は末尾を0で埋める
+            y = np.pad(y, (0, self.n_fft - len(y)))
+
+        # フレームはコピーせずビューで切り出し、窓掛け・FFTは一定フレーム数ごとに行う
+        # （全フレームを一度に窓掛けすると、長時間録音で一時配列が巨大になる）
+        frames = sliding_window_view(y, self.n_fft)[::self.hop_length]
+        n_frames = len(frames)
+        magnitude = np.empty((self.n_fft // 2 + 1, n_frames), dtype=np.float32)
+        for start in range(0, n_frames, STFT_BLOCK_FRAMES):
+            block = frames[start:start + STFT_BLOCK_FRAMES] * self.window
+            magnitude[:, start:start + len(block)] = np.abs(scipy.fft.rfft(block, axis=1)).T
+
+        S_db = librosa.amplitude_to_db(magnitude, ref=np.max)
+
+        times = (np.arange(S_db.shape[1]) * self.hop_length + self.n_fft / 2) / sr
+        return S_db, times
 
     def generate_full_spectrogram(self, file_path: str) -> Dict[str, Any]:
         """
@@ -35,27 +98,26 @@ class SpectrogramGenerator:
         Returns:
             スペクトログラムデータ（times, frequencies, spectrogram）
         """
-        # 音声を読み込み
-        y, sr = librosa.load(file_path, sr=None)
+        y, sr = load_full_audio(file_path)
+        return self.spectrogram_from_audio(y, sr)
 
-        # STFTを計算
-        D = librosa.stft(y, n_fft=self.n_fft, hop_length=self.hop_length)
+    def spectrogram_from_audio(self, y: np.ndarray, sr: int) -> Dict[str, Any]:
+        """
+        デコード済みのファイル全体の音声からスペクトログラムデータを生成
 
-        # パワースペクトログラムに変換（dB）
-        S_db = librosa.amplitude_to_db(np.abs(D), ref=np.max)
+        Args:
+            y: 音声データ
+            sr: サンプルレート
 
-        # 時間軸と周波数軸を生成
-        times = librosa.frames_to_time(
-            np.arange(S_db.shape[1]),
-            sr=sr,
-            hop_length=self.hop_length
-        )
-        frequencies = librosa.fft_frequencies(sr=sr, n_fft=self.n_fft)
+        Returns:
+            スペクトログラムデータ（times, frequencies, spectrogram）
+        """
+        # STFTを計算し、パワースペクトログラムに変換（dB）、時間軸はフレーム中心の時刻
+        S_db, times = self._compute_db(y, sr)
 
-        # 最大周波数でフィルタリング
-        freq_mask = frequencies <= self.max_freq
-        frequencies = frequencies[freq_mask]
-        S_db = S_db[freq_mask, :]
+        # 最大周波数以下の帯域に絞る（周波数軸は昇順のため先頭からのスライス）
+        frequencies, n_bins = _frequency_axis(sr, self.n_fft, self.max_freq)
+        S_db = S_db[:n_bins, :]
 
         # 時間軸のダウンサンプリング
         if S_db.shape[1] > self.max_time_bins:
@@ -63,10 +125,11 @@ class SpectrogramGenerator:
             times = times[indices]
             S_db = S_db[:, indices]
 
+        # 配列はnumpyのまま返す（orjsonで直接シリアライズ、dB値は表示用にfloat32で十分）
         return {
-            "times": times.tolist(),
-            "frequencies": frequencies.tolist(),
-            "spectrogram": S_db.tolist(),  # 2D array: [freq, time]
+            "times": times,
+            "frequencies": frequencies,
+            "spectrogram": np.ascontiguousarray(S_db, dtype=np.float32),  # 2D array: [freq, time]
             "sample_rate": int(sr),
             "duration": float(len(y) / sr)
         }
@@ -88,32 +151,15 @@ class SpectrogramGenerator:
         Returns:
             スペクトログラムデータ（times, frequencies, spectrogram）
         """
-        # 音声を読み込み
-        y, sr = librosa.load(file_path, sr=None)
-
-        # エピソードの区間を抽出
-        start_sample = int(start_time * sr)
-        end_sample = int(end_time * sr)
-        y_segment = y[start_sample:end_sample]
-
-        # STFTを計算
-        D = librosa.stft(y_segment, n_fft=self.n_fft, hop_length=self.hop_length)
-
-        # パワースペクトログラムに変換（dB）
-        S_db = librosa.amplitude_to_db(np.abs(D), ref=np.max)
+        # エピソードの区間のみを読み込み（ファイル全体はデコードしない）
+        y_segment, sr = read_audio_segment(file_path, start_time, end_time)
 
-        # 時間軸と周波数軸を生成（エピソード開始からの相対時刻）
-        times = librosa.frames_to_time(
-            np.arange(S_db.shape[1]),
-            sr=sr,
-            hop_length=self.hop_length
-        )
-        frequencies = librosa.fft_frequencies(sr=sr, n_fft=self.n_fft)
+        # STFTを計算し、パワースペクトログラムに変換（dB）、時間軸はフレーム中心の時刻（エピソード開始からの相対時刻）
+        S_db, times = self._compute_db(y_segment, sr)
 
-        # 最大周波数でフィルタリング
-        freq_mask = frequencies <= self.max_freq
-        frequencies = frequencies[freq_mask]
-        S_db = S_db[freq_mask, :]
+        # 最大周波数以下の帯域に絞る（周波数軸は昇順のため先頭からのスライス）
+        frequencies, n_bins = _frequency_axis(sr, self.n_fft, self.max_freq)
+        S_db = S_db[:n_bins, :]
 
         # 時間軸のダウンサンプリング
         if S_db.shape[1] > self.max_time_bins:
@@ -121,10 +167,11 @@ class SpectrogramGenerator:
             times = times[indices]
             S_db = S_db[:, indices]
 
+        # 配列はnumpyのまま返す（orjsonで直接シリアライズ、dB値は表示用にfloat32で十分）
         return {
-            "times": times.tolist(),
-            "frequencies": frequencies.tolist(),
-            "spectrogram": S_db.tolist(),  # 2D array: [freq, time]
+            "times": times,
+            "frequencies": frequencies,
+            "spectrogram": np.ascontiguousarray(S_db, dtype=np.float32),  # 2D array: [freq, time]
             "sample_rate": int(sr),
             "duration": float(end_time - start_time),
             "start_time": float(start_time),
@@ -1,6 +1,6 @@
 import numpy as np
-import librosa
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+from app.audio.segment_reader import load_full_audio, read_audio_segment
 
 
 class WaveformGenerator:
@@ -13,6 +13,38 @@ class WaveformGenerator:
         """
         self.max_points = max_points
 
+    def downsample(self, y: np.ndarray, sr: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        表示用に波形をダウンサンプリング（区間ごとの最小値/最大値を交互に並べるピーク表示）
+
+        等間隔の間引きと異なり、短いピークが欠落しません。
+
+        Args:
+            y: 音声データ
+            sr: サンプリングレート
+
+        Returns:
+            (時刻配列, 振幅配列)。要素数はmax_points以下
+        """
+        if len(y) <= self.max_points:
+            return np.arange(len(y)) / sr, y
+
+        # 1区間あたり最小値と最大値の2点を出力
+        n_bins = self.max_points // 2
+        bin_size = len(y) // n_bins
+        bins = y[:n_bins * bin_size].reshape(n_bins, bin_size)
+
+        amplitude = np.empty(n_bins * 2, dtype=y.dtype)
+        amplitude[0::2] = bins.min(axis=1)
+        amplitude[1::2] = bins.max(axis=1)
+
+        bin_starts = np.arange(n_bins) * bin_size
+        times = np.empty(n_bins * 2)
+        times[0::2] = bin_starts / sr
+        times[1::2] = (bin_starts + bin_size / 2) / sr
+
+        return times, amplitude
+
     def generate_full_waveform(self, file_path: str) -> Dict[str, Any]:
         """
         ファイル全体の波形データを生成
@@ -23,23 +55,29 @@ class WaveformGenerator:
         Returns:
             波形データ（time, amplitude, sample_rate）
         """
-        # 音声を読み込み
-        y, sr = librosa.load(file_path, sr=None)
+        y, sr = load_full_audio(file_path)
+        return self.waveform_from_audio(y, sr)
 
-        # 時間軸を生成
-        times = np.arange(len(y)) / sr
+    def waveform_from_audio(self, y: np.ndarray, sr: int) -> Dict[str, Any]:
+        """
+        デコード済みのファイル全体の音声から波形データを生成
 
-        # データポイントが多すぎる場合はダウンサンプリング
-        if len(y) > self.max_points:
-            indices = np.linspace(0, len(y) - 1, self.max_points, dtype=int)
-            times = times[indices]
-            y = y[indices]
+        Args:
+            y: 音声データ
+            sr: サンプリングレート
+
+        Returns:
+            波形データ（time, amplitude, sample_rate）
+        """
+        # 時間軸を生成（データポイントが多すぎる場合はダウンサンプリング）
+        times, amplitude = self.downsample(y, sr)
 
+        # 配列はnumpyのまま返す（orjsonで直接シリアライズ）
         return {
-            "time": times.tolist(),
-            "amplitude": y.tolist(),
+            "time": times,
+            "amplitude": amplitude,
             "sample_rate": int(sr),
-            "duration": float(len(times) / sr) if len(times) > 0 else 0.0
+            "duration": float(len(y) / sr) if len(y) > 0 else 0.0
         }
 
     def generate_episode_waveform(
@@ -59,27 +97,16 @@ class WaveformGenerator:
         Returns:
             波形データ（time, amplitude, sample_rate）
         """
-        # 音声を読み込み
-        y, sr = librosa.load(file_path, sr=None)
-
-        # エピソードの区間を抽出
-        start_sample = int(start_time * sr)
-        end_sample = int(end_time * sr)
-
-        y_segment = y[start_sample:end_sample]
-
-        # 時間軸を生成（エピソード開始からの相対時刻）
-        times = np.arange(len(y_segment)) / sr
+        # エピソードの区間のみを読み込み（ファイル全体はデコードしない）
+        y_segment, sr = read_audio_segment(file_path, start_time, end_time)
 
-        # データポイントが多すぎる場合はダウンサンプリング
-        if len(y_segment) > self.max_points:
-            indices = np.linspace(0, len(y_segment) - 1, self.max_points, dtype=int)
-            times = times[indices]
-            y_segment = y_segment[indices]
+        # 時間軸を生成（エピソード開始からの相対時刻、多すぎる場合はダウンサンプリング）
+        times, amplitude = self.downsample(y_segment, sr)
 
+        # 配列はnumpyのまま返す（orjsonで直接シリアライズ）
         return {
-            "time": times.tolist(),
-            "amplitude": y_segment.tolist(),
+            "time": times,
+            "amplitude": amplitude,
             "sample_rate": int(sr),
             "duration": float(end_time - start_time),
             "start_time": float(start_time),
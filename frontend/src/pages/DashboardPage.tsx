@@ -234,9 +234,18 @@ const DashboardPage: React.FC = () => {
       await analysisAPI.start(fileId);
       showNotification('解析を開始しました', 'info');
 
-      const checkStatus = setInterval(async () => {
+      // サーバーが返す retry_after_ms に従って次回確認を予約する
+      const scheduleCheck = (delay: number) => {
+        setTimeout(checkStatus, delay);
+      };
+
+      const checkStatus = async () => {
+        let nextDelay = 2000; // ヒントがない場合は2秒ごとにチェック
         try {
           const status = await analysisAPI.status(fileId);
+          if (status.retry_after_ms) {
+            nextDelay = status.retry_after_ms;
+          }
 
           // 進捗率を更新
           if (status.progress !== undefined && status.progress !== null) {
@@ -247,23 +256,26 @@ const DashboardPage: React.FC = () => {
           }
 
           if (status.status === 'completed') {
-            clearInterval(checkStatus);
             await loadFiles();
             showNotification('解析が完了しました', 'success');
             setAnalyzingFileId(null);
             setAnalysisProgress('');
             setAnalysisProgressPercent(0);
+            return;
           } else if (status.status === 'failed') {
-            clearInterval(checkStatus);
             showNotification('解析に失敗しました', 'error');
             setAnalyzingFileId(null);
             setAnalysisProgress('');
             setAnalysisProgressPercent(0);
+            return;
           }
         } catch (error) {
           console.error('Status check error:', error);
         }
-      }, 2000); // 2秒ごとにチェック
+        scheduleCheck(nextDelay);
+      };
+
+      scheduleCheck(2000);
     } catch (error: any) {
       showNotification('解析開始に失敗しました: ' + (error.response?.data?.detail || error.message), 'error');
       setAnalyzingFileId(null);
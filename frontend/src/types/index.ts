@@ -113,4 +113,5 @@ export interface AnalysisStatus {
   message: string;
   progress?: number;
   task_id?: string;
+  retry_after_ms?: number;
 }